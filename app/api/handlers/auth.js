@@ -1,6 +1,5 @@
 import { v4 as uuidv4 } from 'uuid'
 import { NextResponse } from 'next/server'
-import bcrypt from 'bcryptjs'
 import jwt from 'jsonwebtoken'
 import { z } from 'zod'
 import {
@@ -10,8 +9,29 @@ import {
   unauthorizedResponse,
   errorResponse,
   successResponse,
+  getUserById,
 } from '../lib/middleware'
 import { registerSchema, loginSchema } from '../lib/schemas'
+import { timed, timedQuery } from '../lib/timing'
+import {
+  hashPassword,
+  verifyPassword,
+  needsRehash,
+  PasswordPoolBusyError,
+  PASSWORD_RETRY_AFTER_SECONDS,
+} from '../lib/passwords'
+import { recordHeartbeat } from '../lib/presence'
+
+/**
+ * 503 for when the password hashing queue is full
+ * @param {Request} request - Request object
+ * @returns {NextResponse} Error response asking the client to retry
+ */
+function passwordBusyResponse(request) {
+  const response = errorResponse('Server busy, retry shortly', 503, request)
+  response.headers.set('Retry-After', String(PASSWORD_RETRY_AFTER_SECONDS))
+  return response
+}
 
 /**
  * POST /api/auth/register
@@ -26,18 +46,18 @@ export async function handleRegister(request) {
     const { email, password, name } = registerSchema.parse(body)
 
     // Check if user exists
-    const { data: existingUser } = await supabase
-      .from('users')
-      .select('*')
-      .eq('email', email)
-      .single()
+    const { data: existingUser } = await timedQuery(
+      request,
+      'users.select',
+      supabase.from('users').select('*').eq('email', email).single()
+    )
 
     if (existingUser) {
       return errorResponse('User already exists', 409, request)
     }
 
-    // Hash password
-    const hashedPassword = await bcrypt.hash(password, 10)
+    // Hash password on the worker pool
+    const hashedPassword = await timed(request, 'hash', hashPassword(password))
 
     // Create user
     const user = {
@@ -46,12 +66,12 @@ export async function handleRegister(request) {
       password: hashedPassword,
       name,
       bio: '',
-      last_seen: new Date().toISOString(),
-      is_online: false,
+      // last_seen and is_online keep their column defaults; presence is
+      // recorded through lib/presence on login and heartbeats
       created_at: new Date().toISOString(),
     }
 
-    const { error } = await supabase.from('users').insert([user])
+    const { error } = await timedQuery(request, 'users.insert', supabase.from('users').insert([user]))
 
     if (error) throw error
 
@@ -76,6 +96,9 @@ export async function handleRegister(request) {
     if (error instanceof z.ZodError) {
       return errorResponse('Validation failed', 400, request)
     }
+    if (error instanceof PasswordPoolBusyError) {
+      return passwordBusyResponse(request)
+    }
     throw error
   }
 }
@@ -93,27 +116,39 @@ export async function handleLogin(request) {
     const { email, password } = loginSchema.parse(body)
 
     // Find user
-    const { data: user, error } = await supabase
-      .from('users')
-      .select('*')
-      .eq('email', email)
-      .single()
+    const { data: user, error } = await timedQuery(
+      request,
+      'users.select',
+      supabase.from('users').select('*').eq('email', email).single()
+    )
 
     if (error || !user) {
       return errorResponse('Invalid credentials', 401, request)
     }
 
-    // Verify password
-    const isValid = await bcrypt.compare(password, user.password)
+    // Verify password on the worker pool
+    const isValid = await timed(request, 'hash', verifyPassword(password, user.password))
     if (!isValid) {
       return errorResponse('Invalid credentials', 401, request)
     }
 
-    // Update last seen and online status
-    await supabase
-      .from('users')
-      .update({ last_seen: new Date().toISOString(), is_online: true })
-      .eq('id', user.id)
+    // Upgrade hashes made at an older cost while we have the password;
+    // best effort, so a full queue doesn't fail the login
+    const rehashed = needsRehash(user.password)
+      ? await timed(request, 'hash', hashPassword(password)).catch(() => null)
+      : null
+
+    if (rehashed) {
+      await timedQuery(
+        request,
+        'users.update',
+        supabase.from('users').update({ password: rehashed }).eq('id', user.id)
+      )
+    }
+
+    // Logging in counts as a heartbeat: buffered like POST /api/users/heartbeat,
+    // and the row we just read lists the user as online until the next rebuild
+    await timed(request, 'db', recordHeartbeat(user.id, () => user), 'presence.heartbeat')
 
     // Generate JWT
     const token = jwt.sign(
@@ -133,6 +168,9 @@ export async function handleLogin(request) {
     if (error instanceof z.ZodError) {
       return errorResponse('Validation failed', 400, request)
     }
+    if (error instanceof PasswordPoolBusyError) {
+      return passwordBusyResponse(request)
+    }
     throw error
   }
 }
@@ -147,14 +185,9 @@ export async function handleGetMe(request) {
     return unauthorizedResponse(request)
   }
 
-  const supabase = getSupabase()
-  const { data: user, error } = await supabase
-    .from('users')
-    .select('*')
-    .eq('id', decoded.userId)
-    .single()
+  const user = await getUserById(decoded.userId, request)
 
-  if (error || !user) {
+  if (!user) {
     return errorResponse('User not found', 404, request)
   }
 
@@ -165,3 +198,9 @@ export async function handleGetMe(request) {
     request
   )
 }
+
+export const authRoutes = [
+  { method: 'POST', path: '/auth/register', handler: handleRegister },
+  { method: 'POST', path: '/auth/login', handler: handleLogin },
+  { method: 'GET', path: '/auth/me', handler: handleGetMe },
+]
@@ -0,0 +1,129 @@
+import { NextResponse } from 'next/server'
+import {
+  verifyToken,
+  verifyTokenValue,
+  unauthorizedResponse,
+  handleCORS,
+} from '../lib/middleware'
+import { subscribe } from '../lib/events'
+
+// Comment line sent periodically so proxies don't close an idle stream
+const KEEPALIVE_MS = 25 * 1000
+
+// How long EventSource waits before reconnecting after a drop
+const RETRY_MS = 3000
+
+// Bytes queued for a client before the stream reports backpressure
+const STREAM_HIGH_WATER_BYTES = 64 * 1024
+
+// A client that stays at or past the high-water mark this long, or lets
+// this much pile up, is disconnected; it catches up with ?since= on reconnect
+const STREAM_STALL_MS = 30 * 1000
+const STREAM_MAX_BACKLOG_BYTES = 1024 * 1024
+
+const encoder = new TextEncoder()
+
+/**
+ * GET /api/events
+ * Server-sent events stream of new messages and presence changes
+ *
+ * Auth is the usual Bearer header or, for EventSource which can't send
+ * headers, a ?token= query parameter.
+ *
+ * Events:
+ * - ready: { userId } once the stream is subscribed
+ * - message: a message in API format plus `cursor`, its conversation cursor,
+ *   to both sender and recipient; after a reconnect, GET /messages/:userId
+ *   with ?since=<cursor> fetches what was missed. Events carry no SSE id, so
+ *   browsers don't send a Last-Event-ID that couldn't be resumed from
+ * - presence: { userId, online, lastSeen } when another user comes online
+ *   or their heartbeats stop
+ *
+ * A client that stops reading is disconnected rather than buffered for
+ * without limit (see STREAM_STALL_MS).
+ */
+export async function handleEvents(request) {
+  const token = new URL(request.url).searchParams.get('token')
+  const decoded = verifyToken(request) || verifyTokenValue(token, request)
+  if (!decoded) {
+    return unauthorizedResponse(request)
+  }
+
+  let cleanup = () => {}
+  let stalledSince = null
+
+  const stream = new ReadableStream({
+    start(controller) {
+      const disconnect = () => {
+        cleanup()
+        try {
+          // Unlike close(), error() discards what is still queued
+          controller.error(new Error('Event stream client is not reading'))
+        } catch (error) {
+          // Already closed
+        }
+      }
+
+      const write = (chunk) => {
+        const { desiredSize } = controller
+        if (desiredSize !== null && desiredSize <= 0) {
+          stalledSince ??= Date.now()
+          if (Date.now() - stalledSince >= STREAM_STALL_MS || -desiredSize >= STREAM_MAX_BACKLOG_BYTES) {
+            disconnect()
+            return
+          }
+        } else {
+          stalledSince = null
+        }
+        try {
+          controller.enqueue(encoder.encode(chunk))
+        } catch (error) {
+          // Stream already closed by the client
+          cleanup()
+        }
+      }
+
+      const send = (event, data) => {
+        write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`)
+      }
+
+      const unsubscribe = subscribe(decoded.userId, send)
+      const keepAlive = setInterval(() => write(': keepalive\n\n'), KEEPALIVE_MS)
+
+      cleanup = () => {
+        clearInterval(keepAlive)
+        unsubscribe()
+      }
+      request.signal?.addEventListener('abort', () => {
+        cleanup()
+        try {
+          controller.close()
+        } catch (error) {
+          // Already closed
+        }
+      })
+
+      write(`retry: ${RETRY_MS}\n\n`)
+      send('ready', { userId: decoded.userId })
+    },
+    cancel() {
+      cleanup()
+    },
+  }, new ByteLengthQueuingStrategy({ highWaterMark: STREAM_HIGH_WATER_BYTES }))
+
+  return handleCORS(
+    new NextResponse(stream, {
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache, no-transform',
+        Connection: 'keep-alive',
+        'X-Accel-Buffering': 'no',
+      },
+    }),
+    request
+  )
+}
+
+export const eventRoutes = [
+  { method: 'GET', path: '/events', handler: handleEvents },
+]
@@ -6,8 +6,40 @@ import {
   unauthorizedResponse,
   successResponse,
   errorResponse,
+  encodeCursor,
+  getCursorParams,
+  getPaginationParams,
 } from '../lib/middleware'
-import { messageSchema } from '../lib/schemas'
+import { messageSchema, messageBatchSchema } from '../lib/schemas'
+import { publishMessage } from '../lib/events'
+import { timedQuery, timedSync } from '../lib/timing'
+
+/**
+ * Format message object from database format to API format
+ * @param {Object} msg - Message row from database
+ * @returns {Object} Formatted message object
+ */
+function formatMessage(msg) {
+  return {
+    id: msg.id,
+    senderId: msg.sender_id,
+    recipientId: msg.recipient_id,
+    content: msg.content,
+    read: msg.read,
+    createdAt: msg.created_at,
+  }
+}
+
+/**
+ * Order-independent key for the two participants of a conversation, least
+ * id first; matches conversation_key() in the messages migration
+ * @param {string} userA - One participant
+ * @param {string} userB - The other participant
+ * @returns {string} "a:b"
+ */
+function conversationKey(userA, userB) {
+  return userA < userB ? `${userA}:${userB}` : `${userB}:${userA}`
+}
 
 /**
  * POST /api/messages
@@ -23,31 +55,122 @@ export async function handleSendMessage(request) {
     const body = await request.json()
     const supabase = getSupabase()
 
-    // Validate input
+    // Same 400 as before handlers had schemas; other problems (a recipient
+    // that isn't a UUID, content over 1000 characters) fail validation
+    if (!body?.recipientId || !body?.content) {
+      return errorResponse('Recipient and content are required', 400, request)
+    }
     const { recipientId, content } = messageSchema.parse(body)
 
     const message = {
       id: uuidv4(),
       sender_id: decoded.userId,
       recipient_id: recipientId,
+      conversation_key: conversationKey(decoded.userId, recipientId),
       content,
       read: false,
       created_at: new Date().toISOString(),
     }
 
-    const { error } = await supabase.from('messages').insert([message])
+    const { error } = await timedQuery(request, 'messages.insert', supabase.from('messages').insert([message]))
 
     if (error) throw error
 
+    const formatted = formatMessage(message)
+    publishMessage(formatted, encodeCursor(message))
+
+    return successResponse(formatted, request)
+  } catch (error) {
+    if (error instanceof z.ZodError) {
+      return errorResponse('Validation failed', 400, request)
+    }
+    throw error
+  }
+}
+
+/**
+ * POST /api/messages/batch
+ * Send many messages in one request, e.g. when a client replays its outbox
+ *
+ * Body: { messages: [{ recipientId, content }, ...] }
+ * Each item is validated on its own; valid items go in with a single insert.
+ * Returns { results, sent, failed } where results[i] is
+ * { index, ok: true, message } or { index, ok: false, error }.
+ */
+export async function handleSendMessageBatch(request) {
+  const decoded = verifyToken(request)
+  if (!decoded) {
+    return unauthorizedResponse(request)
+  }
+
+  try {
+    const body = await request.json()
+    const supabase = getSupabase()
+
+    const { messages } = messageBatchSchema.parse(body)
+
+    const results = new Array(messages.length)
+    const valid = []
+    messages.forEach((item, index) => {
+      const parsed = messageSchema.safeParse(item)
+      if (parsed.success) {
+        valid.push({ index, ...parsed.data })
+      } else {
+        results[index] = { index, ok: false, error: 'Validation failed' }
+      }
+    })
+
+    // Unknown recipients would fail the whole insert on the foreign key
+    const recipientIds = [...new Set(valid.map((item) => item.recipientId))]
+    let known = new Set()
+    if (recipientIds.length > 0) {
+      const { data: recipients, error } = await timedQuery(
+        request,
+        'users.select',
+        supabase.from('users').select('id').in('id', recipientIds)
+      )
+      if (error) throw error
+      known = new Set((recipients || []).map((user) => user.id))
+    }
+
+    // Step the timestamps so the batch keeps its order in (created_at, id)
+    const now = Date.now()
+    const rows = []
+    for (const item of valid) {
+      if (!known.has(item.recipientId)) {
+        results[item.index] = { index: item.index, ok: false, error: 'Recipient not found' }
+        continue
+      }
+      rows.push({
+        index: item.index,
+        row: {
+          id: uuidv4(),
+          sender_id: decoded.userId,
+          recipient_id: item.recipientId,
+          conversation_key: conversationKey(decoded.userId, item.recipientId),
+          content: item.content,
+          read: false,
+          created_at: new Date(now + rows.length).toISOString(),
+        },
+      })
+    }
+
+    if (rows.length > 0) {
+      const { error } = await timedQuery(
+        request,
+        'messages.insert',
+        supabase.from('messages').insert(rows.map(({ row }) => row))
+      )
+      if (error) throw error
+    }
+
+    for (const { index, row } of rows) {
+      results[index] = { index, ok: true, message: formatMessage(row) }
+      publishMessage(results[index].message, encodeCursor(row))
+    }
+
     return successResponse(
-      {
-        id: message.id,
-        senderId: message.sender_id,
-        recipientId: message.recipient_id,
-        content: message.content,
-        read: message.read,
-        createdAt: message.created_at,
-      },
+      { results, sent: rows.length, failed: messages.length - rows.length },
       request
     )
   } catch (error) {
@@ -60,7 +183,21 @@ export async function handleSendMessage(request) {
 
 /**
  * GET /api/messages/:userId
- * Get conversation with a specific user
+ * Get one page of the conversation with a specific user, oldest first
+ *
+ * Keyset pagination on (created_at, id):
+ * - no cursor: the newest `limit` messages
+ * - ?before=<cursor>: the `limit` messages preceding the cursor (older history)
+ * - ?since=<cursor>: up to `limit` messages after the cursor (incremental refresh)
+ *
+ * Fetching the page marks the other user's messages read up to the newest
+ * one returned (see get_conversation_page in supabase/migrations); the
+ * returned read flags are as they were before the fetch. The page is read
+ * from the (conversation_key, created_at, id) index.
+ *
+ * The body stays a plain array; cursors are returned in headers:
+ * X-Next-Cursor (older page, absent when there is none), X-Latest-Cursor
+ * (pass as ?since= to poll for new messages) and X-Has-More.
  */
 export async function handleGetConversation(request, otherUserId) {
   const decoded = verifyToken(request)
@@ -68,33 +205,132 @@ export async function handleGetConversation(request, otherUserId) {
     return unauthorizedResponse(request)
   }
 
+  const { limit, before, since, error: cursorError } = getCursorParams(request, 50)
+  if (cursorError) {
+    return errorResponse(cursorError, 400, request)
+  }
+
   const supabase = getSupabase()
 
-  const { data: messages } = await supabase
-    .from('messages')
-    .select('*')
-    .or(
-      `and(sender_id.eq.${decoded.userId},recipient_id.eq.${otherUserId}),and(sender_id.eq.${otherUserId},recipient_id.eq.${decoded.userId})`
-    )
-    .order('created_at', { ascending: true })
-
-  // Mark messages as read
-  await supabase
-    .from('messages')
-    .update({ read: true })
-    .eq('sender_id', otherUserId)
-    .eq('recipient_id', decoded.userId)
-    .eq('read', false)
-
-  // Convert snake_case to camelCase for client
-  const formattedMessages = (messages || []).map((msg) => ({
-    id: msg.id,
-    senderId: msg.sender_id,
-    recipientId: msg.recipient_id,
-    content: msg.content,
-    read: msg.read,
-    createdAt: msg.created_at,
+  // One round trip: the function selects the page (plus a look-ahead row)
+  // and marks messages read up to the newest row returned
+  const { data, error } = await timedQuery(request, 'get_conversation_page', supabase.rpc('get_conversation_page', {
+    user_id_param: decoded.userId,
+    other_user_id_param: otherUserId,
+    limit_param: limit,
+    before_created_at: before?.createdAt ?? null,
+    before_id: before?.id ?? null,
+    since_created_at: since?.createdAt ?? null,
+    since_id: since?.id ?? null,
   }))
+  if (error) throw error
+
+  const rows = data || []
+  const hasMore = rows.length > limit
+  const page = rows.slice(0, limit)
+  if (!since) page.reverse()
+
+  const response = successResponse(timedSync(request, 'format', () => page.map(formatMessage)), request)
+  const newest = page[page.length - 1]
+  if (newest) {
+    response.headers.set('X-Latest-Cursor', encodeCursor(newest))
+  } else if (since) {
+    response.headers.set('X-Latest-Cursor', encodeCursor({ created_at: since.createdAt, id: since.id }))
+  }
+  if (!since && hasMore) {
+    response.headers.set('X-Next-Cursor', encodeCursor(page[0]))
+  }
+  response.headers.set('X-Has-More', String(hasMore))
+  return response
+}
+
+/**
+ * GET /api/messages/unread
+ * Unread count and latest message of each of the user's conversations,
+ * most recent first, without reading or marking any history
+ *
+ * Served from conversation_summaries, which triggers on messages keep up
+ * to date on insert and when messages are marked read (see the
+ * conversation unread counters migration), so the cost doesn't grow with
+ * the history. ?page= and ?limit= (default 50) page through conversations.
+ *
+ * Returns { conversations, totalUnread, pagination } where each
+ * conversation is { userId, userName, unreadCount, lastMessage: { id,
+ * senderId, preview, createdAt } }.
+ */
+export async function handleGetUnreadSummary(request) {
+  const decoded = verifyToken(request)
+  if (!decoded) {
+    return unauthorizedResponse(request)
+  }
 
-  return successResponse(formattedMessages, request)
+  const supabase = getSupabase()
+  const { page, limit, offset } = getPaginationParams(request, 50)
+
+  // Fetch one extra row to learn whether another page exists
+  const [{ data, error }, { data: unread, error: unreadError }] = await Promise.all([
+    timedQuery(
+      request,
+      'conversation_summaries.select',
+      supabase
+        .from('conversation_summaries')
+        .select(`
+          other_user_id,
+          unread_count,
+          last_message_id,
+          last_sender_id,
+          last_message_preview,
+          last_message_at,
+          other:users!conversation_summaries_other_user_id_fkey (name)
+        `)
+        .eq('user_id', decoded.userId)
+        .order('last_message_at', { ascending: false })
+        .order('other_user_id', { ascending: true })
+        .range(offset, offset + limit)
+    ),
+    timedQuery(
+      request,
+      'conversation_summaries.unread',
+      supabase
+        .from('conversation_summaries')
+        .select('unread_count')
+        .eq('user_id', decoded.userId)
+        .gt('unread_count', 0)
+    ),
+  ])
+  if (error) throw error
+  if (unreadError) throw unreadError
+
+  const rows = data || []
+  const conversations = timedSync(request, 'format', () => rows.slice(0, limit).map((row) => ({
+    userId: row.other_user_id,
+    userName: row.other?.name || 'Unknown User',
+    unreadCount: row.unread_count,
+    lastMessage: {
+      id: row.last_message_id,
+      senderId: row.last_sender_id,
+      preview: row.last_message_preview,
+      createdAt: row.last_message_at,
+    },
+  })))
+
+  return successResponse(
+    {
+      conversations,
+      totalUnread: (unread || []).reduce((sum, row) => sum + row.unread_count, 0),
+      pagination: { page, limit, hasMore: rows.length > limit },
+    },
+    request
+  )
 }
+
+export const messageRoutes = [
+  { method: 'POST', path: '/messages', handler: handleSendMessage },
+  { method: 'POST', path: '/messages/batch', handler: handleSendMessageBatch },
+  { method: 'GET', path: '/messages/unread', handler: handleGetUnreadSummary },
+  {
+    method: 'GET',
+    path: '/messages/:userId',
+    handler: (request, { userId }) => handleGetConversation(request, userId),
+  },
+]
@@ -1,5 +1,4 @@
 import { v4 as uuidv4 } from 'uuid'
-import { z } from 'zod'
 import {
   getSupabase,
   verifyToken,
@@ -7,14 +6,24 @@ import {
   successResponse,
   errorResponse,
   formatTrip,
+  getTripFields,
+  makeETag,
+  isNotModified,
+  notModifiedResponse,
+  conditionalResponse,
   getPaginationParams,
   createPaginationMeta,
 } from '../lib/middleware'
-import { tripSchema } from '../lib/schemas'
+import { getTripFeed, invalidateTripFeeds } from '../lib/feed'
+import { timed, timedQuery, timedSync } from '../lib/timing'
 
 /**
  * POST /api/trips
  * Create a new trip
+ *
+ * Only title, destination and startDate are required; the trip modal
+ * sends tripImages as a comma separated string and may omit endDate.
+ * A new trip is never shared: sharing goes through POST /api/trips/:id/share.
  */
 export async function handleCreateTrip(request) {
   const decoded = verifyToken(request)
@@ -22,55 +31,68 @@ export async function handleCreateTrip(request) {
     return unauthorizedResponse(request)
   }
 
-  try {
-    const body = await request.json()
-    const supabase = getSupabase()
-
-    // Validate input
-    const validatedData = tripSchema.parse(body)
-
-    const trip = {
-      id: uuidv4(),
-      user_id: decoded.userId,
-      title: validatedData.title,
-      destination: validatedData.destination,
-      start_date: validatedData.startDate,
-      end_date: validatedData.endDate || validatedData.startDate,
-      status: validatedData.status || 'future',
-      visibility: validatedData.visibility || 'private',
-      description: validatedData.description || '',
-      cover_photo: validatedData.coverPhoto || '',
-      trip_images: validatedData.tripImages || '',
-      weather: validatedData.weather || '',
-      overall_comment: validatedData.overallComment || '',
-      airlines: validatedData.airlines || [],
-      accommodations: validatedData.accommodations || [],
-      segments: validatedData.segments || [],
-      shared_with: validatedData.sharedWith || [],
-      created_at: new Date().toISOString(),
-      updated_at: new Date().toISOString(),
-    }
+  const body = await request.json()
+  const {
+    title,
+    destination,
+    startDate,
+    endDate,
+    segments,
+    status,
+    visibility,
+    description,
+    coverPhoto,
+    tripImages,
+    weather,
+    overallComment,
+    airlines,
+    accommodations,
+  } = body
+
+  if (!title || !destination || !startDate) {
+    return errorResponse('Title, destination, and start date are required', 400, request)
+  }
 
-    const { error } = await supabase.from('trips').insert([trip])
+  const supabase = getSupabase()
+  const trip = {
+    id: uuidv4(),
+    user_id: decoded.userId,
+    title,
+    destination,
+    start_date: startDate,
+    end_date: endDate || startDate,
+    status: status || 'future',
+    visibility: visibility || 'private',
+    description: description || '',
+    cover_photo: coverPhoto || '',
+    trip_images: tripImages || '',
+    weather: weather || '',
+    overall_comment: overallComment || '',
+    airlines: airlines || [],
+    accommodations: accommodations || [],
+    segments: segments || [],
+    shared_with: [],
+    created_at: new Date().toISOString(),
+    updated_at: new Date().toISOString(),
+  }
 
-    if (error) throw error
+  const { error } = await timedQuery(request, 'trips.insert', supabase.from('trips').insert([trip]))
 
-    // Use formatTrip but without user info
-    const formattedTrip = formatTrip(trip)
-    delete formattedTrip.userName // Remove as it's not needed for create
+  if (error) throw error
+  invalidateTripFeeds()
 
-    return successResponse(formattedTrip, request)
-  } catch (error) {
-    if (error instanceof z.ZodError) {
-      return errorResponse('Validation failed', 400, request)
-    }
-    throw error
-  }
+  // Use formatTrip but without user info
+  const formattedTrip = formatTrip(trip)
+  delete formattedTrip.userName // Remove as it's not needed for create
+
+  return successResponse(formattedTrip, request)
 }
 
 /**
  * GET /api/trips
  * Get user's trips with pagination
+ * ?fields=id,title,... returns (and selects) only those fields
+ * Sends an ETag; If-None-Match gets a 304 without reading the page
  */
 export async function handleGetUserTrips(request) {
   const decoded = verifyToken(request)
@@ -78,41 +100,62 @@ export async function handleGetUserTrips(request) {
     return unauthorizedResponse(request)
   }
 
+  const projection = getTripFields(request)
+  if (projection.error) {
+    return errorResponse(projection.error, 400, request)
+  }
+
   const supabase = getSupabase()
   const { page, limit, offset } = getPaginationParams(request, 10)
 
-  // Get total count
-  const { count } = await supabase
-    .from('trips')
-    .select('*', { count: 'exact', head: true })
-    .eq('user_id', decoded.userId)
-
-  // Get paginated trips
-  const { data: trips } = await supabase
-    .from('trips')
-    .select('*')
-    .eq('user_id', decoded.userId)
-    .order('created_at', { ascending: false })
-    .range(offset, offset + limit - 1)
-
-  const formattedTrips = (trips || []).map((trip) => {
-    const formatted = formatTrip(trip)
-    delete formatted.userName
-    return formatted
-  })
+  // Total count plus the newest updated_at: any create, edit or delete of
+  // this user's trips changes one of them, so together they are the ETag
+  const { count, data: newest } = await timedQuery(
+    request,
+    'trips.count',
+    supabase
+      .from('trips')
+      .select('updated_at', { count: 'exact' })
+      .eq('user_id', decoded.userId)
+      .order('updated_at', { ascending: false })
+      .limit(1)
+  )
+  const etag = makeETag(
+    'trips', decoded.userId, count || 0, newest?.[0]?.updated_at, page, limit, projection.fields
+  )
 
-  return successResponse(
-    {
+  return conditionalResponse(request, etag, async () => {
+    // Get paginated trips
+    const { data: trips } = await timedQuery(
+      request,
+      'trips.select',
+      supabase
+        .from('trips')
+        .select(projection.columns)
+        .eq('user_id', decoded.userId)
+        .order('created_at', { ascending: false })
+        .range(offset, offset + limit - 1)
+    )
+
+    const formattedTrips = timedSync(request, 'format', () => (trips || []).map((trip) => {
+      const formatted = formatTrip(trip, projection.fields)
+      delete formatted.userName
+      return formatted
+    }))
+
+    return {
       trips: formattedTrips,
       pagination: createPaginationMeta(page, limit, count || 0),
-    },
-    request
-  )
+    }
+  })
 }
 
 /**
  * GET /api/trips/public/all
- * Get all public trips with pagination
+ * Get all public trips, newest first
+ * Pass ?cursor=<pagination.nextCursor> for constant-cost deep pages;
+ * ?page= still works for numbered pages, and ?fields= projects like GET /api/trips
+ * Sends an ETag; If-None-Match gets a 304, and cached pages skip the query too
  */
 export async function handleGetPublicTrips(request) {
   const decoded = verifyToken(request)
@@ -120,40 +163,29 @@ export async function handleGetPublicTrips(request) {
     return unauthorizedResponse(request)
   }
 
-  const supabase = getSupabase()
-  const { page, limit, offset } = getPaginationParams(request, 12)
-
-  // Get total count
-  const { count } = await supabase
-    .from('trips')
-    .select('*', { count: 'exact', head: true })
-    .eq('visibility', 'public')
-
-  // Get paginated trips
-  const { data: trips } = await supabase
-    .from('trips')
-    .select(`
-      *,
-      users (name)
-    `)
-    .eq('visibility', 'public')
-    .order('created_at', { ascending: false })
-    .range(offset, offset + limit - 1)
-
-  const formattedTrips = (trips || []).map((trip) => formatTrip(trip))
-
-  return successResponse(
-    {
-      trips: formattedTrips,
-      pagination: createPaginationMeta(page, limit, count || 0),
-    },
-    request
+  const projection = getTripFields(request)
+  if (projection.error) {
+    return errorResponse(projection.error, 400, request)
+  }
+
+  const params = getPaginationParams(request, 12)
+  if (params.error) {
+    return errorResponse(params.error, 400, request)
+  }
+
+  // Includes formatting; cached first pages skip the query
+  const { feed, etag } = await timed(
+    request,
+    'db',
+    getTripFeed('public', decoded.userId, params, projection),
+    'trips.feed'
   )
+  return conditionalResponse(request, etag, () => feed)
 }
 
 /**
  * GET /api/trips/shared
- * Get trips shared with current user
+ * Get trips shared with current user, paged like the public feed
  */
 export async function handleGetSharedTrips(request) {
   const decoded = verifyToken(request)
@@ -161,40 +193,30 @@ export async function handleGetSharedTrips(request) {
     return unauthorizedResponse(request)
   }
 
-  const supabase = getSupabase()
-  const { page, limit, offset } = getPaginationParams(request, 12)
-
-  // Get total count
-  const { count } = await supabase
-    .from('trips')
-    .select('*', { count: 'exact', head: true })
-    .contains('shared_with', [decoded.userId])
-
-  // Find trips where current user is in the shared_with array
-  const { data: trips } = await supabase
-    .from('trips')
-    .select(`
-      *,
-      users (name)
-    `)
-    .contains('shared_with', [decoded.userId])
-    .order('created_at', { ascending: false })
-    .range(offset, offset + limit - 1)
-
-  const formattedTrips = (trips || []).map((trip) => formatTrip(trip))
-
-  return successResponse(
-    {
-      trips: formattedTrips,
-      pagination: createPaginationMeta(page, limit, count || 0),
-    },
-    request
+  const projection = getTripFields(request)
+  if (projection.error) {
+    return errorResponse(projection.error, 400, request)
+  }
+
+  const params = getPaginationParams(request, 12)
+  if (params.error) {
+    return errorResponse(params.error, 400, request)
+  }
+
+  const { feed, etag } = await timed(
+    request,
+    'db',
+    getTripFeed('shared', decoded.userId, params, projection),
+    'trips.feed'
   )
+  return conditionalResponse(request, etag, () => feed)
 }
 
 /**
  * GET /api/trips/:id
- * Get a specific trip by ID
+ * Get a specific trip by ID, optionally projected with ?fields=
+ * Sends an ETag from updated_at; If-None-Match is checked against that
+ * column alone before the whole row is read
  */
 export async function handleGetTripById(request, tripId) {
   const decoded = verifyToken(request)
@@ -202,22 +224,43 @@ export async function handleGetTripById(request, tripId) {
     return unauthorizedResponse(request)
   }
 
+  const projection = getTripFields(request)
+  if (projection.error) {
+    return errorResponse(projection.error, 400, request)
+  }
+
   const supabase = getSupabase()
-  const { data: trip, error } = await supabase
-    .from('trips')
-    .select('*')
-    .eq('id', tripId)
-    .eq('user_id', decoded.userId)
-    .single()
+  const tripETag = (updatedAt) => makeETag('trip', tripId, updatedAt, projection.fields)
+
+  if (request.headers.get('if-none-match')) {
+    const { data: current, error } = await timedQuery(
+      request,
+      'trips.watermark',
+      supabase.from('trips').select('updated_at').eq('id', tripId).eq('user_id', decoded.userId).single()
+    )
+    if (error || !current) {
+      return errorResponse('Trip not found', 404, request)
+    }
+    const etag = tripETag(current.updated_at)
+    if (isNotModified(request, etag)) {
+      return notModifiedResponse(etag, request)
+    }
+  }
+
+  const { data: trip, error } = await timedQuery(
+    request,
+    'trips.select',
+    supabase.from('trips').select(projection.columns).eq('id', tripId).eq('user_id', decoded.userId).single()
+  )
 
   if (error || !trip) {
     return errorResponse('Trip not found', 404, request)
   }
 
-  const formattedTrip = formatTrip(trip)
+  const formattedTrip = formatTrip(trip, projection.fields)
   delete formattedTrip.userName
 
-  return successResponse(formattedTrip, request)
+  return conditionalResponse(request, tripETag(trip.updated_at), () => formattedTrip)
 }
 
 /**
@@ -252,17 +295,22 @@ export async function handleUpdateTrip(request, tripId) {
   if (body.sharedWith !== undefined) updateData.shared_with = body.sharedWith
   updateData.updated_at = new Date().toISOString()
 
-  const { data: updatedTrip, error } = await supabase
-    .from('trips')
-    .update(updateData)
-    .eq('id', tripId)
-    .eq('user_id', decoded.userId)
-    .select()
-    .single()
+  const { data: updatedTrip, error } = await timedQuery(
+    request,
+    'trips.update',
+    supabase
+      .from('trips')
+      .update(updateData)
+      .eq('id', tripId)
+      .eq('user_id', decoded.userId)
+      .select()
+      .single()
+  )
 
   if (error || !updatedTrip) {
     return errorResponse('Trip not found', 404, request)
   }
+  invalidateTripFeeds()
 
   const formattedTrip = formatTrip(updatedTrip)
   delete formattedTrip.userName
@@ -270,6 +318,133 @@ export async function handleUpdateTrip(request, tripId) {
   return successResponse(formattedTrip, request)
 }
 
+/**
+ * POST /api/trips/:id/share
+ * Share a trip with someone via email
+ */
+export async function handleShareTrip(request, tripId) {
+  const decoded = verifyToken(request)
+  if (!decoded) {
+    return unauthorizedResponse(request)
+  }
+
+  const { recipientEmail } = await request.json()
+
+  if (!recipientEmail) {
+    return errorResponse('Recipient email is required', 400, request)
+  }
+
+  // Validate email format
+  const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/
+  if (!emailRegex.test(recipientEmail)) {
+    return errorResponse('Invalid email address', 400, request)
+  }
+
+  const supabase = getSupabase()
+
+  // Get the trip to verify ownership and get details
+  const { data: trip, error: tripError } = await timedQuery(
+    request,
+    'trips.select',
+    supabase
+      .from('trips')
+      .select(`
+        *,
+        users!trips_user_id_fkey (name)
+      `)
+      .eq('id', tripId)
+      .eq('user_id', decoded.userId)
+      .single()
+  )
+
+  if (tripError || !trip) {
+    return errorResponse('Trip not found or you do not have permission to share it', 404, request)
+  }
+
+  try {
+    // Check if recipient is already a user
+    const { data: existingUser, error: userError } = await timedQuery(
+      request,
+      'users.select',
+      supabase.from('users').select('id, name, email').eq('email', recipientEmail.toLowerCase()).single()
+    )
+
+    const isNewUser = Boolean(userError || !existingUser)
+    const EmailService = (await import('@/lib/email-service')).default
+
+    if (!isNewUser) {
+      // Add user to shared_with array if not already there
+      const currentSharedWith = trip.shared_with || []
+      if (!currentSharedWith.includes(existingUser.id)) {
+        const { error: updateError } = await timedQuery(
+          request,
+          'trips.update',
+          supabase
+            .from('trips')
+            .update({
+              shared_with: [...currentSharedWith, existingUser.id],
+              updated_at: new Date().toISOString(),
+            })
+            .eq('id', tripId)
+        )
+
+        if (updateError) {
+          return errorResponse('Failed to share trip', 500, request)
+        }
+        invalidateTripFeeds()
+      }
+
+      await EmailService.sendTripToExistingUser(
+        recipientEmail,
+        {
+          id: trip.id,
+          title: trip.title,
+          destination: trip.destination,
+          startDate: trip.start_date,
+          endDate: trip.end_date,
+        },
+        trip.users?.name || 'Someone'
+      )
+    } else {
+      // User doesn't exist, send invitation email
+      // In the future, you might want to create a pending share record
+      await EmailService.sendTripInvitation(
+        recipientEmail,
+        {
+          id: trip.id,
+          title: trip.title,
+          destination: trip.destination,
+          startDate: trip.start_date,
+          endDate: trip.end_date,
+          rating: trip.rating,
+          description: trip.description,
+        },
+        trip.users?.name || 'Someone'
+      )
+    }
+
+    return successResponse(
+      {
+        success: true,
+        message: isNewUser
+          ? `Invitation sent to ${recipientEmail}`
+          : `Trip shared with ${existingUser.name || recipientEmail}`,
+        isNewUser,
+        recipientEmail,
+        sharedTrip: {
+          id: trip.id,
+          title: trip.title,
+          destination: trip.destination,
+        },
+      },
+      request
+    )
+  } catch (emailError) {
+    console.error('Error sending email:', emailError)
+    return errorResponse('Trip shared but failed to send email notification', 500, request)
+  }
+}
+
 /**
  * DELETE /api/trips/:id
  * Delete a trip
@@ -281,15 +456,27 @@ export async function handleDeleteTrip(request, tripId) {
   }
 
   const supabase = getSupabase()
-  const { error } = await supabase
-    .from('trips')
-    .delete()
-    .eq('id', tripId)
-    .eq('user_id', decoded.userId)
+  const { error } = await timedQuery(
+    request,
+    'trips.delete',
+    supabase.from('trips').delete().eq('id', tripId).eq('user_id', decoded.userId)
+  )
 
   if (error) {
     return errorResponse('Trip not found', 404, request)
   }
+  invalidateTripFeeds()
 
   return successResponse({ success: true }, request)
 }
+
+export const tripRoutes = [
+  { method: 'POST', path: '/trips', handler: handleCreateTrip },
+  { method: 'GET', path: '/trips', handler: handleGetUserTrips },
+  { method: 'GET', path: '/trips/public/all', handler: handleGetPublicTrips },
+  { method: 'GET', path: '/trips/shared', handler: handleGetSharedTrips },
+  { method: 'GET', path: '/trips/:id', handler: (request, { id }) => handleGetTripById(request, id) },
+  { method: 'PATCH', path: '/trips/:id', handler: (request, { id }) => handleUpdateTrip(request, id) },
+  { method: 'DELETE', path: '/trips/:id', handler: (request, { id }) => handleDeleteTrip(request, id) },
+  { method: 'POST', path: '/trips/:id/share', handler: (request, { id }) => handleShareTrip(request, id) },
+]
@@ -0,0 +1,99 @@
+import { logger } from '@/lib/logger'
+import { uploadFileServer, validateFile, generateFilePath, BUCKETS } from '@/lib/storage'
+import {
+  verifyToken,
+  unauthorizedResponse,
+  errorResponse,
+  successResponse,
+} from '../lib/middleware'
+import { timed } from '../lib/timing'
+
+// Files sent to storage at once per request
+const UPLOAD_CONCURRENCY = 4
+
+/**
+ * Run fn over items with at most `limit` calls in flight
+ * @returns {Promise<Array>} Results in the same order as items
+ */
+async function mapWithConcurrency(items, limit, fn) {
+  const results = new Array(items.length)
+  let next = 0
+
+  async function worker() {
+    while (next < items.length) {
+      const index = next++
+      results[index] = await fn(items[index])
+    }
+  }
+
+  await Promise.all(Array.from({ length: Math.min(limit, items.length) }, worker))
+  return results
+}
+
+/**
+ * POST /api/upload
+ * Upload files to Supabase Storage, UPLOAD_CONCURRENCY at a time
+ */
+export async function handleUpload(request) {
+  const decoded = verifyToken(request)
+  if (!decoded) {
+    return unauthorizedResponse(request)
+  }
+
+  try {
+    const formData = await request.formData()
+    const files = formData.getAll('files')
+    const bucket = formData.get('bucket') || BUCKETS.TRIP_IMAGES
+    const folder = formData.get('folder') || 'trips'
+
+    if (!files || files.length === 0) {
+      return errorResponse('No files provided', 400, request)
+    }
+
+    const results = await mapWithConcurrency(files, UPLOAD_CONCURRENCY, async (file) => {
+      // Validate file
+      const validation = validateFile(file, bucket)
+      if (!validation.valid) {
+        return { failed: { file: file.name, error: validation.error } }
+      }
+
+      // Generate unique file path
+      const filePath = generateFilePath(decoded.userId, file.name, folder)
+
+      // The File is a Blob, which storage-js streams as the request body,
+      // so there's no arrayBuffer()/Buffer.from() copy of the bytes
+      // Concurrent uploads add up, so this can exceed the request's wall time
+      const result = await timed(
+        request,
+        'storage',
+        uploadFileServer(file, bucket, filePath, { contentType: file.type })
+      )
+
+      if (result.success) {
+        return { uploaded: { originalName: file.name, ...result.data } }
+      }
+      return { failed: { file: file.name, error: result.error } }
+    })
+
+    // Results keep the order the files were sent in
+    const uploaded = results.filter((result) => result.uploaded).map((result) => result.uploaded)
+    const failed = results.filter((result) => result.failed).map((result) => result.failed)
+
+    return successResponse(
+      {
+        success: failed.length === 0,
+        uploaded,
+        failed,
+        message: `Uploaded ${uploaded.length} file(s)${failed.length > 0 ? `, ${failed.length} failed` : ''}`,
+      },
+      request
+    )
+  } catch (error) {
+    logger.error('Upload error:', error)
+    return errorResponse('Failed to process upload', 500, request)
+  }
+}
+
+export const uploadRoutes = [
+  { method: 'POST', path: '/upload', handler: handleUpload },
+]
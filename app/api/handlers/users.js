@@ -1,11 +1,17 @@
 import {
   getSupabase,
   verifyToken,
+  getUserById,
+  invalidateUser,
   unauthorizedResponse,
   successResponse,
   errorResponse,
+  makeETag,
+  conditionalResponse,
 } from '../lib/middleware'
 import { profileUpdateSchema } from '../lib/schemas'
+import { recordHeartbeat, getOnlineUsers } from '../lib/presence'
+import { timed, timedQuery } from '../lib/timing'
 import { z } from 'zod'
 
 /**
@@ -29,13 +35,14 @@ export async function handleUpdateProfile(request) {
     if (validatedData.name) updateData.name = validatedData.name
     if (validatedData.bio !== undefined) updateData.bio = validatedData.bio
 
-    await supabase.from('users').update(updateData).eq('id', decoded.userId)
+    await timedQuery(request, 'users.update', supabase.from('users').update(updateData).eq('id', decoded.userId))
+    invalidateUser(decoded.userId)
 
-    const { data: user } = await supabase
-      .from('users')
-      .select('*')
-      .eq('id', decoded.userId)
-      .single()
+    const { data: user } = await timedQuery(
+      request,
+      'users.select',
+      supabase.from('users').select('*').eq('id', decoded.userId).single()
+    )
 
     return successResponse(
       {
@@ -53,7 +60,7 @@ export async function handleUpdateProfile(request) {
 
 /**
  * POST /api/users/heartbeat
- * Update user's last seen timestamp
+ * Update user's last seen timestamp (buffered, see lib/presence)
  */
 export async function handleHeartbeat(request) {
   const decoded = verifyToken(request)
@@ -61,12 +68,14 @@ export async function handleHeartbeat(request) {
     return unauthorizedResponse(request)
   }
 
-  const supabase = getSupabase()
-
-  await supabase
-    .from('users')
-    .update({ last_seen: new Date().toISOString(), is_online: true })
-    .eq('id', decoded.userId)
+  // Usually just buffered; a flush writes to the database. The profile is
+  // looked up (through the user cache) only for users new to the online list.
+  await timed(
+    request,
+    'db',
+    recordHeartbeat(decoded.userId, () => getUserById(decoded.userId, request)),
+    'presence.heartbeat'
+  )
 
   return successResponse({ success: true }, request)
 }
@@ -74,6 +83,8 @@ export async function handleHeartbeat(request) {
 /**
  * GET /api/users/online
  * Get list of online users (excluding current user)
+ * Sends an ETag from who is online and when they were last seen;
+ * If-None-Match gets a 304 without serializing the list
  */
 export async function handleGetOnlineUsers(request) {
   const decoded = verifyToken(request)
@@ -81,17 +92,19 @@ export async function handleGetOnlineUsers(request) {
     return unauthorizedResponse(request)
   }
 
-  const supabase = getSupabase()
-
-  // Consider users online if they've been seen in the last 5 minutes
-  const fiveMinutesAgo = new Date(Date.now() - 5 * 60 * 1000).toISOString()
+  // Served from the presence snapshot, which a miss rebuilds with a query
+  const onlineUsers = await timed(request, 'db', getOnlineUsers(decoded.userId), 'presence.online')
 
-  const { data: onlineUsers } = await supabase
-    .from('users')
-    .select('id, name, email, bio, last_seen')
-    .neq('id', decoded.userId)
-    .gte('last_seen', fiveMinutesAgo)
-    .eq('is_online', true)
-
-  return successResponse(onlineUsers || [], request)
+  // last_seen moves with every heartbeat; name and bio with profile edits
+  const etag = makeETag(
+    'online',
+    ...onlineUsers.flatMap((user) => [user.id, user.last_seen, user.name, user.bio])
+  )
+  return conditionalResponse(request, etag, () => onlineUsers)
 }
+
+export const userRoutes = [
+  { method: 'PATCH', path: '/users/profile', handler: handleUpdateProfile },
+  { method: 'POST', path: '/users/heartbeat', handler: handleHeartbeat },
+  { method: 'GET', path: '/users/online', handler: handleGetOnlineUsers },
+]
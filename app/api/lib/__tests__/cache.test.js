@@ -0,0 +1,80 @@
+/**
+ * @jest-environment node
+ */
+import { LruCache } from '../cache'
+
+describe('LruCache', () => {
+  beforeEach(() => {
+    jest.useFakeTimers()
+  })
+
+  afterEach(() => {
+    jest.useRealTimers()
+  })
+
+  it('evicts the least recently used entry when full', () => {
+    const cache = new LruCache(2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    // Reading a makes b the least recently used
+    expect(cache.get('a')).toBe(1)
+    cache.set('c', 3)
+
+    expect(cache.get('b')).toBeUndefined()
+    expect(cache.get('a')).toBe(1)
+    expect(cache.get('c')).toBe(3)
+    expect(cache.size).toBe(2)
+  })
+
+  it('re-setting a key refreshes its recency without growing the cache', () => {
+    const cache = new LruCache(2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.set('a', 10)
+    cache.set('c', 3)
+
+    expect(cache.get('a')).toBe(10)
+    expect(cache.get('b')).toBeUndefined()
+    expect(cache.size).toBe(2)
+  })
+
+  it('expires entries after the default TTL', () => {
+    const cache = new LruCache(10, 1000)
+    cache.set('a', 1)
+
+    jest.advanceTimersByTime(999)
+    expect(cache.get('a')).toBe(1)
+
+    jest.advanceTimersByTime(1)
+    expect(cache.get('a')).toBeUndefined()
+    // Expired entries are dropped on read
+    expect(cache.size).toBe(0)
+  })
+
+  it('honours an explicit expiry over the default TTL', () => {
+    const cache = new LruCache(10, 1000)
+    cache.set('a', 1, Date.now() + 5000)
+
+    jest.advanceTimersByTime(4000)
+    expect(cache.get('a')).toBe(1)
+  })
+
+  it('counts hits and misses', () => {
+    const cache = new LruCache(10)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+
+    expect(cache.hits).toBe(1)
+    expect(cache.misses).toBe(1)
+  })
+
+  it('drops deleted entries', () => {
+    const cache = new LruCache(10)
+    cache.set('a', 1)
+    cache.delete('a')
+
+    expect(cache.get('a')).toBeUndefined()
+  })
+})
@@ -0,0 +1,58 @@
+/**
+ * @jest-environment node
+ */
+import { gunzipSync, brotliDecompressSync } from 'zlib'
+import { compressBody, COMPRESSION_THRESHOLD, pickEncoding } from '../compression'
+
+describe('pickEncoding', () => {
+  it('prefers brotli, then gzip', () => {
+    expect(pickEncoding('gzip, deflate, br')).toBe('br')
+    expect(pickEncoding('gzip, deflate')).toBe('gzip')
+  })
+
+  it('skips codings refused with q=0', () => {
+    expect(pickEncoding('br;q=0, gzip;q=0.8')).toBe('gzip')
+    expect(pickEncoding('br;q=0.0, gzip;q=0')).toBeNull()
+  })
+
+  it('keeps codings with a non-zero q-value', () => {
+    expect(pickEncoding('gzip;q=0.5, br;q=0.1')).toBe('br')
+  })
+
+  it('treats * as gzip', () => {
+    expect(pickEncoding('*')).toBe('gzip')
+  })
+
+  it('returns null for no header or nothing it can produce', () => {
+    expect(pickEncoding(null)).toBeNull()
+    expect(pickEncoding('identity')).toBeNull()
+    expect(pickEncoding('deflate')).toBeNull()
+  })
+})
+
+describe('compressBody', () => {
+  const json = (length) => JSON.stringify({ text: 'x'.repeat(length - 11) })
+
+  it('leaves bodies under the threshold alone', () => {
+    const body = json(COMPRESSION_THRESHOLD - 1)
+    expect(body).toHaveLength(COMPRESSION_THRESHOLD - 1)
+    expect(compressBody(body, 'br')).toEqual({ body, encoding: null })
+  })
+
+  it('compresses bodies at the threshold with the chosen encoding', () => {
+    const body = json(COMPRESSION_THRESHOLD)
+
+    const gzipped = compressBody(body, 'gzip')
+    expect(gzipped.encoding).toBe('gzip')
+    expect(gunzipSync(gzipped.body).toString()).toBe(body)
+
+    const brotli = compressBody(body, 'gzip, br')
+    expect(brotli.encoding).toBe('br')
+    expect(brotliDecompressSync(brotli.body).toString()).toBe(body)
+  })
+
+  it('sends large bodies as is when the client accepts no encoding', () => {
+    const body = json(COMPRESSION_THRESHOLD * 4)
+    expect(compressBody(body, 'br;q=0, identity')).toEqual({ body, encoding: null })
+  })
+})
@@ -0,0 +1,66 @@
+/**
+ * @jest-environment node
+ */
+import { decodeCursor, encodeCursor, InvalidCursorError, isNotModified, makeETag } from '../middleware'
+
+const ROW = { created_at: '2025-01-10T12:34:56.789Z', id: '0b7c9a52-3f1e-4d2a-9c61-5e8f0a1b2c3d' }
+
+// A cursor built by hand, the way a client could tamper with one
+const craft = (text) => Buffer.from(text).toString('base64url')
+
+describe('decodeCursor', () => {
+  it('round-trips a cursor from encodeCursor', () => {
+    expect(decodeCursor(encodeCursor(ROW))).toEqual({ createdAt: ROW.created_at, id: ROW.id })
+  })
+
+  it('treats a missing cursor as none', () => {
+    expect(decodeCursor(null)).toBeNull()
+    expect(decodeCursor('')).toBeNull()
+  })
+
+  it('rejects text that is not base64 of a cursor', () => {
+    expect(() => decodeCursor('not a cursor!')).toThrow(InvalidCursorError)
+    expect(() => decodeCursor(craft('no separator'))).toThrow(InvalidCursorError)
+  })
+
+  it('rejects an id that is not a UUID', () => {
+    expect(() => decodeCursor(craft(`${ROW.created_at}|1),id.gt.(0`))).toThrow(InvalidCursorError)
+  })
+
+  it('rejects a timestamp that is not ISO 8601', () => {
+    expect(() => decodeCursor(craft(`yesterday|${ROW.id}`))).toThrow(InvalidCursorError)
+    expect(() => decodeCursor(craft(`2025-13-45T99:00:00Z|${ROW.id}`))).toThrow(InvalidCursorError)
+  })
+})
+
+describe('isNotModified', () => {
+  const etag = makeETag('trips', 'abc', '2025-01-10T12:00:00Z')
+  const withIfNoneMatch = (value) => new Request('http://localhost/api/trips', {
+    headers: value === null ? {} : { 'If-None-Match': value },
+  })
+
+  it('makes weak ETags', () => {
+    expect(etag).toMatch(/^W\/"[\w-]+"$/)
+  })
+
+  it('matches the same ETag', () => {
+    expect(isNotModified(withIfNoneMatch(etag), etag)).toBe(true)
+  })
+
+  it('compares weakly, with or without the W/ prefix', () => {
+    expect(isNotModified(withIfNoneMatch(etag.slice(2)), etag)).toBe(true)
+  })
+
+  it('matches any ETag in a list', () => {
+    expect(isNotModified(withIfNoneMatch(`W/"other", ${etag}`), etag)).toBe(true)
+  })
+
+  it('matches *', () => {
+    expect(isNotModified(withIfNoneMatch('*'), etag)).toBe(true)
+  })
+
+  it('does not match a different ETag or a missing header', () => {
+    expect(isNotModified(withIfNoneMatch(makeETag('trips', 'changed')), etag)).toBe(false)
+    expect(isNotModified(withIfNoneMatch(null), etag)).toBe(false)
+  })
+})
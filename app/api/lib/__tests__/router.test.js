@@ -0,0 +1,68 @@
+/**
+ * @jest-environment node
+ */
+import { createRouter } from '../router'
+
+const getTrips = () => 'getTrips'
+const createTrip = () => 'createTrip'
+const sharedTrips = () => 'sharedTrips'
+const getTrip = () => 'getTrip'
+const updateTrip = () => 'updateTrip'
+const shareTrip = () => 'shareTrip'
+const health = () => 'health'
+
+const match = createRouter([
+  { method: 'GET', path: '/', handler: health },
+  { method: 'GET', path: '/trips', handler: getTrips },
+  { method: 'POST', path: '/trips', handler: createTrip },
+  // Registered after the parameterized route on purpose
+  { method: 'GET', path: '/trips/:id', handler: getTrip },
+  { method: 'GET', path: '/trips/shared', handler: sharedTrips },
+  { method: 'PATCH', path: '/trips/:id', handler: updateTrip },
+  { method: 'POST', path: '/trips/:id/share', handler: shareTrip },
+])
+
+describe('createRouter', () => {
+  it('matches fixed paths by method', () => {
+    expect(match('GET', ['trips'])).toEqual({ handler: getTrips, params: {} })
+    expect(match('POST', ['trips'])).toEqual({ handler: createTrip, params: {} })
+  })
+
+  it('prefers a fixed path over a parameterized one of the same shape', () => {
+    expect(match('GET', ['trips', 'shared'])).toEqual({ handler: sharedTrips, params: {} })
+    expect(match('GET', ['trips', 'abc'])).toEqual({ handler: getTrip, params: { id: 'abc' } })
+  })
+
+  it('matches literals after a param', () => {
+    expect(match('POST', ['trips', 'abc', 'share'])).toEqual({ handler: shareTrip, params: { id: 'abc' } })
+    expect(match('POST', ['trips', 'abc', 'unshare'])).toBeNull()
+  })
+
+  it('returns null for a known path with another method, which the route answers with 404', () => {
+    expect(match('DELETE', ['trips'])).toBeNull()
+    expect(match('DELETE', ['trips', 'abc'])).toBeNull()
+    expect(match('PUT', ['trips', 'shared'])).toBeNull()
+  })
+
+  it('returns null for unknown paths and shapes', () => {
+    expect(match('GET', ['unknown'])).toBeNull()
+    expect(match('GET', ['trips', 'abc', 'extra'])).toBeNull()
+  })
+
+  it('ignores a trailing slash', () => {
+    expect(match('GET', ['trips', ''])).toEqual({ handler: getTrips, params: {} })
+    expect(match('GET', ['trips', 'abc', ''])).toEqual({ handler: getTrip, params: { id: 'abc' } })
+  })
+
+  it('matches the root for an empty [[...path]]', () => {
+    expect(match('GET', [])).toEqual({ handler: health, params: {} })
+    expect(match('POST', [])).toBeNull()
+  })
+
+  it('passes params through as Next.js decoded them', () => {
+    expect(match('GET', ['trips', 'a b'])).toEqual({ handler: getTrip, params: { id: 'a b' } })
+    // Not decoded a second time, which would turn %25 into % (or throw on a lone %)
+    expect(match('GET', ['trips', '100%25'])).toEqual({ handler: getTrip, params: { id: '100%25' } })
+    expect(match('GET', ['trips', '100%'])).toEqual({ handler: getTrip, params: { id: '100%' } })
+  })
+})
@@ -0,0 +1,72 @@
+/**
+ * Bounded in-memory LRU cache with per-entry expiry
+ *
+ * Entries live in a Map, whose insertion order doubles as recency order:
+ * a hit re-inserts the entry at the end and eviction drops the first one.
+ * Caches are per server instance, so anything stored here must be safe to
+ * serve slightly stale or be invalidated explicitly on write.
+ */
+export class LruCache {
+  /**
+   * @param {number} maxEntries - Entries kept before the least recently used is evicted
+   * @param {number} ttlMs - Default lifetime of an entry in milliseconds
+   */
+  constructor(maxEntries, ttlMs = Infinity) {
+    this.maxEntries = maxEntries
+    this.ttlMs = ttlMs
+    this.entries = new Map()
+    this.hits = 0
+    this.misses = 0
+  }
+
+  /**
+   * Get a live entry, or undefined when missing or expired
+   * @param {string} key - Cache key
+   * @returns {*} Cached value
+   */
+  get(key) {
+    const entry = this.entries.get(key)
+    if (!entry) {
+      this.misses++
+      return undefined
+    }
+    this.entries.delete(key)
+    if (entry.expiresAt <= Date.now()) {
+      this.misses++
+      return undefined
+    }
+    this.entries.set(key, entry)
+    this.hits++
+    return entry.value
+  }
+
+  /**
+   * Store a value, evicting the least recently used entry when full
+   * @param {string} key - Cache key
+   * @param {*} value - Value to cache
+   * @param {number} expiresAt - Absolute expiry (ms); defaults to now + ttlMs
+   */
+  set(key, value, expiresAt = Date.now() + this.ttlMs) {
+    this.entries.delete(key)
+    this.entries.set(key, { value, expiresAt })
+    if (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value)
+    }
+  }
+
+  /**
+   * Drop an entry, e.g. after the underlying row changed
+   * @param {string} key - Cache key
+   */
+  delete(key) {
+    this.entries.delete(key)
+  }
+
+  clear() {
+    this.entries.clear()
+  }
+
+  get size() {
+    return this.entries.size
+  }
+}
@@ -0,0 +1,48 @@
+import { brotliCompressSync, gzipSync, constants } from 'zlib'
+
+/**
+ * Response compression for JSON bodies
+ *
+ * Trip lists carry segments, accommodations and long comments, and JSON
+ * like that shrinks several times over. Bodies from COMPRESSION_THRESHOLD
+ * bytes up are sent with brotli when the client accepts it, else gzip.
+ * Brotli runs at a low quality level: most of the size win for a small
+ * fraction of the CPU of the default. A proxy or `next start` won't
+ * compress again, since Content-Encoding is already set.
+ */
+
+// Smaller bodies fit in a packet or two anyway; not worth the CPU
+export const COMPRESSION_THRESHOLD = 1024
+
+const BROTLI_OPTIONS = { params: { [constants.BROTLI_PARAM_QUALITY]: 4 } }
+
+/**
+ * Preferred encoding the client accepts
+ * @param {string|null} acceptEncoding - Accept-Encoding request header
+ * @returns {'br'|'gzip'|null} Encoding to use, or null for none
+ */
+export function pickEncoding(acceptEncoding) {
+  if (!acceptEncoding) return null
+  const accepted = new Set()
+  for (const part of acceptEncoding.split(',')) {
+    const [coding, ...params] = part.trim().toLowerCase().split(';')
+    const refused = params.some((param) => /^\s*q=0(\.0*)?\s*$/.test(param))
+    if (coding && !refused) accepted.add(coding)
+  }
+  if (accepted.has('br')) return 'br'
+  if (accepted.has('gzip') || accepted.has('*')) return 'gzip'
+  return null
+}
+
+/**
+ * Compress a serialized body when it is large enough and the client accepts it
+ * @param {string} body - JSON text
+ * @param {string|null} acceptEncoding - Accept-Encoding request header
+ * @returns {{ body: string|Buffer, encoding: string|null }} Body to send and its Content-Encoding
+ */
+export function compressBody(body, acceptEncoding) {
+  const encoding = body.length >= COMPRESSION_THRESHOLD ? pickEncoding(acceptEncoding) : null
+  if (encoding === 'br') return { body: brotliCompressSync(body, BROTLI_OPTIONS), encoding }
+  if (encoding === 'gzip') return { body: gzipSync(body), encoding }
+  return { body, encoding: null }
+}
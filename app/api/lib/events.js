@@ -0,0 +1,80 @@
+/**
+ * In-process hub for the GET /api/events stream
+ *
+ * Each open stream registers a send(event, data) callback for its user.
+ * New messages go to the sender's and recipient's streams; presence changes
+ * go to every stream. The hub is per server instance and keeps no history: a
+ * reconnecting client catches up per conversation by fetching with ?since=,
+ * which is why message events carry their conversation cursor. Events have
+ * no SSE id, since no single id could resume every conversation.
+ */
+
+// userId -> Set of send callbacks, one per open stream
+const subscribers = new Map()
+
+/**
+ * Register a stream for a user
+ * @param {string} userId - User the stream belongs to
+ * @param {Function} send - Called as send(event, data)
+ * @returns {Function} Unsubscribe function
+ */
+export function subscribe(userId, send) {
+  if (!subscribers.has(userId)) {
+    subscribers.set(userId, new Set())
+  }
+  subscribers.get(userId).add(send)
+
+  return () => {
+    const streams = subscribers.get(userId)
+    if (!streams) return
+    streams.delete(send)
+    if (streams.size === 0) {
+      subscribers.delete(userId)
+    }
+  }
+}
+
+function deliver(userId, event, data) {
+  const streams = subscribers.get(userId)
+  if (!streams) return
+  for (const send of streams) {
+    send(event, data)
+  }
+}
+
+/**
+ * Push a new message to both participants' streams
+ * @param {Object} message - Message in API format
+ * @param {string} cursor - Conversation cursor of the message
+ */
+export function publishMessage(message, cursor) {
+  const data = { ...message, cursor }
+  deliver(message.recipientId, 'message', data)
+  if (message.senderId !== message.recipientId) {
+    deliver(message.senderId, 'message', data)
+  }
+}
+
+/**
+ * Tell every open stream that a user came online or went offline
+ * @param {Object} presence - { userId, online, lastSeen }
+ */
+export function publishPresence(presence) {
+  for (const userId of subscribers.keys()) {
+    if (userId !== presence.userId) {
+      deliver(userId, 'presence', presence)
+    }
+  }
+}
+
+/**
+ * Number of open streams on this instance
+ * @returns {number}
+ */
+export function subscriberCount() {
+  let count = 0
+  for (const streams of subscribers.values()) {
+    count += streams.size
+  }
+  return count
+}
@@ -0,0 +1,125 @@
+import { getSupabase, formatTrip, makeETag, encodeCursor, createPaginationMeta } from './middleware'
+import { LruCache } from './cache'
+
+// The first few offset pages of each feed are cached briefly; any trip
+// write clears them, so they are never staler than the last write
+const CACHED_PAGES = 3
+const PAGE_CACHE_TTL_MS = 10 * 1000
+const pageCache = new LruCache(1000, PAGE_CACHE_TTL_MS)
+
+// Totals are planner estimates, refreshed at most once a minute per feed
+const TOTAL_CACHE_TTL_MS = 60 * 1000
+const totalCache = new LruCache(1000, TOTAL_CACHE_TTL_MS)
+
+// Feeds of other users' trips; filter() narrows a trips query to the feed
+const FEEDS = {
+  public: {
+    filter: (query) => query.eq('visibility', 'public'),
+    key: () => 'public',
+  },
+  shared: {
+    filter: (query, userId) => query.contains('shared_with', [userId]),
+    key: (userId) => `shared:${userId}`,
+  },
+}
+
+/**
+ * Drop cached feed pages after a trip is created, updated, shared or deleted
+ */
+export function invalidateTripFeeds() {
+  pageCache.clear()
+}
+
+async function getFeedTotal(feed, userId) {
+  const key = feed.key(userId)
+  const cached = totalCache.get(key)
+  if (cached !== undefined) {
+    return cached
+  }
+
+  const { count, error } = await feed
+    .filter(getSupabase().from('trips').select('id', { count: 'estimated', head: true }), userId)
+  if (error) throw error
+
+  totalCache.set(key, count || 0)
+  return count || 0
+}
+
+/**
+ * Get one page of a trip feed, newest first
+ *
+ * With a cursor the page is found by keyset on (created_at, id), so every
+ * page costs the same no matter how deep it is. Without one, `page` is
+ * used as before (OFFSET) for clients that jump to numbered pages.
+ * Either way pagination.nextCursor points at the following page.
+ *
+ * The ETag is built from the page's (id, updated_at) pairs and its
+ * pagination, and cached with the page, so a poll that hits the cache
+ * can be answered 304 without a query or serialization.
+ *
+ * @param {string} kind - 'public' or 'shared'
+ * @param {string} userId - Current user (the shared feed is per user)
+ * @param {Object} params - { page, limit, offset, after } from getPaginationParams; its error must be checked first
+ * @param {Object} projection - { fields, columns, withUser } from getTripFields; all fields when omitted
+ * @returns {Promise<Object>} { feed: { trips, pagination }, etag }
+ */
+export async function getTripFeed(kind, userId, { page, limit, offset, after }, projection = null) {
+  const feed = FEEDS[kind]
+  const { fields, columns, withUser } = projection || { fields: null, columns: '*', withUser: true }
+
+  const cacheKey = !after && page <= CACHED_PAGES
+    ? `${feed.key(userId)}:${page}:${limit}:${fields ? fields.join(',') : '*'}`
+    : null
+  if (cacheKey) {
+    const cached = pageCache.get(cacheKey)
+    if (cached) {
+      return cached
+    }
+  }
+
+  let query = feed.filter(
+    getSupabase().from('trips').select(withUser ? `${columns}, users (name)` : columns),
+    userId
+  )
+  if (after) {
+    query = query.or(
+      `created_at.lt."${after.createdAt}",and(created_at.eq."${after.createdAt}",id.lt.${after.id})`
+    )
+  }
+  query = query.order('created_at', { ascending: false }).order('id', { ascending: false })
+
+  // Fetch one extra row to learn whether another page exists
+  const [{ data, error }, total] = await Promise.all([
+    after ? query.limit(limit + 1) : query.range(offset, offset + limit),
+    getFeedTotal(feed, userId),
+  ])
+  if (error) throw error
+
+  const rows = data || []
+  const hasMore = rows.length > limit
+  const pageRows = rows.slice(0, limit)
+
+  const body = {
+    trips: pageRows.map((trip) => formatTrip(trip, fields)),
+    pagination: {
+      ...createPaginationMeta(after ? null : page, limit, total),
+      hasMore,
+      nextCursor: hasMore ? encodeCursor(pageRows[pageRows.length - 1]) : null,
+    },
+  }
+  const etag = makeETag(
+    kind,
+    body.pagination.page,
+    body.pagination.limit,
+    body.pagination.total,
+    body.pagination.nextCursor,
+    fields,
+    ...pageRows.map((trip) => `${trip.id}@${trip.updated_at}`)
+  )
+  const result = { feed: body, etag }
+
+  if (cacheKey) {
+    pageCache.set(cacheKey, result)
+  }
+  return result
+}
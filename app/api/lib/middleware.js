@@ -1,10 +1,60 @@
 import { NextResponse } from 'next/server'
+import { createHash } from 'crypto'
 import jwt from 'jsonwebtoken'
 import { createServerSupabaseClient } from '@/lib/supabase'
+import { LruCache } from './cache'
+import { recordPhase, serverTimingHeader, timedQuery } from './timing'
+import { compressBody, COMPRESSION_THRESHOLD } from './compression'
 
 // Supabase client (singleton pattern)
 let supabase = null
 
+// Decoded JWT claims keyed by a hash of the token, so repeat requests skip
+// the signature check; entries expire with the token itself
+const TOKEN_CACHE_SIZE = 10000
+const tokenCache = new LruCache(TOKEN_CACHE_SIZE)
+
+// User rows for handlers that only need to read them (e.g. /auth/me)
+const USER_CACHE_SIZE = 5000
+const USER_CACHE_TTL_MS = 30 * 1000
+const userCache = new LruCache(USER_CACHE_SIZE, USER_CACHE_TTL_MS)
+
+// Whether each request's token came from the cache, reported in X-Auth-Cache
+// only when AUTH_CACHE_DEBUG=true (the token reuse bench), since it tells any
+// origin about the server's cache
+const AUTH_CACHE_DEBUG = process.env.AUTH_CACHE_DEBUG === 'true'
+const authCacheOutcomes = new WeakMap()
+
+// Response headers the browser is allowed to read
+const EXPOSED_HEADERS = ['X-Next-Cursor', 'X-Latest-Cursor', 'X-Has-More', 'Server-Timing', 'ETag']
+
+// Polled GETs carry an ETag; browsers must revalidate before reusing them
+const REVALIDATE = 'private, no-cache'
+
+// API field -> trips column, for ?fields= projections; userName comes
+// from the users join on the feeds
+const TRIP_COLUMNS = {
+  id: 'id',
+  userId: 'user_id',
+  title: 'title',
+  destination: 'destination',
+  startDate: 'start_date',
+  endDate: 'end_date',
+  status: 'status',
+  visibility: 'visibility',
+  description: 'description',
+  coverPhoto: 'cover_photo',
+  tripImages: 'trip_images',
+  weather: 'weather',
+  overallComment: 'overall_comment',
+  airlines: 'airlines',
+  accommodations: 'accommodations',
+  segments: 'segments',
+  sharedWith: 'shared_with',
+  createdAt: 'created_at',
+  updatedAt: 'updated_at',
+}
+
 /**
  * Get or create Supabase client
  * @returns {SupabaseClient} Supabase client instance
@@ -57,8 +107,18 @@ export function handleCORS(response, request = null) {
   }
 
   response.headers.set('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS, PATCH')
-  response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+  response.headers.set('Access-Control-Allow-Headers', 'Content-Type, Authorization, If-None-Match')
+  response.headers.set('Access-Control-Expose-Headers', EXPOSED_HEADERS.join(', '))
   response.headers.set('Access-Control-Allow-Credentials', 'true')
+
+  const authCache = AUTH_CACHE_DEBUG && request && authCacheOutcomes.get(request)
+  if (authCache) {
+    response.headers.set('X-Auth-Cache', authCache)
+  }
+  const timing = serverTimingHeader(request)
+  if (timing) {
+    response.headers.set('Server-Timing', timing)
+  }
   return response
 }
 
@@ -73,12 +133,77 @@ export function verifyToken(request) {
     return null
   }
 
-  const token = authHeader.replace('Bearer ', '')
+  return verifyTokenValue(authHeader.replace('Bearer ', ''), request)
+}
+
+/**
+ * Verify a raw JWT, e.g. one passed as a query parameter to GET /api/events
+ * where EventSource can't set an Authorization header
+ * @param {string} token - Encoded JWT
+ * @param {Request} request - Request to record the cache outcome against
+ * @returns {Object|null} Decoded token payload or null if invalid
+ */
+export function verifyTokenValue(token, request = null) {
+  if (!token) {
+    return null
+  }
+
+  const started = performance.now()
+  const key = createHash('sha256').update(token).digest('base64url')
+
+  const cached = tokenCache.get(key)
+  if (cached) {
+    if (request) authCacheOutcomes.set(request, 'hit')
+    recordPhase(request, 'auth', performance.now() - started)
+    return cached
+  }
+
+  if (request) authCacheOutcomes.set(request, 'miss')
   try {
-    return jwt.verify(token, process.env.JWT_SECRET)
+    const decoded = jwt.verify(token, process.env.JWT_SECRET)
+    // Tokens without exp are still cached, but evicted like any other entry
+    const expiresAt = decoded.exp ? decoded.exp * 1000 : Infinity
+    tokenCache.set(key, decoded, expiresAt)
+    return decoded
   } catch (error) {
     return null
+  } finally {
+    recordPhase(request, 'auth', performance.now() - started)
+  }
+}
+
+/**
+ * Get a user row by id, served from a short-TTL cache
+ * Rows may be up to USER_CACHE_TTL_MS stale; writers call invalidateUser.
+ * @param {string} userId - User id
+ * @param {Request} request - Request to record the query's timing against
+ * @returns {Promise<Object|null>} User row or null if not found
+ */
+export async function getUserById(userId, request = null) {
+  const cached = userCache.get(userId)
+  if (cached) {
+    return cached
+  }
+
+  const { data: user, error } = await timedQuery(
+    request,
+    'users.select',
+    getSupabase().from('users').select('*').eq('id', userId).single()
+  )
+
+  if (error || !user) {
+    return null
   }
+  userCache.set(userId, user)
+  return user
+}
+
+/**
+ * Drop a cached user row after it changed
+ * @param {string} userId - User id
+ */
+export function invalidateUser(userId) {
+  userCache.delete(userId)
 }
 
 /**
@@ -111,18 +236,134 @@ export function errorResponse(message, status = 400, request = null) {
  * Create success response
  * @param {Object} data - Response data
  * @param {Request} request - Request object for CORS
+ * @param {Object} extraHeaders - More response headers, e.g. an ETag
  * @returns {NextResponse} Success response
  */
-export function successResponse(data, request = null) {
-  return handleCORS(NextResponse.json(data), request)
+export function successResponse(data, request = null, extraHeaders = null) {
+  let started = performance.now()
+  const json = JSON.stringify(data)
+  recordPhase(request, 'format', performance.now() - started)
+
+  started = performance.now()
+  const { body, encoding } = compressBody(json, request?.headers.get('accept-encoding'))
+  const headers = { 'Content-Type': 'application/json', ...extraHeaders }
+  if (encoding) {
+    headers['Content-Encoding'] = encoding
+    recordPhase(request, 'compress', performance.now() - started)
+  }
+  if (json.length >= COMPRESSION_THRESHOLD) {
+    headers.Vary = 'Accept-Encoding'
+  }
+  return handleCORS(new NextResponse(body, { headers }), request)
+}
+
+/**
+ * Weak ETag from the values a response depends on
+ *
+ * The parts are watermarks, not the body: e.g. a row count and the newest
+ * updated_at, plus the query parameters that shape the page. Weak, since
+ * the same data goes out gzipped, brotli'd or plain.
+ * @param {...*} parts - Strings, numbers, arrays or null
+ * @returns {string} e.g. 'W/"Qm9ZXk2f1V0pG8aS0lq1Xw"'
+ */
+export function makeETag(...parts) {
+  const hash = createHash('sha1')
+  for (const part of parts) {
+    hash.update(`${part ?? ''}\u0000`)
+  }
+  return `W/"${hash.digest('base64url').slice(0, 22)}"`
+}
+
+/**
+ * Whether the request's If-None-Match already names this ETag
+ * @param {Request} request - Request object
+ * @param {string} etag - Current ETag, from makeETag
+ * @returns {boolean} True when a 304 can be sent
+ */
+export function isNotModified(request, etag) {
+  const header = request.headers.get('if-none-match')
+  if (!header) return false
+  const opaque = etag.replace(/^W\//, '')
+  return header.split(',').some((tag) => {
+    const candidate = tag.trim()
+    return candidate === '*' || candidate.replace(/^W\//, '') === opaque
+  })
+}
+
+/**
+ * Create 304 Not Modified response
+ * @param {string} etag - ETag the client already holds
+ * @param {Request} request - Request object for CORS
+ * @returns {NextResponse} Empty 304 response
+ */
+export function notModifiedResponse(etag, request = null) {
+  return handleCORS(
+    new NextResponse(null, { status: 304, headers: { ETag: etag, 'Cache-Control': REVALIDATE } }),
+    request
+  )
+}
+
+/**
+ * Answer a polled GET: 304 when If-None-Match matches `etag`, else the
+ * body from `build`, which only runs (and is only serialized) on a change
+ * @param {Request} request - Request object
+ * @param {string} etag - Current ETag, from makeETag
+ * @param {Function} build - Returns the response data, or a promise of it
+ * @returns {Promise<NextResponse>} 304 or success response carrying the ETag
+ */
+export async function conditionalResponse(request, etag, build) {
+  if (isNotModified(request, etag)) {
+    return notModifiedResponse(etag, request)
+  }
+  return successResponse(await build(), request, { ETag: etag, 'Cache-Control': REVALIDATE })
+}
+
+/**
+ * Parse ?fields= on the trip routes into the columns to select
+ *
+ * ?fields=id,title,destination,startDate,endDate,coverPhoto returns just
+ * those fields and reads just those columns. id, created_at and updated_at
+ * are always selected, since cursors and ETags are built from them.
+ * @param {Request} request - Request object
+ * @returns {Object} { fields, columns, withUser, error } - fields is null
+ *   (every field) when the parameter is absent; error names unknown fields
+ */
+export function getTripFields(request) {
+  const param = new URL(request.url).searchParams.get('fields')
+  if (!param) {
+    return { fields: null, columns: '*', withUser: true, error: null }
+  }
+
+  const fields = [...new Set(param.split(',').map((field) => field.trim()).filter(Boolean))]
+  const unknown = fields.filter((field) => !TRIP_COLUMNS[field] && field !== 'userName')
+  if (unknown.length > 0) {
+    return { fields, columns: null, withUser: false, error: `Unknown field(s): ${unknown.join(', ')}` }
+  }
+
+  const columns = new Set(['id', 'created_at', 'updated_at'])
+  for (const field of fields) {
+    if (TRIP_COLUMNS[field]) columns.add(TRIP_COLUMNS[field])
+  }
+  return { fields, columns: [...columns].join(', '), withUser: fields.includes('userName'), error: null }
 }
 
 /**
  * Format trip object from database format to API format
  * @param {Object} trip - Trip object from database
+ * @param {string[]|null} fields - Only these fields (see getTripFields), or all when null
  * @returns {Object} Formatted trip object
  */
-export function formatTrip(trip) {
+export function formatTrip(trip, fields = null) {
+  if (fields) {
+    const formatted = {}
+    for (const field of fields) {
+      formatted[field] = field === 'userName'
+        ? trip.users?.name || 'Unknown User'
+        : trip[TRIP_COLUMNS[field]]
+    }
+    return formatted
+  }
+
   return {
     id: trip.id,
     userId: trip.user_id,
@@ -151,7 +392,8 @@ export function formatTrip(trip) {
  * Get pagination parameters from URL search params
  * @param {Request} request - Request object
  * @param {number} defaultLimit - Default limit value
- * @returns {Object} Pagination parameters { page, limit, offset }
+ * @returns {Object} Pagination parameters { page, limit, offset, cursor, after, error }, where
+ *   `after` is the decoded ?cursor= (or null) and error is set when that cursor is malformed
  */
 export function getPaginationParams(request, defaultLimit = 10) {
   const { searchParams } = new URL(request.url)
@@ -169,8 +411,18 @@ export function getPaginationParams(request, defaultLimit = 10) {
     limit = 100
   }
   const offset = (page - 1) * limit
+  // Keyset cursor, used instead of page/offset where the endpoint supports it
+  const cursor = searchParams.get('cursor')
+  let after = null
+  let error = null
+  try {
+    after = decodeCursor(cursor)
+  } catch (cursorError) {
+    if (!(cursorError instanceof InvalidCursorError)) throw cursorError
+    error = cursorError.message
+  }
 
-  return { page, limit, offset }
+  return { page, limit, offset, cursor, after, error }
 }
 
 /**
@@ -192,3 +444,81 @@ export function createPaginationMeta(page, limit, total) {
     hasMore: offset + limit < total,
   }
 }
+
+/**
+ * Encode a keyset cursor for a row ordered by (created_at, id)
+ * @param {Object} row - Row with created_at and id
+ * @returns {string} Opaque URL-safe cursor
+ */
+export function encodeCursor(row) {
+  return Buffer.from(`${row.created_at}|${row.id}`).toString('base64url')
+}
+
+// Cursor parts end up in PostgREST filter strings, so only the shapes
+// encodeCursor produces are accepted: a UUID and an ISO 8601 timestamp
+const CURSOR_ID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i
+const CURSOR_TIMESTAMP_PATTERN = /^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}:?\d{2})$/
+
+/**
+ * Thrown by decodeCursor for a cursor encodeCursor could not have produced
+ */
+export class InvalidCursorError extends Error {
+  constructor() {
+    super('Invalid cursor')
+    this.name = 'InvalidCursorError'
+  }
+}
+
+/**
+ * Decode a cursor produced by encodeCursor
+ * @param {string|null} cursor - Cursor from the query string
+ * @returns {Object|null} { createdAt, id }, or null if missing
+ * @throws {InvalidCursorError} If the cursor is malformed
+ */
+export function decodeCursor(cursor) {
+  if (!cursor) return null
+  const decoded = Buffer.from(cursor, 'base64url').toString('utf8')
+  const separator = decoded.lastIndexOf('|')
+  const createdAt = decoded.slice(0, Math.max(separator, 0))
+  const id = decoded.slice(separator + 1)
+  if (
+    separator <= 0 ||
+    !CURSOR_ID_PATTERN.test(id) ||
+    !CURSOR_TIMESTAMP_PATTERN.test(createdAt) ||
+    isNaN(Date.parse(createdAt))
+  ) {
+    throw new InvalidCursorError()
+  }
+  return { createdAt, id }
+}
+
+/**
+ * Get keyset pagination parameters from URL search params
+ * @param {Request} request - Request object
+ * @param {number} defaultLimit - Default limit value
+ * @returns {Object} { limit, before, since, error } where cursors are decoded or null,
+ *   and error is set when one of them is malformed
+ */
+export function getCursorParams(request, defaultLimit = 50) {
+  const { searchParams } = new URL(request.url)
+  let limit = parseInt(searchParams.get('limit') || String(defaultLimit), 10)
+
+  // Limit must be between 1 and 100
+  if (isNaN(limit) || limit < 1) {
+    limit = defaultLimit
+  } else if (limit > 100) {
+    limit = 100
+  }
+
+  try {
+    return {
+      limit,
+      before: decodeCursor(searchParams.get('before')),
+      since: decodeCursor(searchParams.get('since')),
+      error: null,
+    }
+  } catch (error) {
+    if (!(error instanceof InvalidCursorError)) throw error
+    return { limit, before: null, since: null, error: error.message }
+  }
+}
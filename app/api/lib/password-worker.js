@@ -0,0 +1,18 @@
+import { parentPort } from 'worker_threads'
+import bcrypt from 'bcryptjs'
+
+/**
+ * Worker thread for the password pool in passwords.js
+ *
+ * A module of its own (rather than evaluated source) so the bundler emits
+ * it as a chunk and the output file tracing sees its bcryptjs import.
+ */
+
+parentPort.on('message', ({ op, password, hash, cost }) => {
+  try {
+    const result = op === 'hash' ? bcrypt.hashSync(password, cost) : bcrypt.compareSync(password, hash)
+    parentPort.postMessage({ result })
+  } catch (error) {
+    parentPort.postMessage({ error: error.message })
+  }
+})
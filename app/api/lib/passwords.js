@@ -0,0 +1,134 @@
+import { Worker } from 'worker_threads'
+import os from 'os'
+import bcrypt from 'bcryptjs'
+
+/**
+ * bcrypt off the request thread
+ *
+ * bcryptjs is pure JavaScript: a cost 10 hash or compare is tens of
+ * milliseconds of CPU, and on the request thread a burst of logins stalls
+ * every other route. Jobs run on a small pool of worker threads instead.
+ * The queue in front of the pool is bounded: past PASSWORD_MAX_QUEUED
+ * waiting jobs, callers get a PasswordPoolBusyError to turn into a 503
+ * rather than a place at the back of an ever longer line.
+ */
+
+// Cost factor for new hashes; stored hashes with another cost are
+// rehashed on the next successful login (see needsRehash)
+export const PASSWORD_COST = Number(process.env.BCRYPT_COST) || 10
+
+// Leave a core for the request thread
+const POOL_SIZE = Math.max(1, Math.min(4, os.cpus().length - 1))
+const PASSWORD_MAX_QUEUED = POOL_SIZE * 32
+
+// Seconds clients are told to wait when the queue is full
+export const PASSWORD_RETRY_AFTER_SECONDS = 1
+
+export class PasswordPoolBusyError extends Error {
+  constructor() {
+    super('Password hashing queue is full')
+    this.name = 'PasswordPoolBusyError'
+  }
+}
+
+class PasswordPool {
+  /**
+   * @param {number} size - Worker threads
+   * @param {number} maxQueued - Jobs allowed to wait for a free worker
+   */
+  constructor(size, maxQueued) {
+    this.size = size
+    this.maxQueued = maxQueued
+    this.workers = []
+    this.idle = []
+    this.queue = []
+  }
+
+  spawn() {
+    // Referenced through import.meta.url so the bundler emits the worker
+    // and its bcryptjs import with the server build
+    const worker = new Worker(new URL('./password-worker.js', import.meta.url))
+    worker.job = null
+    // Idle workers shouldn't keep the process alive
+    worker.unref()
+    worker.on('message', ({ result, error }) => {
+      const job = worker.job
+      worker.job = null
+      worker.unref()
+      this.idle.push(worker)
+      if (error) job.reject(new Error(error))
+      else job.resolve(result)
+      this.drain()
+    })
+    worker.on('error', (error) => {
+      // A crashed worker fails its job and is replaced on demand
+      this.workers = this.workers.filter((other) => other !== worker)
+      this.idle = this.idle.filter((other) => other !== worker)
+      worker.job?.reject(error)
+      this.drain()
+    })
+    this.workers.push(worker)
+    this.idle.push(worker)
+  }
+
+  /**
+   * Queue a job for the next free worker
+   * @param {Object} message - { op, password, hash?, cost? }
+   * @returns {Promise<*>} The worker's result
+   */
+  run(message) {
+    if (this.queue.length >= this.maxQueued) {
+      return Promise.reject(new PasswordPoolBusyError())
+    }
+    return new Promise((resolve, reject) => {
+      this.queue.push({ message, resolve, reject })
+      this.drain()
+    })
+  }
+
+  drain() {
+    while (this.queue.length > 0) {
+      if (this.idle.length === 0 && this.workers.length < this.size) {
+        this.spawn()
+      }
+      const worker = this.idle.pop()
+      if (!worker) return
+      worker.job = this.queue.shift()
+      // Referenced only while busy, so a pending hash still finishes
+      worker.ref()
+      worker.postMessage(worker.job.message)
+    }
+  }
+}
+
+const pool = new PasswordPool(POOL_SIZE, PASSWORD_MAX_QUEUED)
+
+/**
+ * Hash a password at PASSWORD_COST on the worker pool
+ * @param {string} password - Plain text password
+ * @returns {Promise<string>} bcrypt hash
+ * @throws {PasswordPoolBusyError} When the queue is full
+ */
+export function hashPassword(password) {
+  return pool.run({ op: 'hash', password, cost: PASSWORD_COST })
+}
+
+/**
+ * Compare a password with a stored hash on the worker pool
+ * @param {string} password - Plain text password
+ * @param {string} hash - Stored bcrypt hash
+ * @returns {Promise<boolean>} Whether they match
+ * @throws {PasswordPoolBusyError} When the queue is full
+ */
+export function verifyPassword(password, hash) {
+  return pool.run({ op: 'compare', password, hash })
+}
+
+/**
+ * Whether a stored hash was made at a different cost than PASSWORD_COST
+ * @param {string} hash - Stored bcrypt hash
+ * @returns {boolean}
+ */
+export function needsRehash(hash) {
+  return bcrypt.getRounds(hash) !== PASSWORD_COST
+}
@@ -0,0 +1,195 @@
+import { getSupabase } from './middleware'
+import { logger } from '@/lib/logger'
+import { publishPresence } from './events'
+
+// Users count as online if they've been seen in the last 5 minutes
+export const ONLINE_WINDOW_MS = 5 * 60 * 1000
+
+// Heartbeats are buffered in memory and written back in batches, on the
+// request path: when the buffer is full or its oldest entry is
+// FLUSH_INTERVAL_MS old. No timer, since a serverless instance may be
+// frozen or recycled before one fires.
+const FLUSH_INTERVAL_MS = 5000
+const FLUSH_BATCH_SIZE = 200
+
+// How often users whose heartbeats stopped are announced as offline
+const SWEEP_INTERVAL_MS = 30 * 1000
+
+// The online-users snapshot is rebuilt from the database at most this often;
+// users who come online in between are merged in from memory
+const SNAPSHOT_TTL_MS = 5000
+
+// userId -> last heartbeat (ms) not yet written to the database
+const pending = new Map()
+// userId -> last heartbeat (ms) seen by this instance
+const lastSeen = new Map()
+
+let lastFlushAt = Date.now()
+let flushing = null
+
+let snapshot = null
+let snapshotBuiltAt = 0
+let snapshotIds = new Set()
+// userId -> { id, name, email, bio } of users heartbeating on this instance
+// who aren't in the snapshot yet
+const arrivals = new Map()
+
+/**
+ * Write buffered heartbeats back to the users table, one UPDATE per batch.
+ * last_seen is stamped with the flush time, so it is accurate to FLUSH_INTERVAL_MS.
+ * @returns {Promise<void>}
+ */
+export async function flushPresence() {
+  if (flushing) return flushing
+  if (pending.size === 0) return
+
+  const userIds = [...pending.keys()]
+  pending.clear()
+  lastFlushAt = Date.now()
+
+  flushing = (async () => {
+    const supabase = getSupabase()
+    const seenAt = new Date(lastFlushAt).toISOString()
+
+    for (let i = 0; i < userIds.length; i += FLUSH_BATCH_SIZE) {
+      const batch = userIds.slice(i, i + FLUSH_BATCH_SIZE)
+      const { error } = await supabase
+        .from('users')
+        .update({ last_seen: seenAt, is_online: true })
+        .in('id', batch)
+
+      if (error) {
+        // Keep the heartbeats so the next flush retries them
+        logger.error('Presence flush failed:', error.message)
+        for (const userId of batch) {
+          if (!pending.has(userId)) pending.set(userId, lastSeen.get(userId))
+        }
+      }
+    }
+  })()
+
+  try {
+    await flushing
+  } finally {
+    flushing = null
+  }
+}
+
+/**
+ * Flush buffered heartbeats if the buffer is full or FLUSH_INTERVAL_MS old.
+ * Called on the request path (heartbeats, and after every API request in
+ * the route), so buffered heartbeats are written while the instance is
+ * still serving.
+ * @returns {Promise<void>}
+ */
+export async function flushPresenceIfDue() {
+  if (pending.size === 0) return
+  if (pending.size >= FLUSH_BATCH_SIZE || Date.now() - lastFlushAt >= FLUSH_INTERVAL_MS) {
+    await flushPresence()
+  }
+}
+
+/**
+ * Record a heartbeat in memory; the database write happens in a later batch
+ * Login records one too, so it goes through the same buffer as
+ * POST /api/users/heartbeat.
+ * @param {string} userId - User who sent the heartbeat (or logged in)
+ * @param {Function|null} getProfile - Resolves the user's row; called only when
+ *   the user isn't in the online snapshot, so getOnlineUsers can list them
+ *   before the next rebuild
+ * @returns {Promise<void>}
+ */
+export async function recordHeartbeat(userId, getProfile = null) {
+  const now = Date.now()
+  const wasOnline = (lastSeen.get(userId) || 0) >= now - ONLINE_WINDOW_MS
+  pending.set(userId, now)
+  lastSeen.set(userId, now)
+
+  if (!wasOnline) {
+    publishPresence({ userId, online: true, lastSeen: new Date(now).toISOString() })
+  }
+
+  // Someone new came online; list them from memory until the next rebuild
+  if (!snapshotIds.has(userId) && !arrivals.has(userId) && getProfile) {
+    const user = await getProfile()
+    if (user) {
+      arrivals.set(userId, { id: user.id, name: user.name, email: user.email, bio: user.bio })
+    }
+  }
+
+  await flushPresenceIfDue()
+}
+
+/**
+ * Forget users whose heartbeats stopped and announce them as offline
+ */
+export function sweepPresence() {
+  const cutoff = Date.now() - ONLINE_WINDOW_MS
+  for (const [userId, seenAt] of lastSeen) {
+    if (seenAt < cutoff) {
+      lastSeen.delete(userId)
+      arrivals.delete(userId)
+      publishPresence({ userId, online: false, lastSeen: new Date(seenAt).toISOString() })
+    }
+  }
+}
+
+setInterval(sweepPresence, SWEEP_INTERVAL_MS).unref?.()
+
+async function rebuildSnapshot() {
+  // Make sure our own buffered heartbeats are visible to the query
+  await flushPresence()
+
+  const supabase = getSupabase()
+  const cutoff = new Date(Date.now() - ONLINE_WINDOW_MS).toISOString()
+
+  const { data, error } = await supabase
+    .from('users')
+    .select('id, name, email, bio, last_seen')
+    .gte('last_seen', cutoff)
+    .eq('is_online', true)
+
+  if (error) throw error
+
+  snapshot = data || []
+  snapshotIds = new Set(snapshot.map((user) => user.id))
+  snapshotBuiltAt = Date.now()
+  for (const userId of snapshotIds) {
+    arrivals.delete(userId)
+  }
+}
+
+/**
+ * Get users seen in the last ONLINE_WINDOW_MS, excluding the current user.
+ * Served from a snapshot that is rebuilt at most every SNAPSHOT_TTL_MS, plus
+ * the users who started heartbeating on this instance since it was built.
+ * @param {string} currentUserId - User making the request
+ * @returns {Promise<Array>} Online users { id, name, email, bio, last_seen }
+ */
+export async function getOnlineUsers(currentUserId) {
+  if (!snapshot || Date.now() - snapshotBuiltAt >= SNAPSHOT_TTL_MS) {
+    await rebuildSnapshot()
+  }
+
+  const cutoff = Date.now() - ONLINE_WINDOW_MS
+  const online = []
+  for (const user of snapshot) {
+    if (user.id === currentUserId) continue
+
+    // Prefer this instance's newer heartbeat over the snapshot's last_seen
+    const localSeen = lastSeen.get(user.id)
+    const seenAt = Math.max(Date.parse(user.last_seen), localSeen || 0)
+    if (seenAt < cutoff) continue
+
+    online.push(localSeen && localSeen > Date.parse(user.last_seen)
+      ? { ...user, last_seen: new Date(localSeen).toISOString() }
+      : user)
+  }
+
+  for (const [userId, user] of arrivals) {
+    const seenAt = lastSeen.get(userId)
+    if (userId === currentUserId || snapshotIds.has(userId) || !seenAt || seenAt < cutoff) continue
+    online.push({ ...user, last_seen: new Date(seenAt).toISOString() })
+  }
+  return online
+}
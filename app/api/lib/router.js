@@ -0,0 +1,74 @@
+/**
+ * Route table for the catch-all API route
+ *
+ * Routes are compiled once, when the module loads: fixed paths go into a
+ * Map keyed by method and path, and paths with `:params` are bucketed by
+ * method and segment count. Finding a route is one Map lookup plus, for
+ * parameterized paths, a scan of the few routes with the same shape, so the
+ * cost doesn't depend on how many routes there are or their order.
+ *
+ * A fixed path wins over a parameterized one with the same shape, e.g.
+ * GET /trips/shared is never matched as GET /trips/:id. Empty segments (a
+ * trailing slash) are ignored, and params are the segments as Next.js
+ * decoded them, not decoded again.
+ */
+
+/**
+ * Compile a route table
+ * @param {Array<Object>} routes - { method, path, handler } entries; handler
+ *   is called as handler(request, params)
+ * @returns {Function} match(method, segments) -> { handler, params }, or null when no
+ *   route has that method and path (the route answers 404, as before the table)
+ */
+export function createRouter(routes) {
+  const fixed = new Map()
+  const parameterized = new Map()
+
+  for (const { method, path, handler } of routes) {
+    const segments = path.split('/').filter(Boolean)
+
+    if (!segments.some((segment) => segment.startsWith(':'))) {
+      fixed.set(`${method} /${segments.join('/')}`, handler)
+      continue
+    }
+
+    const key = `${method} ${segments.length}`
+    if (!parameterized.has(key)) {
+      parameterized.set(key, [])
+    }
+    parameterized.get(key).push({
+      handler,
+      segments: segments.map((segment) =>
+        segment.startsWith(':') ? { param: segment.slice(1) } : { literal: segment }
+      ),
+    })
+  }
+
+  return function match(method, pathSegments) {
+    const segments = pathSegments.filter(Boolean)
+    const handler = fixed.get(`${method} /${segments.join('/')}`)
+    if (handler) {
+      return { handler, params: {} }
+    }
+
+    const candidates = parameterized.get(`${method} ${segments.length}`)
+    if (!candidates) {
+      return null
+    }
+
+    for (const candidate of candidates) {
+      const params = {}
+      const matched = candidate.segments.every((segment, i) => {
+        if (segment.param) {
+          params[segment.param] = segments[i]
+          return true
+        }
+        return segment.literal === segments[i]
+      })
+      if (matched) {
+        return { handler: candidate.handler, params }
+      }
+    }
+    return null
+  }
+}
@@ -46,6 +46,23 @@ export const messageSchema = z.object({
   content: z.string().min(1, 'Message content is required').max(1000, 'Message too long'),
 })
 
+/**
+ * Largest number of messages accepted by POST /api/messages/batch
+ */
+export const MAX_MESSAGE_BATCH = 500
+
+/**
+ * Validation schema for bulk message sending
+ * Items are validated one by one against messageSchema so a bad item
+ * doesn't reject the whole batch
+ */
+export const messageBatchSchema = z.object({
+  messages: z
+    .array(z.unknown())
+    .min(1, 'At least one message is required')
+    .max(MAX_MESSAGE_BATCH, `At most ${MAX_MESSAGE_BATCH} messages per batch`),
+})
+
 /**
  * Validation schema for profile update
  */
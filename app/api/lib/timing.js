@@ -0,0 +1,127 @@
+/**
+ * Per-request Server-Timing phases
+ *
+ * Handlers record how long each phase of a request took: `auth` (token
+ * verification), `db` (one entry per query, described by table and
+ * operation), `format` (shaping rows and serializing JSON), `compress`
+ * (gzip or brotli of large bodies). handleCORS in middleware.js writes them
+ * to the Server-Timing header of the response, and the route adds `route`
+ * (dispatch) and `total`. Phases are kept against the request in a WeakMap,
+ * like the auth cache outcome, so nothing outlives it.
+ *
+ * Entries with the same name and description add up, e.g. two lookups of
+ * the same table or several formatting passes.
+ *
+ * The route also adds `loop`, the process's event-loop delay (see
+ * eventLoopLag), so a soak run can watch it drift without attaching a
+ * profiler.
+ */
+
+import { monitorEventLoopDelay } from 'perf_hooks'
+
+const phases = new WeakMap()
+
+// Event-loop delay is sampled every LOOP_RESOLUTION_MS and reported as the
+// p99 of the last completed LOOP_WINDOW_MS window, so one slow request
+// doesn't show up as lag on every response after it
+const LOOP_RESOLUTION_MS = 10
+const LOOP_WINDOW_MS = 5000
+const loopDelay = monitorEventLoopDelay({ resolution: LOOP_RESOLUTION_MS })
+loopDelay.enable()
+let loopWindowStarted = performance.now()
+let loopLagMs = 0
+
+/**
+ * Add a measured phase to a request
+ * @param {Request|null} request - Request being served (ignored when null)
+ * @param {string} name - Metric name, e.g. 'db'
+ * @param {number} durationMs - Duration in milliseconds
+ * @param {string|null} description - Detail shown with the metric, e.g. 'users.select'
+ */
+export function recordPhase(request, name, durationMs, description = null) {
+  if (!request) return
+  let entries = phases.get(request)
+  if (!entries) {
+    entries = []
+    phases.set(request, entries)
+  }
+  const existing = entries.find((entry) => entry.name === name && entry.description === description)
+  if (existing) {
+    existing.durationMs += durationMs
+  } else {
+    entries.push({ name, description, durationMs })
+  }
+}
+
+/**
+ * Await a promise (or a lazy thenable such as a Supabase query) and record how long it took
+ * @param {Request|null} request - Request being served
+ * @param {string} name - Metric name
+ * @param {PromiseLike<*>} pending - Work to await
+ * @param {string|null} description - Detail shown with the metric
+ * @returns {Promise<*>} What `pending` resolved to
+ */
+export async function timed(request, name, pending, description = null) {
+  const started = performance.now()
+  try {
+    return await pending
+  } finally {
+    recordPhase(request, name, performance.now() - started, description)
+  }
+}
+
+/**
+ * Time one database call, e.g. timedQuery(request, 'users.select', supabase.from('users')...)
+ * @param {Request|null} request - Request being served
+ * @param {string} label - Table (or function) and operation
+ * @param {PromiseLike<*>} query - Query builder or promise
+ * @returns {Promise<*>} The query result
+ */
+export function timedQuery(request, label, query) {
+  return timed(request, 'db', query, label)
+}
+
+/**
+ * Run synchronous work, e.g. shaping rows, and record how long it took
+ * @param {Request|null} request - Request being served
+ * @param {string} name - Metric name
+ * @param {Function} work - Function to run
+ * @returns {*} What `work` returned
+ */
+export function timedSync(request, name, work) {
+  const started = performance.now()
+  try {
+    return work()
+  } finally {
+    recordPhase(request, name, performance.now() - started)
+  }
+}
+
+/**
+ * Server-Timing header value for the phases recorded so far
+ * @param {Request|null} request - Request being served
+ * @returns {string} e.g. 'auth;dur=0.120, db;dur=3.402;desc="users.select"', or '' when none
+ */
+export function serverTimingHeader(request) {
+  const entries = request && phases.get(request)
+  if (!entries) return ''
+  return entries
+    .map(({ name, description, durationMs }) =>
+      `${name};dur=${durationMs.toFixed(3)}${description ? `;desc="${description}"` : ''}`)
+    .join(', ')
+}
+
+/**
+ * p99 event-loop delay of the last completed window
+ * @returns {number} Milliseconds the loop ran late; 0 until the first window closes
+ */
+export function eventLoopLag() {
+  const now = performance.now()
+  if (now - loopWindowStarted >= LOOP_WINDOW_MS) {
+    // Histogram values are nanoseconds
+    loopLagMs = loopDelay.count ? loopDelay.percentile(99) / 1e6 : 0
+    loopDelay.reset()
+    loopWindowStarted = now
+  }
+  return loopLagMs
+}
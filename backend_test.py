@@ -2,29 +2,75 @@
 """
 Tucker Trips Backend API Test Suite - Profile Settings & Live Chat
 Tests Profile Management, Online User Tracking, and Live Chat Messaging
+
+Usage:
+  python backend_test.py                  # functional test suite, one worker per scenario
+  python backend_test.py --offline        # same, against the in-process fake API
+  python backend_test.py --workers 1      # isolated scenarios, one at a time
+  python backend_test.py --load --users 50 --concurrency 100 --duration 60
+  python backend_test.py --bench --save-baseline    # record bench_baseline.json
+  python backend_test.py --bench --threshold 0.2    # fail if any route's p95 grew >20%
+  python backend_test.py --offline --conversation-bench --sizes 100,1000,10000,100000
+  python backend_test.py --offline --presence-stress --presence-users 5000
+  python backend_test.py --token-reuse --tokens 2000 --server-pid $(pgrep -f "next dev")
+  python backend_test.py --offline --stream-fanout --subscribers 2000
+  python backend_test.py --auth-storm --users 200 --concurrency 50 --duration 30
+  python backend_test.py --offline --feed-bench --trips 100000 --pages 1,10,100,1000
+  python backend_test.py --offline --route-bench --requests 20000
+  python backend_test.py --offline --upload-bench --files 1,10,50 --storage-latency 0.05
+  python backend_test.py --pg-conversation-bench --pg-dsn postgresql://localhost/tucker_bench
+  python backend_test.py --dataset --pg-dsn $DATABASE_URL --seed 1
+  python backend_test.py --offline --payload-bench --encodings identity,gzip,br
+  python backend_test.py --offline --poll-bench --pollers 10 --rounds 30
+  python backend_test.py --offline --unread-bench --sizes 1000,100000 --contacts 50
+  python backend_test.py --soak --soak-duration 3600 --server-pid $(pgrep -f "next dev")
+
+The functional suite ends with the mean Server-Timing phases of each route.
 """
 
-import requests
+import argparse
 import json
 import sys
 import time
+import uuid
 from datetime import datetime
 
 # Get base URL from environment - use local dev server for testing
 import os
 BASE_URL = os.getenv("BASE_URL", "http://localhost:3000/api")
 
+from tests.client import ApiClient
+from tests.server_timing import parse_server_timing
+
 class TuckerTripsBackendTester:
-    def __init__(self):
-        self.base_url = BASE_URL
+    def __init__(self, base_url=BASE_URL, client=None, run_id=None, verbose=True, output=print):
+        self.base_url = base_url
+        # run_id namespaces the test accounts so repeated runs don't collide
+        self.run_id = run_id
+        self.verbose = verbose
+        # Where log lines go; the parallel runner buffers them per scenario
+        self.output = output
         self.alice_token = None
         self.bob_token = None
         self.alice_id = None
         self.bob_id = None
+        # Every request goes through one pooled client; sessions are
+        # authenticated once the users have tokens
+        self.client = client or ApiClient(base_url)
+        self.anonymous = self.client.session()
+        self.alice = self.client.session()
+        self.bob = self.client.session()
         
     def log(self, message):
+        if not self.verbose:
+            return
         timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] {message}")
+        self.output(f"[{timestamp}] {message}")
+
+    def email(self, local_part):
+        if self.run_id:
+            return f"{local_part}+{self.run_id}@example.com"
+        return f"{local_part}@example.com"
 
     def test_user_registration_and_login(self):
         """Test user registration and login for Alice and Bob"""
@@ -33,16 +79,17 @@ class TuckerTripsBackendTester:
         # Register Alice
         alice_data = {
             "name": "Alice Johnson",
-            "email": "alice.johnson@example.com",
+            "email": self.email("alice.johnson"),
             "password": "SecurePass123!"
         }
         
         try:
-            response = requests.post(f"{self.base_url}/auth/register", json=alice_data)
-            if response.status_code == 200:
+            response = self.anonymous.post("/auth/register", json=alice_data)
+            if response.status_code in (200, 201):
                 alice_result = response.json()
                 self.alice_token = alice_result['token']
                 self.alice_id = alice_result['user']['id']
+                self.alice.authenticate(self.alice_token)
                 self.log(f"✅ Alice registered successfully - ID: {self.alice_id}")
             else:
                 self.log(f"❌ Alice registration failed: {response.status_code} - {response.text}")
@@ -54,16 +101,17 @@ class TuckerTripsBackendTester:
         # Register Bob
         bob_data = {
             "name": "Bob Smith",
-            "email": "bob.smith@example.com", 
+            "email": self.email("bob.smith"),
             "password": "SecurePass456!"
         }
         
         try:
-            response = requests.post(f"{self.base_url}/auth/register", json=bob_data)
-            if response.status_code == 200:
+            response = self.anonymous.post("/auth/register", json=bob_data)
+            if response.status_code in (200, 201):
                 bob_result = response.json()
                 self.bob_token = bob_result['token']
                 self.bob_id = bob_result['user']['id']
+                self.bob.authenticate(self.bob_token)
                 self.log(f"✅ Bob registered successfully - ID: {self.bob_id}")
             else:
                 self.log(f"❌ Bob registration failed: {response.status_code} - {response.text}")
@@ -71,6 +119,23 @@ class TuckerTripsBackendTester:
         except Exception as e:
             self.log(f"❌ Bob registration error: {str(e)}")
             return False
+
+        # Log both users back in with their new credentials
+        for name, session, data in (("Alice", self.alice, alice_data), ("Bob", self.bob, bob_data)):
+            try:
+                response = self.anonymous.post("/auth/login", json={
+                    "email": data["email"],
+                    "password": data["password"]
+                })
+                if response.status_code == 200:
+                    session.authenticate(response.json()['token'])
+                    self.log(f"✅ {name} logged in successfully")
+                else:
+                    self.log(f"❌ {name} login failed: {response.status_code} - {response.text}")
+                    return False
+            except Exception as e:
+                self.log(f"❌ {name} login error: {str(e)}")
+                return False
             
         return True
 
@@ -79,15 +144,13 @@ class TuckerTripsBackendTester:
         self.log("=== Testing Profile Management ===")
         
         # Test Alice updating her profile with bio
-        alice_headers = {"Authorization": f"Bearer {self.alice_token}"}
         profile_update = {
             "name": "Alice Johnson (Travel Enthusiast)",
             "bio": "Love exploring new destinations and sharing travel tips! Currently planning trips to Japan and Iceland. Always looking for hidden gems and local experiences."
         }
         
         try:
-            response = requests.patch(f"{self.base_url}/users/profile", 
-                                    json=profile_update, headers=alice_headers)
+            response = self.alice.patch("/users/profile", json=profile_update)
             if response.status_code == 200:
                 result = response.json()
                 user = result['user']
@@ -104,14 +167,12 @@ class TuckerTripsBackendTester:
             return False
             
         # Test Bob updating just his bio
-        bob_headers = {"Authorization": f"Bearer {self.bob_token}"}
         bio_update = {
             "bio": "Adventure seeker and photography lover. Documenting my journeys around the world. Next stop: New Zealand!"
         }
         
         try:
-            response = requests.patch(f"{self.base_url}/users/profile", 
-                                    json=bio_update, headers=bob_headers)
+            response = self.bob.patch("/users/profile", json=bio_update)
             if response.status_code == 200:
                 result = response.json()
                 user = result['user']
@@ -132,8 +193,7 @@ class TuckerTripsBackendTester:
         long_bio_update = {"bio": long_bio}
         
         try:
-            response = requests.patch(f"{self.base_url}/users/profile", 
-                                    json=long_bio_update, headers=alice_headers)
+            response = self.alice.patch("/users/profile", json=long_bio_update)
             if response.status_code == 200:
                 result = response.json()
                 if result['user']['bio'] == long_bio:
@@ -155,9 +215,8 @@ class TuckerTripsBackendTester:
         self.log("=== Testing Heartbeat System ===")
         
         # Alice sends heartbeat
-        alice_headers = {"Authorization": f"Bearer {self.alice_token}"}
         try:
-            response = requests.post(f"{self.base_url}/users/heartbeat", headers=alice_headers)
+            response = self.alice.post("/users/heartbeat")
             if response.status_code == 200:
                 result = response.json()
                 if result.get('success'):
@@ -173,9 +232,8 @@ class TuckerTripsBackendTester:
             return False
             
         # Bob sends heartbeat
-        bob_headers = {"Authorization": f"Bearer {self.bob_token}"}
         try:
-            response = requests.post(f"{self.base_url}/users/heartbeat", headers=bob_headers)
+            response = self.bob.post("/users/heartbeat")
             if response.status_code == 200:
                 result = response.json()
                 if result.get('success'):
@@ -197,9 +255,8 @@ class TuckerTripsBackendTester:
         self.log("=== Testing Online User Tracking ===")
         
         # Alice checks online users (should see Bob)
-        alice_headers = {"Authorization": f"Bearer {self.alice_token}"}
         try:
-            response = requests.get(f"{self.base_url}/users/online", headers=alice_headers)
+            response = self.alice.get("/users/online")
             if response.status_code == 200:
                 online_users = response.json()
                 
@@ -240,9 +297,8 @@ class TuckerTripsBackendTester:
             return False
             
         # Bob checks online users (should see Alice)
-        bob_headers = {"Authorization": f"Bearer {self.bob_token}"}
         try:
-            response = requests.get(f"{self.base_url}/users/online", headers=bob_headers)
+            response = self.bob.get("/users/online")
             if response.status_code == 200:
                 online_users = response.json()
                 
@@ -275,15 +331,13 @@ class TuckerTripsBackendTester:
         self.log("=== Testing Live Chat Messaging System ===")
         
         # Alice sends message to Bob
-        alice_headers = {"Authorization": f"Bearer {self.alice_token}"}
         message1 = {
             "recipientId": self.bob_id,
             "content": "Hey Bob! I saw you're planning a trip to New Zealand. I've been there last year and have some great recommendations!"
         }
         
         try:
-            response = requests.post(f"{self.base_url}/messages", 
-                                   json=message1, headers=alice_headers)
+            response = self.alice.post("/messages", json=message1)
             if response.status_code == 200:
                 result = response.json()
                 if (result['senderId'] == self.alice_id and 
@@ -303,9 +357,8 @@ class TuckerTripsBackendTester:
             return False
             
         # Bob retrieves messages (should see Alice's message)
-        bob_headers = {"Authorization": f"Bearer {self.bob_token}"}
         try:
-            response = requests.get(f"{self.base_url}/messages/{self.alice_id}", headers=bob_headers)
+            response = self.bob.get(f"/messages/{self.alice_id}")
             if response.status_code == 200:
                 messages = response.json()
                 
@@ -340,8 +393,7 @@ class TuckerTripsBackendTester:
         }
         
         try:
-            response = requests.post(f"{self.base_url}/messages", 
-                                   json=message2, headers=bob_headers)
+            response = self.bob.post("/messages", json=message2)
             if response.status_code == 200:
                 result = response.json()
                 if (result['senderId'] == self.bob_id and 
@@ -365,8 +417,7 @@ class TuckerTripsBackendTester:
         }
         
         try:
-            response = requests.post(f"{self.base_url}/messages", 
-                                   json=message3, headers=alice_headers)
+            response = self.alice.post("/messages", json=message3)
             if response.status_code == 200:
                 self.log("✅ Alice's second message sent successfully")
             else:
@@ -378,7 +429,7 @@ class TuckerTripsBackendTester:
             
         # Alice retrieves full conversation
         try:
-            response = requests.get(f"{self.base_url}/messages/{self.bob_id}", headers=alice_headers)
+            response = self.alice.get(f"/messages/{self.bob_id}")
             if response.status_code == 200:
                 messages = response.json()
                 
@@ -410,7 +461,26 @@ class TuckerTripsBackendTester:
         except Exception as e:
             self.log(f"❌ Alice retrieve conversation error: {str(e)}")
             return False
-            
+
+        # Bad sends: missing fields keep their original message, anything
+        # else the schema rejects is a plain validation failure
+        bad_sends = [
+            ({"recipientId": self.bob_id}, "Recipient and content are required"),
+            ({"recipientId": "not-a-uuid", "content": "Hello"}, "Validation failed"),
+        ]
+        for body, expected in bad_sends:
+            try:
+                response = self.alice.post("/messages", json=body)
+                if response.status_code == 400 and response.json().get("error") == expected:
+                    self.log(f"✅ Bad send rejected with 400: {expected}")
+                else:
+                    self.log(f"❌ Bad send {body} should be 400 '{expected}', got: "
+                             f"{response.status_code} - {response.text}")
+                    return False
+            except Exception as e:
+                self.log(f"❌ Bad send error: {str(e)}")
+                return False
+
         return True
         
     def test_message_read_status(self):
@@ -418,15 +488,13 @@ class TuckerTripsBackendTester:
         self.log("=== Testing Message Read Status ===")
         
         # Send a new message from Alice to Bob
-        alice_headers = {"Authorization": f"Bearer {self.alice_token}"}
         test_message = {
             "recipientId": self.bob_id,
             "content": "This is a test message to check read status functionality."
         }
         
         try:
-            response = requests.post(f"{self.base_url}/messages", 
-                                   json=test_message, headers=alice_headers)
+            response = self.alice.post("/messages", json=test_message)
             if response.status_code == 200:
                 result = response.json()
                 if result['read'] == False:
@@ -442,9 +510,8 @@ class TuckerTripsBackendTester:
             return False
             
         # Bob retrieves messages (this should mark Alice's messages as read)
-        bob_headers = {"Authorization": f"Bearer {self.bob_token}"}
         try:
-            response = requests.get(f"{self.base_url}/messages/{self.alice_id}", headers=bob_headers)
+            response = self.bob.get(f"/messages/{self.alice_id}")
             if response.status_code == 200:
                 self.log("✅ Bob retrieved messages - read status should be updated")
             else:
@@ -453,17 +520,229 @@ class TuckerTripsBackendTester:
         except Exception as e:
             self.log(f"❌ Bob retrieve for read test error: {str(e)}")
             return False
-            
+
+        # Alice's copy of the conversation should now show the message as read
+        try:
+            response = self.alice.get(f"/messages/{self.bob_id}")
+            message = next((m for m in response.json() if m['id'] == result['id']), None)
+            if response.status_code == 200 and message and message['read'] is True:
+                self.log("✅ Message is marked read after Bob fetched the conversation")
+            else:
+                self.log(f"❌ Message should be read after Bob's fetch, got: {message}")
+                return False
+        except Exception as e:
+            self.log(f"❌ Read flag check error: {str(e)}")
+            return False
+
+        # Measure the fetch that pages and marks read
+        try:
+            samples = []
+            queries = []
+            for _ in range(10):
+                started = time.perf_counter()
+                response = self.bob.get(f"/messages/{self.alice_id}")
+                samples.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    self.log(f"❌ Conversation fetch failed during measurement: {response.status_code}")
+                    return False
+                # The route reports one `db` entry per distinct query it ran
+                timing = parse_server_timing(response.headers.get("Server-Timing"))
+                queries.append(sum(1 for name, _, _ in timing if name == "db"))
+            samples.sort()
+            summary = f"p50 {samples[len(samples) // 2]:.2f}ms, max {samples[-1]:.2f}ms"
+            if any(queries):
+                summary += f", {max(queries)} database quer{'y' if max(queries) == 1 else 'ies'} per fetch (Server-Timing)"
+            self.log(f"📊 Conversation fetch: {summary}")
+        except Exception as e:
+            self.log(f"❌ Conversation fetch measurement error: {str(e)}")
+            return False
+
         return True
         
+    def test_batch_messaging(self):
+        """Test POST /api/messages/batch and compare it with one send per request"""
+        self.log("=== Testing Batch Messaging ===")
+
+        batch = [
+            {"recipientId": self.bob_id, "content": f"Batch message {i}"} for i in range(3)
+        ] + [
+            {"recipientId": "not-a-uuid", "content": "Invalid recipient"},
+            {"recipientId": str(uuid.uuid4()), "content": "Unknown recipient"},
+        ]
+
+        try:
+            response = self.alice.post("/messages/batch", json={"messages": batch})
+            if response.status_code != 200:
+                self.log(f"❌ Batch send failed: {response.status_code} - {response.text}")
+                return False
+            result = response.json()
+            results = result['results']
+            if (result['sent'], result['failed']) != (3, 2) or [r['index'] for r in results] != list(range(5)):
+                self.log(f"❌ Batch should send 3 and reject 2, got: {result}")
+                return False
+            if [r['message']['content'] for r in results[:3]] != [m['content'] for m in batch[:3]]:
+                self.log(f"❌ Batch results don't match the request order: {results[:3]}")
+                return False
+            if [r['error'] for r in results[3:]] != ["Validation failed", "Recipient not found"]:
+                self.log(f"❌ Rejected batch items have the wrong errors: {results[3:]}")
+                return False
+            self.log("✅ Batch sent 3 messages and rejected 2 with per-item errors")
+
+            response = self.bob.get(f"/messages/{self.alice_id}", params={"limit": 3})
+            if [m['content'] for m in response.json()] != [m['content'] for m in batch[:3]]:
+                self.log(f"❌ Bob should see the batch in order, got: {response.json()}")
+                return False
+            self.log("✅ Bob received the batch in order")
+
+            response = self.alice.post("/messages/batch", json={"messages": []})
+            if response.status_code != 400:
+                self.log(f"❌ Empty batch should be rejected, got: {response.status_code}")
+                return False
+            self.log("✅ Empty batch rejected with 400")
+        except Exception as e:
+            self.log(f"❌ Batch messaging error: {str(e)}")
+            return False
+
+        # Throughput: the same messages one request at a time versus one batch
+        try:
+            count = 50
+            messages = [{"recipientId": self.bob_id, "content": f"Throughput message {i}"} for i in range(count)]
+
+            started = time.perf_counter()
+            for message in messages:
+                if self.alice.post("/messages", json=message).status_code != 200:
+                    self.log("❌ Single send failed during throughput comparison")
+                    return False
+            single = time.perf_counter() - started
+
+            started = time.perf_counter()
+            response = self.alice.post("/messages/batch", json={"messages": messages})
+            batched = time.perf_counter() - started
+            if response.status_code != 200 or response.json()['sent'] != count:
+                self.log(f"❌ Batch send failed during throughput comparison: {response.status_code}")
+                return False
+
+            self.log(
+                f"📊 {count} messages: single sends {count / single:.0f} msg/s, "
+                f"batch {count / batched:.0f} msg/s ({single / batched:.1f}x)"
+            )
+        except Exception as e:
+            self.log(f"❌ Batch throughput comparison error: {str(e)}")
+            return False
+
+        return True
+
+    def test_conversation_pagination(self):
+        """Test cursor pagination on GET /api/messages/:userId"""
+        self.log("=== Testing Conversation Pagination ===")
+
+        try:
+            sent = []
+            for i in range(5):
+                response = self.alice.post("/messages", json={
+                    "recipientId": self.bob_id,
+                    "content": f"Pagination test message {i}"
+                })
+                if response.status_code != 200:
+                    self.log(f"❌ Send pagination message failed: {response.status_code}")
+                    return False
+                sent.append(response.json()['id'])
+
+            # Newest page first
+            response = self.bob.get(f"/messages/{self.alice_id}", params={"limit": 2})
+            page = response.json()
+            if response.status_code != 200 or [m['id'] for m in page] != sent[-2:]:
+                self.log(f"❌ First page should be the 2 newest messages, got: {page}")
+                return False
+            if response.headers.get('X-Has-More') != 'true' or not response.headers.get('X-Next-Cursor'):
+                self.log(f"❌ First page should advertise an older page: {dict(response.headers)}")
+                return False
+            self.log("✅ First page holds the newest messages, oldest first")
+            latest_cursor = response.headers['X-Latest-Cursor']
+
+            # Walk back through history and compare with one large page
+            collected = page
+            cursor = response.headers.get('X-Next-Cursor')
+            while cursor:
+                response = self.bob.get(f"/messages/{self.alice_id}", params={"limit": 2, "before": cursor})
+                collected = response.json() + collected
+                cursor = response.headers.get('X-Next-Cursor')
+            full = self.bob.get(f"/messages/{self.alice_id}", params={"limit": 100}).json()
+            if [m['id'] for m in collected] != [m['id'] for m in full]:
+                self.log(f"❌ Paged history ({len(collected)}) differs from full history ({len(full)})")
+                return False
+            self.log(f"✅ Walked {len(collected)} messages back with before= cursors, no gaps or duplicates")
+
+            # Incremental refresh
+            response = self.bob.get(f"/messages/{self.alice_id}", params={"since": latest_cursor})
+            if response.json() != []:
+                self.log(f"❌ since= with no new messages should be empty, got: {response.json()}")
+                return False
+            reply = self.alice.post("/messages", json={
+                "recipientId": self.bob_id,
+                "content": "A message after the cursor"
+            }).json()
+            response = self.bob.get(f"/messages/{self.alice_id}", params={"since": latest_cursor})
+            if [m['id'] for m in response.json()] != [reply['id']]:
+                self.log(f"❌ since= should return only the new message, got: {response.json()}")
+                return False
+            self.log("✅ since= cursor returns only messages newer than the cursor")
+        except Exception as e:
+            self.log(f"❌ Conversation pagination error: {str(e)}")
+            return False
+
+        return True
+
+    def test_unread_summary(self):
+        """Test per-conversation unread counts from GET /messages/unread"""
+        self.log("=== Testing Unread Summary ===")
+
+        def alice_entry():
+            response = self.bob.get("/messages/unread")
+            if response.status_code != 200:
+                raise RuntimeError(f"unread summary returned {response.status_code}")
+            return next((c for c in response.json()['conversations'] if c['userId'] == self.alice_id), None)
+
+        try:
+            # Start from a read conversation
+            self.bob.get(f"/messages/{self.alice_id}")
+            entry = alice_entry()
+            if entry is not None and entry['unreadCount'] != 0:
+                self.log(f"❌ Conversation should have 0 unread after Bob read it, got: {entry}")
+                return False
+
+            contents = ["Unread summary check one", "Unread summary check two"]
+            for content in contents:
+                self.alice.post("/messages", json={"recipientId": self.bob_id, "content": content})
+            entry = alice_entry()
+            if not entry or entry['unreadCount'] != 2 or entry['lastMessage']['preview'] != contents[-1]:
+                self.log(f"❌ Expected 2 unread with the latest preview, got: {entry}")
+                return False
+            # Fetching the summary must not mark anything read
+            if alice_entry()['unreadCount'] != 2:
+                self.log("❌ Fetching the unread summary changed the count")
+                return False
+            self.log("✅ Unread summary counts new messages and previews the latest one")
+
+            self.bob.get(f"/messages/{self.alice_id}")
+            entry = alice_entry()
+            if entry['unreadCount'] != 0:
+                self.log(f"❌ Count should drop to 0 after Bob opened the conversation, got: {entry}")
+                return False
+            self.log("✅ Opening the conversation resets its unread count")
+        except Exception as e:
+            self.log(f"❌ Unread summary error: {str(e)}")
+            return False
+
+        return True
+
     def test_unauthorized_access(self):
         """Test that endpoints properly handle unauthorized access"""
         self.log("=== Testing Unauthorized Access Protection ===")
         
         # Test profile update without token
         try:
-            response = requests.patch(f"{self.base_url}/users/profile", 
-                                    json={"name": "Hacker"})
+            response = self.anonymous.patch("/users/profile", json={"name": "Hacker"})
             if response.status_code == 401:
                 self.log("✅ Profile update properly rejected without token")
             else:
@@ -475,7 +754,7 @@ class TuckerTripsBackendTester:
             
         # Test heartbeat without token
         try:
-            response = requests.post(f"{self.base_url}/users/heartbeat")
+            response = self.anonymous.post("/users/heartbeat")
             if response.status_code == 401:
                 self.log("✅ Heartbeat properly rejected without token")
             else:
@@ -487,7 +766,7 @@ class TuckerTripsBackendTester:
             
         # Test online users without token
         try:
-            response = requests.get(f"{self.base_url}/users/online")
+            response = self.anonymous.get("/users/online")
             if response.status_code == 401:
                 self.log("✅ Online users properly rejected without token")
             else:
@@ -499,8 +778,7 @@ class TuckerTripsBackendTester:
             
         # Test send message without token
         try:
-            response = requests.post(f"{self.base_url}/messages", 
-                                   json={"recipientId": "test", "content": "hack"})
+            response = self.anonymous.post("/messages", json={"recipientId": "test", "content": "hack"})
             if response.status_code == 401:
                 self.log("✅ Send message properly rejected without token")
             else:
@@ -512,21 +790,37 @@ class TuckerTripsBackendTester:
             
         return True
         
-    def run_all_tests(self):
-        """Run all backend tests for Profile Settings and Live Chat features"""
-        self.log("🚀 Starting Tucker Trips Backend Testing - Profile Settings & Live Chat")
-        self.log(f"Testing against: {self.base_url}")
-        
-        tests = [
+    def scenarios(self):
+        """(name, method) pairs in the order they must run"""
+        return [
             ("User Registration and Login", self.test_user_registration_and_login),
             ("Profile Management", self.test_profile_management),
             ("Heartbeat System", self.test_heartbeat_system),
             ("Online User Tracking", self.test_online_user_tracking),
             ("Live Chat Messaging", self.test_messaging_system),
             ("Message Read Status", self.test_message_read_status),
+            ("Conversation Pagination", self.test_conversation_pagination),
+            ("Batch Messaging", self.test_batch_messaging),
+            ("Unread Summary", self.test_unread_summary),
             ("Unauthorized Access Protection", self.test_unauthorized_access)
         ]
+
+    def prerequisites(self, name):
+        """Scenarios that must pass first when scenario `name` runs on its own"""
+        if name in ("User Registration and Login", "Unauthorized Access Protection"):
+            return []
+        steps = [self.test_user_registration_and_login]
+        if name == "Online User Tracking":
+            steps.append(self.test_heartbeat_system)
+        return steps
+
+    def run_all_tests(self):
+        """Run all backend tests for Profile Settings and Live Chat features"""
+        self.log("🚀 Starting Tucker Trips Backend Testing - Profile Settings & Live Chat")
+        self.log(f"Testing against: {self.base_url}")
         
+        tests = self.scenarios()
+
         passed = 0
         failed = 0
         
@@ -547,10 +841,554 @@ class TuckerTripsBackendTester:
         self.log(f"✅ Passed: {passed}")
         self.log(f"❌ Failed: {failed}")
         self.log(f"📊 Success Rate: {(passed/(passed+failed)*100):.1f}%")
+        self.log(f"🔌 Connections: {self.client.connection_stats()}")
         
         return failed == 0
 
+def run_parallel_mode(args, server=None):
+    """Run every scenario isolated on its own accounts, --workers at a time"""
+    from tests.parallel import ParallelSuite
+    from tests.server_timing import PhaseBreakdown
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    tester.log("🚀 Starting Tucker Trips Backend Testing - Profile Settings & Live Chat")
+    tester.log(f"Testing against: {args.base_url} ({args.workers or 'one per scenario'} worker(s))")
+    phases = PhaseBreakdown()
+    report = ParallelSuite(args.base_url, workers=args.workers, recorder=phases.record).run()
+    tester.log("\n🏁 Testing Complete!")
+    for line in report.lines():
+        tester.log(line)
+    if phases.routes:
+        tester.log("\n⏱️  Server-Timing phases, mean ms per request:")
+        for line in phases.lines():
+            tester.log(line)
+    return report.failed == 0
+
+
+def run_load_mode(args):
+    """Run the concurrent load generator and print per-endpoint latency"""
+    from tests.load import run_load
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    tester.log(f"🚀 Starting Tucker Trips load run against: {args.base_url}")
+    report = run_load(
+        args.base_url,
+        users=args.users,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        log=tester.log,
+    )
+    for line in report.lines():
+        tester.log(line)
+    return report.total_errors == 0
+
+
+def run_bench_mode(args):
+    """Replay the scenarios, print per-route latency and check the p95 baseline"""
+    from tests.bench import BenchmarkRunner, find_regressions, load_baseline, save_baseline
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    tester.log(f"🚀 Benchmarking {args.iterations} scenario iterations against: {args.base_url}")
+    result = BenchmarkRunner(args.base_url, iterations=args.iterations).run()
+    for line in result.lines():
+        tester.log(line)
+    if result.failures:
+        tester.log(f"❌ {result.failures} scenario run(s) failed during the benchmark")
+        return False
+
+    if args.save_baseline:
+        save_baseline(result, args.baseline)
+        tester.log(f"💾 Baseline written to {args.baseline}")
+        return True
+    if not os.path.exists(args.baseline):
+        tester.log(f"⚠️  No baseline at {args.baseline} - run with --save-baseline to create one")
+        return True
+
+    regressions = find_regressions(result.to_baseline(), load_baseline(args.baseline), args.threshold)
+    for regression in regressions:
+        tester.log(f"❌ p95 regression: {regression}")
+    if not regressions:
+        tester.log(f"✅ No route regressed more than {args.threshold * 100:.0f}% against {args.baseline}")
+    return not regressions
+
+
+def run_conversation_bench_mode(args, server=None):
+    """Show that conversation page size and latency stay flat as history grows"""
+    from tests.conversation_bench import ConversationBenchmark, history_text, is_flat, report_lines
+
+    seeder = None
+    if server:
+        def seeder(sender_id, recipient_id, count):
+            for i in range(count):
+                server.store.insert_message(sender_id, recipient_id, history_text(i))
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    rows = ConversationBenchmark(args.base_url, sizes=sizes, seeder=seeder, log=tester.log).run()
+    for line in report_lines(rows):
+        tester.log(line)
+    flat = is_flat(rows)
+    tester.log("✅ Page size and latency stay flat" if flat else "❌ Conversation fetch grows with history")
+    return flat
+
+
+def run_unread_bench_mode(args, server=None):
+    """Check unread summary counts and show its latency stays flat as history grows"""
+    from tests.conversation_bench import history_text
+    from tests.unread_bench import UnreadBenchmark, is_flat, report_lines
+
+    seeder = None
+    if server:
+        def seeder(sender_id, recipient_id, first, count):
+            for i in range(first, first + count):
+                server.store.insert_message(sender_id, recipient_id, history_text(i))
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    rows = UnreadBenchmark(args.base_url, contacts=args.contacts, sizes=sizes, seeder=seeder,
+                           log=tester.log).run()
+    for line in report_lines(rows):
+        tester.log(line)
+    correct = all(not row.mismatches for row in rows)
+    flat = is_flat(rows)
+    tester.log("✅ Unread counts match what was sent and read" if correct else "❌ Unread counts are wrong")
+    tester.log("✅ Summary latency stays flat" if flat else "❌ Unread summary grows with history")
+    return correct and flat
+
+
+def store_seeder(store, label):
+    """Seeder for the offline fake: creates users in the store, returns (id, token) pairs"""
+    def seed(count):
+        run_id = uuid.uuid4().hex[:8]
+        users = [store.create_user(f"{label.title()} User {i}", f"{label}-{run_id}-{i}@example.com", "SeedPass123!")
+                 for i in range(count)]
+        return [(user["id"], store.issue_token(user)) for user in users]
+    return seed
+
+
+def run_presence_stress_mode(args, server=None):
+    """Heartbeat from many users at once and check the online list and write rate"""
+    from tests.presence_stress import run_presence_stress
+
+    seeder = write_counter = None
+    if server:
+        seeder = store_seeder(server.store, "presence")
+
+        def write_counter():
+            return server.store.presence_writes
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    tester.log(f"🚀 Presence stress with {args.presence_users} users against: {args.base_url}")
+    report = run_presence_stress(
+        args.base_url,
+        users=args.presence_users,
+        concurrency=args.concurrency,
+        seeder=seeder,
+        write_counter=write_counter,
+        log=tester.log,
+    )
+    for line in report.lines():
+        tester.log(line)
+    tester.log("✅ Online list is correct" if report.ok else "❌ Online list or heartbeats failed")
+    return report.ok
+
+
+def run_token_reuse_mode(args, server=None):
+    """Reuse a pool of tokens heavily and report token cache hit rate and CPU/request"""
+    from tests.proc import ProcessCpu
+    from tests.token_reuse import run_token_reuse
+
+    seeder = cpu_counter = None
+    if server:
+        seeder = store_seeder(server.store, "tokens")
+        server.store.auth_cache_debug = True
+
+        def cpu_counter():
+            return server.store.request_cpu_seconds
+    elif args.server_pid:
+        cpu_counter = ProcessCpu(args.server_pid)
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    tester.log(f"🚀 Token reuse run with {args.tokens} tokens against: {args.base_url}")
+    report = run_token_reuse(
+        args.base_url,
+        tokens=args.tokens,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        seeder=seeder,
+        cpu_counter=cpu_counter,
+        log=tester.log,
+    )
+    for line in report.lines():
+        tester.log(line)
+    return report.errors == 0
+
+
+def run_auth_storm_mode(args, server=None):
+    """Storm /auth/login and report logins/sec and the p99 of unrelated routes meanwhile"""
+    from tests.auth_storm import run_auth_storm
+
+    if server:
+        # Make the offline hash cost something, as bcrypt does
+        server.store.password_cost = args.password_cost
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    tester.log(f"🚀 Login storm with {args.concurrency} clients against: {args.base_url}")
+    report = run_auth_storm(
+        args.base_url,
+        accounts=args.users,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        log=tester.log,
+    )
+    for line in report.lines():
+        tester.log(line)
+    return report.errors == 0
+
+
+def run_stream_fanout_mode(args, server=None):
+    """Open many event streams and time message and presence delivery to them"""
+    from tests.proc import ProcessMemory
+    from tests.stream_fanout import run_stream_fanout
+
+    seeder = memory_probe = None
+    if server:
+        seeder = store_seeder(server.store, "stream")
+        # The fake runs in this process, so this includes the client side
+        memory_probe = ProcessMemory(os.getpid())
+    elif args.server_pid:
+        memory_probe = ProcessMemory(args.server_pid)
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    tester.log(f"🚀 Event stream fan-out with {args.subscribers} subscribers against: {args.base_url}")
+    report = run_stream_fanout(
+        args.base_url,
+        subscribers=args.subscribers,
+        messages=args.messages,
+        concurrency=args.concurrency,
+        seeder=seeder,
+        memory_probe=memory_probe,
+        log=tester.log,
+    )
+    for line in report.lines():
+        tester.log(line)
+    tester.log("✅ Every event was delivered" if report.ok else "❌ Some events were never delivered")
+    return report.ok
+
+
+def run_soak_mode(args, server=None):
+    """Replay a mixed workload for a long time and flag resource growth or latency drift"""
+    from tests.proc import ProcessFileDescriptors, ProcessMemory
+    from tests.soak import run_soak
+
+    seeder = rss_probe = fd_probe = None
+    if server:
+        seeder = store_seeder(server.store, "soak")
+        # The fake runs in this process and keeps all data in memory, so
+        # memory grows with the data and includes the client side
+        rss_probe, fd_probe = ProcessMemory(os.getpid()), ProcessFileDescriptors(os.getpid())
+    elif args.server_pid:
+        rss_probe, fd_probe = ProcessMemory(args.server_pid), ProcessFileDescriptors(args.server_pid)
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    tester.log(f"🚀 Soak run for {args.soak_duration:.0f}s against: {args.base_url}")
+    if not rss_probe:
+        tester.log("No --server-pid given: memory and file descriptors won't be sampled")
+    report = run_soak(
+        args.base_url,
+        users=args.users,
+        concurrency=args.concurrency,
+        duration=args.soak_duration,
+        interval=args.sample_interval,
+        rss_probe=rss_probe,
+        fd_probe=fd_probe,
+        seeder=seeder,
+        log=tester.log,
+    )
+    for line in report.lines():
+        tester.log(line)
+    if report.ok:
+        tester.log("✅ No errors, resource growth or latency drift")
+    else:
+        tester.log(f"❌ {report.errors} error(s), {len(report.flagged)} trend(s) flagged")
+    return report.ok
+
+
+def run_feed_bench_mode(args, server=None):
+    """Show that public feed pages cost the same from page 1 to page 10,000"""
+    from tests.feed_bench import FeedBenchmark, is_flat, report_lines, trip_body
+
+    seeder = None
+    if server:
+        def seeder(user_id, count):
+            for i in range(count):
+                server.store.create_trip(user_id, trip_body(i))
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    pages = [int(page) for page in args.pages.split(",")]
+    rows = FeedBenchmark(args.base_url, trips=args.trips, pages=pages, seeder=seeder, log=tester.log).run()
+    for line in report_lines(rows):
+        tester.log(line)
+    flat = is_flat(rows)
+    tester.log("✅ Cursor pages stay flat at any depth" if flat else "❌ Cursor pages get slower with depth")
+    return flat
+
+
+def run_route_bench_mode(args):
+    """Compare dispatch cost of the first and last routes in the route table"""
+    from tests.route_bench import RouteDispatchBenchmark, is_position_independent, report_lines
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    samples = RouteDispatchBenchmark(args.base_url, requests=args.requests, log=tester.log).run()
+    for line in report_lines(samples):
+        tester.log(line)
+    if not all(s.dispatch for s in samples):
+        tester.log("❌ No Server-Timing route entry in the responses")
+        return False
+    if any(s.unmatched for s in samples):
+        tester.log("❌ Some requests didn't reach their handler: " +
+                   ", ".join(f"{s.label} {s.unmatched}" for s in samples if s.unmatched))
+        return False
+    independent = is_position_independent(samples)
+    tester.log("✅ Dispatch cost doesn't depend on route position" if independent
+               else "❌ Later routes take longer to dispatch")
+    return independent
+
+
+def run_upload_bench_mode(args, server=None):
+    """Time 1, 10 and 50 file uploads and report the server's peak memory growth"""
+    from tests.proc import ProcessPeakMemory
+    from tests.upload_bench import UploadBenchmark, report_lines
+
+    memory_probe = None
+    if server:
+        server.store.storage.latency = args.storage_latency
+        # The fake runs in this process, so this includes the client side
+        memory_probe = ProcessPeakMemory(os.getpid())
+    elif args.server_pid:
+        memory_probe = ProcessPeakMemory(args.server_pid)
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    counts = [int(count) for count in args.files.split(",")]
+    rows = UploadBenchmark(args.base_url, counts=counts, memory_probe=memory_probe, log=tester.log).run()
+    for line in report_lines(rows):
+        tester.log(line)
+    ok = all(row.uploaded == row.files for row in rows)
+    tester.log("✅ Every file was uploaded" if ok else "❌ Some files failed to upload")
+    return ok
+
+
+def run_payload_bench_mode(args):
+    """Compare bytes on the wire and response time of full, projected and compressed trip views"""
+    from tests.payload_bench import PayloadBenchmark, find_row, report_lines
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    encodings = [encoding.strip() for encoding in args.encodings.split(",")]
+    rows = PayloadBenchmark(args.base_url, encodings=encodings, log=tester.log).run()
+    for line in report_lines(rows):
+        tester.log(line)
+    full = find_row(rows, "GET /trips", encodings[0])
+    projected = find_row(rows, "GET /trips ?fields", encodings[0])
+    smaller = projected.wire_bytes < full.wire_bytes
+    tester.log("✅ ?fields lists are smaller than full lists" if smaller
+               else "❌ ?fields didn't shrink the trip list")
+    return smaller
+
+
+def run_poll_bench_mode(args):
+    """Poll the ETag routes blind and with If-None-Match; compare bytes and server time"""
+    from tests.poll_bench import PollBenchmark
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    report = PollBenchmark(args.base_url, pollers=args.pollers, rounds=args.rounds, log=tester.log).run()
+    for line in report.lines():
+        tester.log(line)
+    ok = report.stale == 0 and report.bytes_saved > 0
+    tester.log("✅ Unchanged polls got 304s and every write was seen" if ok
+               else "❌ Conditional polling served stale data or saved nothing")
+    return ok
+
+
+def run_pg_conversation_bench_mode(args):
+    """Time the conversation page query on Postgres before and after the conversation_key migration"""
+    from tests.pg_conversation_bench import PgConversationBenchmark, report_lines
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    if not args.pg_dsn:
+        tester.log("❌ --pg-conversation-bench needs --pg-dsn or $DATABASE_URL")
+        return False
+    benchmark = PgConversationBenchmark(
+        args.pg_dsn,
+        messages=args.pg_messages,
+        sizes=[int(size) for size in args.sizes.split(",")],
+        log=tester.log,
+    )
+    rows = benchmark.run()
+    for line in report_lines(rows, benchmark.migration_seconds):
+        tester.log(line)
+    faster = all(row.after.p50 <= row.before.p50 for row in rows)
+    tester.log("✅ Conversation key lookup is as fast or faster at every size" if faster
+               else "❌ Conversation key lookup was slower for some conversation")
+    return faster
+
+
+def run_dataset_mode(args, server=None):
+    """Generate a synthetic dataset and bulk load it into --pg-dsn or the offline store"""
+    from tests.dataset import DatasetGenerator, DatasetSpec, FakeStoreLoader, PostgresLoader, load_dataset
+
+    tester = TuckerTripsBackendTester(args.base_url)
+    if server:
+        loader, target = FakeStoreLoader(server.store), "the offline store"
+    elif args.pg_dsn:
+        loader, target = PostgresLoader(args.pg_dsn), "Postgres"
+    else:
+        tester.log("❌ --dataset needs --offline or --pg-dsn / $DATABASE_URL")
+        return False
+
+    spec = DatasetSpec(users=args.dataset_users, trips=args.dataset_trips, messages=args.dataset_messages,
+                       seed=args.seed, label=f"dataset-{args.seed}")
+    tester.log(f"🚀 Loading {spec.users} users, {spec.trips} trips and {spec.messages} messages into {target}")
+    try:
+        report = load_dataset(DatasetGenerator(spec), loader, log=tester.log)
+    finally:
+        loader.close()
+    for line in report.lines():
+        tester.log(line)
+    return True
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tucker Trips backend test suite")
+    parser.add_argument("--base-url", default=BASE_URL, help="API base URL (default: $BASE_URL)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Run against the in-process fake API instead of --base-url")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Scenarios run at once by the functional suite (default: all of them)")
+    parser.add_argument("--load", action="store_true",
+                        help="Run the concurrent load generator instead of the functional tests")
+    parser.add_argument("--users", type=int, default=20, help="Synthetic users for --load and --soak")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests kept in flight for --load and --soak")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run --load for")
+    parser.add_argument("--bench", action="store_true",
+                        help="Record per-route latency histograms and compare them to a baseline")
+    parser.add_argument("--iterations", type=int, default=20, help="Scenario iterations for --bench")
+    parser.add_argument("--baseline", default="bench_baseline.json", help="Baseline JSON for --bench")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the --bench results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed p95 growth before --bench fails (0.2 = 20%%)")
+    parser.add_argument("--conversation-bench", action="store_true",
+                        help="Measure conversation fetches as one chat grows through --sizes")
+    parser.add_argument("--sizes", default="100,1000,10000,100000",
+                        help="Comma separated conversation sizes for --conversation-bench, --pg-conversation-bench "
+                             "and --unread-bench")
+    parser.add_argument("--unread-bench", action="store_true",
+                        help="Check GET /messages/unread counts and time it as history grows to --sizes")
+    parser.add_argument("--contacts", type=int, default=50, help="Contacts messaging the reader in --unread-bench")
+    parser.add_argument("--presence-stress", action="store_true",
+                        help="Heartbeat from --presence-users users and verify the online list")
+    parser.add_argument("--presence-users", type=int, default=5000, help="Users for --presence-stress")
+    parser.add_argument("--token-reuse", action="store_true",
+                        help="Spread --requests over --tokens tokens and report token cache hits and CPU")
+    parser.add_argument("--tokens", type=int, default=2000, help="Distinct tokens for --token-reuse")
+    parser.add_argument("--requests", type=int, default=20000,
+                        help="Requests sent by --token-reuse, per route for --route-bench")
+    parser.add_argument("--server-pid", type=int,
+                        help="PID of a local API server, to read its CPU, memory and file descriptors")
+    parser.add_argument("--auth-storm", action="store_true",
+                        help="Log --users accounts in from --concurrency clients for --duration seconds "
+                             "and time heartbeat/online meanwhile")
+    parser.add_argument("--password-cost", type=int, default=14,
+                        help="Offline password hash cost (2^n PBKDF2 rounds) for --auth-storm")
+    parser.add_argument("--stream-fanout", action="store_true",
+                        help="Open --subscribers event streams and time delivery to them")
+    parser.add_argument("--subscribers", type=int, default=2000, help="Event streams for --stream-fanout")
+    parser.add_argument("--messages", type=int, default=500, help="Messages sent by --stream-fanout")
+    parser.add_argument("--soak", action="store_true",
+                        help="Replay a mixed workload for a long time and flag resource growth or latency drift")
+    parser.add_argument("--soak-duration", type=float, default=3600.0, help="Seconds to run --soak for")
+    parser.add_argument("--sample-interval", type=float, default=10.0,
+                        help="Seconds between server samples in --soak")
+    parser.add_argument("--feed-bench", action="store_true",
+                        help="Seed --trips public trips and time feed pages at --pages by cursor and offset")
+    parser.add_argument("--trips", type=int, default=1_000_000, help="Public trips seeded by --feed-bench")
+    parser.add_argument("--pages", default="1,10,100,1000,10000",
+                        help="Comma separated page numbers for --feed-bench")
+    parser.add_argument("--route-bench", action="store_true",
+                        help="Compare dispatch time of an early and a late route over --requests requests each")
+    parser.add_argument("--upload-bench", action="store_true",
+                        help="Upload --files files in one request each and report wall time and peak memory")
+    parser.add_argument("--files", default="1,10,50", help="Comma separated file counts for --upload-bench")
+    parser.add_argument("--storage-latency", type=float, default=0.05,
+                        help="Seconds per file for the offline storage stand-in (--upload-bench)")
+    parser.add_argument("--payload-bench", action="store_true",
+                        help="Report bytes on the wire and response time of trip list and detail views")
+    parser.add_argument("--encodings", default="identity,gzip,br",
+                        help="Comma separated Accept-Encoding values for --payload-bench")
+    parser.add_argument("--poll-bench", action="store_true",
+                        help="Compare polling the ETag routes with and without If-None-Match")
+    parser.add_argument("--pollers", type=int, default=10, help="Dashboard tabs polling in --poll-bench")
+    parser.add_argument("--rounds", type=int, default=30, help="Polling rounds for --poll-bench")
+    parser.add_argument("--pg-conversation-bench", action="store_true",
+                        help="Seed a local Postgres and time conversation pages before/after the conversation_key migration")
+    parser.add_argument("--pg-dsn", default=os.environ.get("DATABASE_URL"),
+                        help="Postgres DSN for --pg-conversation-bench (default: $DATABASE_URL)")
+    parser.add_argument("--pg-messages", type=int, default=5_000_000,
+                        help="Background messages seeded by --pg-conversation-bench")
+    parser.add_argument("--dataset", action="store_true",
+                        help="Generate a skewed synthetic dataset and bulk load it (--offline store or --pg-dsn)")
+    parser.add_argument("--dataset-users", type=int, default=100_000, help="Users generated by --dataset")
+    parser.add_argument("--dataset-trips", type=int, default=500_000, help="Trips generated by --dataset")
+    parser.add_argument("--dataset-messages", type=int, default=10_000_000, help="Messages generated by --dataset")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for --dataset")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = None
+    if args.offline:
+        from tests.fake_api import FakeApiServer
+
+        server = FakeApiServer().start()
+        args.base_url = server.base_url
+    try:
+        if args.load:
+            return run_load_mode(args)
+        if args.bench:
+            return run_bench_mode(args)
+        if args.conversation_bench:
+            return run_conversation_bench_mode(args, server)
+        if args.unread_bench:
+            return run_unread_bench_mode(args, server)
+        if args.presence_stress:
+            return run_presence_stress_mode(args, server)
+        if args.token_reuse:
+            return run_token_reuse_mode(args, server)
+        if args.auth_storm:
+            return run_auth_storm_mode(args, server)
+        if args.stream_fanout:
+            return run_stream_fanout_mode(args, server)
+        if args.soak:
+            return run_soak_mode(args, server)
+        if args.feed_bench:
+            return run_feed_bench_mode(args, server)
+        if args.route_bench:
+            return run_route_bench_mode(args)
+        if args.upload_bench:
+            return run_upload_bench_mode(args, server)
+        if args.payload_bench:
+            return run_payload_bench_mode(args)
+        if args.poll_bench:
+            return run_poll_bench_mode(args)
+        if args.pg_conversation_bench:
+            return run_pg_conversation_bench_mode(args)
+        if args.dataset:
+            return run_dataset_mode(args, server)
+        return run_parallel_mode(args, server)
+    finally:
+        if server:
+            server.stop()
+
+
 if __name__ == "__main__":
-    tester = TuckerTripsBackendTester()
-    success = tester.run_all_tests()
-    sys.exit(0 if success else 1)
+    sys.exit(0 if main() else 1)
@@ -1,8 +1,13 @@
-import { apiClient, ApiError, authApi } from '../api'
+import { apiClient, ApiError, authApi, messageApi } from '../api'
 
 // Mock fetch globally
 global.fetch = jest.fn()
 
+// Just enough of the fetch Headers interface for the client
+const responseHeaders = (values) => ({
+  get: (name) => values[name] ?? null,
+})
+
 describe('ApiError', () => {
   it('creates an error with message, status, and data', () => {
     const error = new ApiError('Test error', 400, { foo: 'bar' })
@@ -265,6 +270,20 @@ describe('apiClient', () => {
     )
   })
 
+  it('resolves to data and headers when withHeaders is set', async () => {
+    const headers = responseHeaders({ 'X-Has-More': 'true' })
+    global.fetch.mockResolvedValueOnce({
+      ok: true,
+      headers,
+      json: async () => [{ id: '1' }],
+    })
+
+    const result = await apiClient('/test', { withHeaders: true })
+
+    expect(result).toEqual({ data: [{ id: '1' }], headers })
+    expect(result.headers.get('X-Has-More')).toBe('true')
+  })
+
   it('supports DELETE method', async () => {
     global.fetch.mockResolvedValueOnce({
       ok: true,
@@ -365,3 +384,78 @@ describe('authApi', () => {
     })
   })
 })
+
+describe('messageApi', () => {
+  beforeEach(() => {
+    jest.clearAllMocks()
+    localStorage.clear()
+  })
+
+  describe('getConversationPage', () => {
+    it('parses the paging headers', async () => {
+      const messages = [{ id: 'm1' }, { id: 'm2' }]
+      global.fetch.mockResolvedValueOnce({
+        ok: true,
+        headers: responseHeaders({
+          'X-Next-Cursor': 'older-cursor',
+          'X-Latest-Cursor': 'latest-cursor',
+          'X-Has-More': 'true',
+        }),
+        json: async () => messages,
+      })
+
+      const page = await messageApi.getConversationPage('user-2')
+
+      expect(global.fetch).toHaveBeenCalledWith('/api/messages/user-2', expect.any(Object))
+      expect(page).toEqual({
+        messages,
+        nextCursor: 'older-cursor',
+        latestCursor: 'latest-cursor',
+        hasMore: true,
+      })
+    })
+
+    it('reports the last page when the headers are absent', async () => {
+      global.fetch.mockResolvedValueOnce({
+        ok: true,
+        headers: responseHeaders({}),
+        json: async () => [],
+      })
+
+      const page = await messageApi.getConversationPage('user-2')
+
+      expect(page.nextCursor).toBeNull()
+      expect(page.hasMore).toBe(false)
+    })
+
+    it('passes the cursor and limit through', async () => {
+      global.fetch.mockResolvedValueOnce({
+        ok: true,
+        headers: responseHeaders({}),
+        json: async () => [],
+      })
+
+      await messageApi.getConversationPage('user-2', { before: 'abc=', limit: 25 })
+
+      expect(global.fetch).toHaveBeenCalledWith(
+        '/api/messages/user-2?before=abc%3D&limit=25',
+        expect.any(Object)
+      )
+    })
+  })
+
+  describe('getConversation', () => {
+    it('fetches a single page', async () => {
+      global.fetch.mockResolvedValueOnce({
+        ok: true,
+        headers: responseHeaders({ 'X-Next-Cursor': 'older-cursor', 'X-Has-More': 'true' }),
+        json: async () => [{ id: 'm1' }],
+      })
+
+      const messages = await messageApi.getConversation('user-2')
+
+      expect(messages).toEqual([{ id: 'm1' }])
+      expect(global.fetch).toHaveBeenCalledTimes(1)
+    })
+  })
+})
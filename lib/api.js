@@ -69,6 +69,7 @@ function getAuthToken() {
  * @param {Object} options.body - Request body (will be JSON stringified)
  * @param {Object} options.headers - Additional headers
  * @param {boolean} options.skipAuth - Skip authorization header (for public endpoints)
+ * @param {boolean} options.withHeaders - Resolve to { data, headers } instead of the data alone
  * @returns {Promise<any>} Response data
  * @throws {ApiError} If request fails
  */
@@ -78,6 +79,7 @@ export async function apiClient(endpoint, options = {}) {
     body,
     headers = {},
     skipAuth = false,
+    withHeaders = false,
   } = options;
 
   // Build headers
@@ -154,7 +156,7 @@ export async function apiClient(endpoint, options = {}) {
       throw apiError;
     }
 
-    return data;
+    return withHeaders ? { data, headers: response.headers } : data;
   } catch (error) {
     // Re-throw SupabaseError and ApiError as-is
     if (error instanceof SupabaseError || error instanceof ApiError) {
@@ -239,5 +241,31 @@ export const tripApi = {
 export const messageApi = {
   send: (messageData) => api.post('/messages', messageData),
 
-  getConversation: (userId) => api.get(`/messages/${userId}`),
+  /**
+   * One page of a conversation, oldest first
+   * @param {string} userId - The other user
+   * @param {Object} cursor - { before } for older history or { since } for new messages; neither for the newest page
+   * @returns {Promise<{messages: Array, nextCursor: string|null, latestCursor: string|null, hasMore: boolean}>}
+   */
+  getConversationPage: async (userId, { before, since, limit } = {}) => {
+    const params = new URLSearchParams();
+    if (before) params.set('before', before);
+    if (since) params.set('since', since);
+    if (limit) params.set('limit', String(limit));
+    const query = params.toString();
+    const { data, headers } = await api.get(`/messages/${userId}${query ? `?${query}` : ''}`, { withHeaders: true });
+    return {
+      messages: data,
+      nextCursor: headers.get('X-Next-Cursor'),
+      latestCursor: headers.get('X-Latest-Cursor'),
+      hasMore: headers.get('X-Has-More') === 'true',
+    };
+  },
+
+  /**
+   * The newest page of a conversation, oldest first; use getConversationPage for older history
+   * @param {string} userId - The other user
+   * @returns {Promise<Array>} Messages
+   */
+  getConversation: async (userId) => (await messageApi.getConversationPage(userId)).messages,
 };
@@ -175,7 +175,7 @@ export function validateEnvironmentOrThrow() {
  */
 export function validateServerEnvironment() {
   // Only validate server-side vars
-  const serverVars = ['SUPABASE_SERVICE_ROLE_KEY', 'JWT_SECRET']
+  const serverVars = ['NEXT_PUBLIC_SUPABASE_URL', 'SUPABASE_SERVICE_ROLE_KEY', 'JWT_SECRET']
   const missing = serverVars.filter(key => !process.env[key])
 
   if (missing.length > 0) {
@@ -33,6 +33,16 @@ const ALLOWED_MIME_TYPES = {
   ],
 }
 
+// Server client shared by every upload instead of one per file
+let serverClient = null
+
+function getServerClient() {
+  if (!serverClient) {
+    serverClient = createServerSupabaseClient()
+  }
+  return serverClient
+}
+
 /**
  * Validates file before upload
  * @param {File|Blob} file - File to validate
@@ -94,7 +104,7 @@ export function generateFilePath(userId, fileName, folder = '') {
 
 /**
  * Uploads a file to Supabase Storage (Server-side)
- * @param {File|Buffer} file - File to upload
+ * @param {File|Blob|Buffer} file - File to upload; a File/Blob is streamed as is
  * @param {string} bucket - Bucket name
  * @param {string} filePath - File path in storage
  * @param {Object} options - Upload options
@@ -102,7 +112,7 @@ export function generateFilePath(userId, fileName, folder = '') {
  */
 export async function uploadFileServer(file, bucket, filePath, options = {}) {
   try {
-    const supabase = createServerSupabaseClient()
+    const supabase = getServerClient()
 
     const { data, error } = await supabase.storage
       .from(bucket)
@@ -10,7 +10,11 @@ const nextConfig = {
       'ugxzjmzrmvbnhfejwjse.supabase.co'
     ],
   },
-  // Experimental features removed - using Supabase instead of MongoDB
+  experimental: {
+    // Loaded from node_modules at runtime, so the password worker thread
+    // (app/api/lib/password-worker.js) can require it in the traced output
+    serverComponentsExternalPackages: ['bcryptjs'],
+  },
   webpack(config, { dev }) {
     if (dev) {
       // Reduce CPU/memory from file watching
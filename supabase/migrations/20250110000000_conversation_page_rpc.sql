@@ -0,0 +1,83 @@
+-- Fetch a Conversation Page and Mark It Read in One Call
+--
+-- Problem: GET /api/messages/:userId selected a page of messages and then sent
+-- a second UPDATE to mark the other party's messages read, doubling database
+-- round trips on the hottest chat path.
+--
+-- Solution: one function that selects the page (keyset on created_at, id) and
+-- marks the caller's unread messages up to the newest returned row.
+--
+-- Returned rows carry the read flag as it was before marking, so a client can
+-- still tell which messages were new to it. One extra look-ahead row is
+-- returned so the caller can tell whether another page exists; it is never
+-- marked read.
+
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created
+  ON messages(sender_id, recipient_id, created_at, id);
+
+CREATE OR REPLACE FUNCTION get_conversation_page(
+  user_id_param TEXT,
+  other_user_id_param TEXT,
+  limit_param INT DEFAULT 50,
+  before_created_at TIMESTAMPTZ DEFAULT NULL,
+  before_id TEXT DEFAULT NULL,
+  since_created_at TIMESTAMPTZ DEFAULT NULL,
+  since_id TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+  id TEXT,
+  sender_id TEXT,
+  recipient_id TEXT,
+  content TEXT,
+  read BOOLEAN,
+  created_at TIMESTAMPTZ
+) AS $$
+DECLARE
+  page messages[];
+  newest TIMESTAMPTZ;
+BEGIN
+  IF since_created_at IS NOT NULL THEN
+    -- Messages after the cursor, oldest first
+    SELECT ARRAY(
+      SELECT m FROM messages m
+      WHERE
+        ((m.sender_id = user_id_param AND m.recipient_id = other_user_id_param)
+          OR (m.sender_id = other_user_id_param AND m.recipient_id = user_id_param))
+        AND (m.created_at, m.id) > (since_created_at, since_id)
+      ORDER BY m.created_at ASC, m.id ASC
+      LIMIT limit_param + 1
+    ) INTO page;
+  ELSE
+    -- Newest messages (before the cursor, if any), newest first
+    SELECT ARRAY(
+      SELECT m FROM messages m
+      WHERE
+        ((m.sender_id = user_id_param AND m.recipient_id = other_user_id_param)
+          OR (m.sender_id = other_user_id_param AND m.recipient_id = user_id_param))
+        AND (before_created_at IS NULL OR (m.created_at, m.id) < (before_created_at, before_id))
+      ORDER BY m.created_at DESC, m.id DESC
+      LIMIT limit_param + 1
+    ) INTO page;
+  END IF;
+
+  -- Newest row the caller will see, ignoring the look-ahead row
+  SELECT MAX(p.created_at) INTO newest FROM unnest(page[1:limit_param]) AS p;
+
+  IF newest IS NOT NULL THEN
+    UPDATE messages AS u
+    SET read = TRUE
+    WHERE
+      u.sender_id = other_user_id_param
+      AND u.recipient_id = user_id_param
+      AND u.read = FALSE
+      AND u.created_at <= newest;
+  END IF;
+
+  RETURN QUERY
+  SELECT p.id, p.sender_id, p.recipient_id, p.content, p.read, p.created_at
+  FROM unnest(page) WITH ORDINALITY AS p
+  ORDER BY p.ordinality;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION get_conversation_page IS 'Returns one keyset page of a conversation (plus one look-ahead row) and marks it read';
@@ -0,0 +1,20 @@
+-- Keyset Indexes for the Trip Feeds
+--
+-- Problem: GET /api/trips/public/all and /api/trips/shared paged with OFFSET
+-- and ran an exact COUNT(*) per page, so deep pages and large tables got
+-- steadily slower.
+--
+-- Solution: the feeds now page on (created_at, id) cursors and use estimated
+-- totals (app/api/lib/feed.js). These indexes let each page be read
+-- straight off the index in feed order, however deep it is.
+
+-- Public feed: only public trips, newest first
+CREATE INDEX IF NOT EXISTS idx_trips_public_feed
+  ON trips(created_at DESC, id DESC)
+  WHERE visibility = 'public';
+
+-- Shared feed: the GIN index on shared_with finds a user's trips; this one
+-- gives the planner a (created_at, id) order to walk for the keyset
+CREATE INDEX IF NOT EXISTS idx_trips_created_id ON trips(created_at DESC, id DESC);
+
+COMMENT ON INDEX idx_trips_public_feed IS 'Keyset paging for the public trips feed';
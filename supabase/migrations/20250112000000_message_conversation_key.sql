@@ -0,0 +1,117 @@
+-- Conversation Key for Messages
+--
+-- Problem: a conversation is "(sender = A AND recipient = B) OR (sender = B
+-- AND recipient = A)". With separate (sender_id, recipient_id) and created_at
+-- indexes the planner can't read a two-way conversation in created_at order
+-- from one index, so a page costs a scan of both directions plus a sort,
+-- growing with the size of the conversation.
+--
+-- Solution: store an order-independent key for the two participants,
+-- least id first ("a:b"), and index (conversation_key, created_at, id). A
+-- page is then one backward range scan that stops after LIMIT rows.
+--
+-- The API writes conversation_key on insert (conversationKey in
+-- app/api/handlers/messages.js). The trigger fills it for any writer that
+-- doesn't, e.g. an older deployment still running during the rollout.
+--
+-- On a large table, backfill in batches ahead of this migration (the UPDATE
+-- below then finds nothing to do) and build the index with CREATE INDEX
+-- CONCURRENTLY outside a transaction.
+
+CREATE OR REPLACE FUNCTION conversation_key(user_a TEXT, user_b TEXT)
+RETURNS TEXT AS $$
+  -- COLLATE "C" compares bytes, matching JavaScript's string ordering
+  SELECT LEAST(user_a COLLATE "C", user_b COLLATE "C") || ':' ||
+         GREATEST(user_a COLLATE "C", user_b COLLATE "C")
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS conversation_key TEXT;
+
+CREATE OR REPLACE FUNCTION set_message_conversation_key()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.conversation_key IS NULL THEN
+    NEW.conversation_key := conversation_key(NEW.sender_id, NEW.recipient_id);
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS messages_conversation_key ON messages;
+CREATE TRIGGER messages_conversation_key
+  BEFORE INSERT ON messages
+  FOR EACH ROW EXECUTE FUNCTION set_message_conversation_key();
+
+-- Backfill existing rows
+UPDATE messages
+SET conversation_key = conversation_key(sender_id, recipient_id)
+WHERE conversation_key IS NULL;
+
+ALTER TABLE messages ALTER COLUMN conversation_key SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_key_created
+  ON messages(conversation_key, created_at, id);
+
+-- Same contract as before (see 20250110000000_conversation_page_rpc.sql);
+-- only the page lookup changes, to the conversation key index
+CREATE OR REPLACE FUNCTION get_conversation_page(
+  user_id_param TEXT,
+  other_user_id_param TEXT,
+  limit_param INT DEFAULT 50,
+  before_created_at TIMESTAMPTZ DEFAULT NULL,
+  before_id TEXT DEFAULT NULL,
+  since_created_at TIMESTAMPTZ DEFAULT NULL,
+  since_id TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+  id TEXT,
+  sender_id TEXT,
+  recipient_id TEXT,
+  content TEXT,
+  read BOOLEAN,
+  created_at TIMESTAMPTZ
+) AS $$
+DECLARE
+  conv_key TEXT := conversation_key(user_id_param, other_user_id_param);
+  page messages[];
+  newest TIMESTAMPTZ;
+BEGIN
+  IF since_created_at IS NOT NULL THEN
+    -- Messages after the cursor, oldest first
+    SELECT ARRAY(
+      SELECT m FROM messages m
+      WHERE m.conversation_key = conv_key
+        AND (m.created_at, m.id) > (since_created_at, since_id)
+      ORDER BY m.created_at ASC, m.id ASC
+      LIMIT limit_param + 1
+    ) INTO page;
+  ELSE
+    -- Newest messages (before the cursor, if any), newest first
+    SELECT ARRAY(
+      SELECT m FROM messages m
+      WHERE m.conversation_key = conv_key
+        AND (before_created_at IS NULL OR (m.created_at, m.id) < (before_created_at, before_id))
+      ORDER BY m.created_at DESC, m.id DESC
+      LIMIT limit_param + 1
+    ) INTO page;
+  END IF;
+
+  -- Newest row the caller will see, ignoring the look-ahead row
+  SELECT MAX(p.created_at) INTO newest FROM unnest(page[1:limit_param]) AS p;
+
+  IF newest IS NOT NULL THEN
+    UPDATE messages AS u
+    SET read = TRUE
+    WHERE
+      u.sender_id = other_user_id_param
+      AND u.recipient_id = user_id_param
+      AND u.read = FALSE
+      AND u.created_at <= newest;
+  END IF;
+
+  RETURN QUERY
+  SELECT p.id, p.sender_id, p.recipient_id, p.content, p.read, p.created_at
+  FROM unnest(page) WITH ORDINALITY AS p
+  ORDER BY p.ordinality;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,141 @@
+-- Unread Counters and Latest-Message Previews per Conversation
+--
+-- Problem: the only way to learn about unread messages was GET
+-- /api/messages/:userId for each contact, which reads the conversation and
+-- marks it read as a side effect. A sidebar of 50 contacts cost 50 history
+-- fetches, and counting unread rows grows with the history.
+--
+-- Solution: one summary row per (user, other user) holding the user's
+-- unread count and the conversation's latest message, maintained by
+-- triggers on messages:
+-- - after INSERT: the recipient's count goes up by the unread rows
+--   inserted, and both participants' rows take the newest message
+-- - after UPDATE: rows flipped to read (get_conversation_page does this)
+--   take the count down
+-- Both are statement-level with transition tables, so a batch insert or a
+-- page marked read costs one upsert per conversation, not per message.
+--
+-- GET /api/messages/unread reads a user's rows newest first from
+-- idx_conversation_summaries_latest, independent of history size.
+
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+  user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  other_user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  unread_count INT NOT NULL DEFAULT 0,
+  last_message_id TEXT NOT NULL,
+  last_sender_id TEXT NOT NULL,
+  last_message_preview TEXT NOT NULL,
+  last_message_at TIMESTAMPTZ NOT NULL,
+  PRIMARY KEY (user_id, other_user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_summaries_latest
+  ON conversation_summaries(user_id, last_message_at DESC, other_user_id);
+
+-- Summing a user's badge only touches conversations that have unread messages
+CREATE INDEX IF NOT EXISTS idx_conversation_summaries_unread
+  ON conversation_summaries(user_id)
+  WHERE unread_count > 0;
+
+-- Previews are the first 100 characters of the message
+CREATE OR REPLACE FUNCTION message_preview(content TEXT)
+RETURNS TEXT AS $$
+  SELECT LEFT(content, 100)
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+CREATE OR REPLACE FUNCTION summarize_inserted_messages()
+RETURNS TRIGGER AS $$
+BEGIN
+  -- One row per side of each conversation touched by the statement: the
+  -- recipient's side counts unread rows, the sender's side counts none
+  INSERT INTO conversation_summaries AS s (
+    user_id, other_user_id, unread_count,
+    last_message_id, last_sender_id, last_message_preview, last_message_at
+  )
+  SELECT DISTINCT ON (side.user_id, side.other_user_id)
+    side.user_id,
+    side.other_user_id,
+    SUM(side.unread) OVER (PARTITION BY side.user_id, side.other_user_id),
+    side.id,
+    side.sender_id,
+    message_preview(side.content),
+    side.created_at
+  FROM (
+    SELECT n.recipient_id AS user_id, n.sender_id AS other_user_id,
+           (NOT COALESCE(n.read, FALSE))::INT AS unread, n.id, n.sender_id, n.content, n.created_at
+    FROM inserted n
+    UNION ALL
+    SELECT n.sender_id, n.recipient_id, 0, n.id, n.sender_id, n.content, n.created_at
+    FROM inserted n
+    WHERE n.sender_id <> n.recipient_id
+  ) AS side
+  ORDER BY side.user_id, side.other_user_id, side.created_at DESC, side.id DESC
+  ON CONFLICT (user_id, other_user_id) DO UPDATE SET
+    unread_count = s.unread_count + EXCLUDED.unread_count,
+    last_message_id = CASE WHEN EXCLUDED.last_message_at >= s.last_message_at
+      THEN EXCLUDED.last_message_id ELSE s.last_message_id END,
+    last_sender_id = CASE WHEN EXCLUDED.last_message_at >= s.last_message_at
+      THEN EXCLUDED.last_sender_id ELSE s.last_sender_id END,
+    last_message_preview = CASE WHEN EXCLUDED.last_message_at >= s.last_message_at
+      THEN EXCLUDED.last_message_preview ELSE s.last_message_preview END,
+    last_message_at = GREATEST(s.last_message_at, EXCLUDED.last_message_at);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION summarize_read_messages()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE conversation_summaries AS s
+  SET unread_count = GREATEST(s.unread_count - flipped.marked, 0)
+  FROM (
+    SELECT n.recipient_id, n.sender_id, COUNT(*) AS marked
+    FROM updated_new n
+    JOIN updated_old o ON o.id = n.id
+    WHERE n.read AND NOT COALESCE(o.read, FALSE)
+    GROUP BY n.recipient_id, n.sender_id
+  ) AS flipped
+  WHERE s.user_id = flipped.recipient_id
+    AND s.other_user_id = flipped.sender_id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS messages_summarize_insert ON messages;
+CREATE TRIGGER messages_summarize_insert
+  AFTER INSERT ON messages
+  REFERENCING NEW TABLE AS inserted
+  FOR EACH STATEMENT EXECUTE FUNCTION summarize_inserted_messages();
+
+DROP TRIGGER IF EXISTS messages_summarize_read ON messages;
+CREATE TRIGGER messages_summarize_read
+  AFTER UPDATE ON messages
+  REFERENCING OLD TABLE AS updated_old NEW TABLE AS updated_new
+  FOR EACH STATEMENT EXECUTE FUNCTION summarize_read_messages();
+
+-- Backfill from existing messages
+INSERT INTO conversation_summaries (
+  user_id, other_user_id, unread_count,
+  last_message_id, last_sender_id, last_message_preview, last_message_at
+)
+SELECT DISTINCT ON (side.user_id, side.other_user_id)
+  side.user_id,
+  side.other_user_id,
+  SUM(side.unread) OVER (PARTITION BY side.user_id, side.other_user_id),
+  side.id,
+  side.sender_id,
+  message_preview(side.content),
+  side.created_at
+FROM (
+  SELECT m.recipient_id AS user_id, m.sender_id AS other_user_id,
+         (NOT COALESCE(m.read, FALSE))::INT AS unread, m.id, m.sender_id, m.content, m.created_at
+  FROM messages m
+  UNION ALL
+  SELECT m.sender_id, m.recipient_id, 0, m.id, m.sender_id, m.content, m.created_at
+  FROM messages m
+  WHERE m.sender_id <> m.recipient_id
+) AS side
+ORDER BY side.user_id, side.other_user_id, side.created_at DESC, side.id DESC
+ON CONFLICT (user_id, other_user_id) DO NOTHING;
+
+COMMENT ON TABLE conversation_summaries IS 'Per-user unread count and latest message of each conversation, kept by triggers on messages';
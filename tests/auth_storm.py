@@ -0,0 +1,155 @@
+"""
+Login storm scenario for the password hashing pool.
+
+Registers `accounts` users, then measures unrelated routes (POST
+/users/heartbeat and GET /users/online, sent at a steady pace by one probe
+user) twice: on their own, and while `concurrency` clients log in back to
+back for `duration` seconds. Reports logins/sec, login latency, 503
+rejections from the full hashing queue, and the probe routes' p99 before and
+during the storm. With hashing off the request thread the probe p99 should
+barely move.
+
+Storm clients honour Retry-After on a 503, as a well-behaved client would.
+
+Requires aiohttp (`pip install aiohttp`).
+"""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from tests.client import AsyncApiClient
+from tests.load import percentile
+
+PROBE_ROUTES = (("POST", "/users/heartbeat"), ("GET", "/users/online"))
+# Gap between probe requests; the probe measures, it shouldn't add load
+PROBE_INTERVAL_SECONDS = 0.02
+
+
+class AuthStormReport:
+    """Outcome of one login storm"""
+
+    def __init__(self, accounts, concurrency, elapsed, login_latencies, busy, errors, probe_before, probe_during):
+        self.accounts = accounts
+        self.concurrency = concurrency
+        self.elapsed = elapsed
+        self.login_latencies = sorted(login_latencies)
+        self.busy = busy
+        self.errors = errors
+        self.probe_before = sorted(probe_before)
+        self.probe_during = sorted(probe_during)
+
+    @property
+    def logins(self):
+        return len(self.login_latencies)
+
+    @property
+    def logins_per_second(self):
+        return self.logins / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def probe_p99_before(self):
+        return percentile(self.probe_before, 99)
+
+    @property
+    def probe_p99_during(self):
+        return percentile(self.probe_during, 99)
+
+    def lines(self):
+        return [
+            f"Login storm: {self.concurrency} clients over {self.accounts} accounts for {self.elapsed:.1f}s - "
+            f"{self.logins} logins ({self.logins_per_second:.1f}/s), {self.busy} busy (503), {self.errors} errors",
+            f"Login latency: p50 {percentile(self.login_latencies, 50):.1f}ms, "
+            f"p99 {percentile(self.login_latencies, 99):.1f}ms",
+            f"Heartbeat/online p99: {self.probe_p99_before:.1f}ms alone, "
+            f"{self.probe_p99_during:.1f}ms during the storm ({len(self.probe_during)} probes)",
+        ]
+
+
+class AuthStorm:
+    """Times unrelated routes before and during a burst of logins"""
+
+    def __init__(self, base_url, accounts=200, concurrency=50, duration=10.0, baseline=3.0, log=print, seed=None):
+        self.base_url = base_url
+        self.accounts = accounts
+        self.concurrency = concurrency
+        self.duration = duration
+        self.baseline = baseline
+        self.log = log
+        self.random = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.errors = 0
+
+    async def _register(self, client, index):
+        payload = {
+            "name": f"Storm User {index}",
+            "email": f"storm-{self.run_id}-{index}@example.com",
+            "password": "StormPass123!",
+        }
+        status, _, body = await client.session().request("POST", "/auth/register", json=payload)
+        if status not in (200, 201):
+            raise RuntimeError(f"Registering storm user {index} failed: {status} - {body[:200]!r}")
+        return payload, json.loads(body)["token"]
+
+    async def _probe(self, session, until):
+        latencies = []
+        while time.perf_counter() < until:
+            for method, path in PROBE_ROUTES:
+                started = time.perf_counter()
+                status, _, _ = await session.request(method, path)
+                if status == 200:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    self.errors += 1
+            await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+        return latencies
+
+    async def _storm(self, client, credentials, until, latencies, outcomes):
+        session = client.session()
+        while time.perf_counter() < until:
+            started = time.perf_counter()
+            status, headers, _ = await session.request("POST", "/auth/login", json=self.random.choice(credentials))
+            if status == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+            elif status == 503:
+                outcomes["busy"] += 1
+                wait = float(headers.get("Retry-After") or 1)
+                await asyncio.sleep(min(wait, max(until - time.perf_counter(), 0)))
+            else:
+                self.errors += 1
+
+    async def run(self):
+        async with AsyncApiClient(self.base_url, limit=self.concurrency + 10) as client:
+            self.log(f"Registering {self.accounts} storm accounts...")
+            limit = asyncio.Semaphore(self.concurrency)
+
+            async def register(index):
+                async with limit:
+                    return await self._register(client, index)
+
+            registered = await asyncio.gather(*(register(i) for i in range(self.accounts + 1)))
+            credentials = [{"email": p["email"], "password": p["password"]} for p, _ in registered[1:]]
+            probe = client.session(registered[0][1])
+
+            self.log(f"Probing heartbeat/online alone for {self.baseline:.0f}s...")
+            before = await self._probe(probe, time.perf_counter() + self.baseline)
+
+            self.log(f"Storming /auth/login with {self.concurrency} clients for {self.duration:.0f}s...")
+            latencies, outcomes = [], {"busy": 0}
+            started = time.perf_counter()
+            until = started + self.duration
+            during, *_ = await asyncio.gather(
+                self._probe(probe, until),
+                *(self._storm(client, credentials, until, latencies, outcomes) for _ in range(self.concurrency)),
+            )
+            elapsed = time.perf_counter() - started
+
+        return AuthStormReport(self.accounts, self.concurrency, elapsed, latencies, outcomes["busy"],
+                               self.errors, before, during)
+
+
+def run_auth_storm(base_url, **kwargs):
+    """Run the login storm synchronously and return its AuthStormReport"""
+    return asyncio.run(AuthStorm(base_url, **kwargs).run())
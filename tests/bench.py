@@ -0,0 +1,229 @@
+"""
+Per-route latency benchmark with JSON baselines.
+
+Replays the TuckerTripsBackendTester scenarios for a number of iterations,
+timing every request through the shared client's recorder hook into an
+HDR-style histogram per route. Results can be saved as a JSON baseline and
+later runs fail when a route's p95 regresses past a threshold.
+"""
+
+import json
+import math
+import re
+import uuid
+
+from tests.client import ApiClient
+
+UUID_SEGMENT = r"[0-9a-fA-F-]{36}"
+
+# Path templates for routes whose paths carry ids, first match wins
+ROUTE_TEMPLATES = [
+    (re.compile(rf"^/messages/{UUID_SEGMENT}$"), "/messages/:userId"),
+    (re.compile(rf"^/trips/{UUID_SEGMENT}/share$"), "/trips/:id/share"),
+    (re.compile(rf"^/trips/{UUID_SEGMENT}$"), "/trips/:id"),
+]
+
+# Routes a benchmark run is expected to cover
+BENCHMARK_ROUTES = [
+    "POST /auth/register",
+    "POST /auth/login",
+    "PATCH /users/profile",
+    "POST /users/heartbeat",
+    "GET /users/online",
+    "POST /messages",
+    "POST /messages/batch",
+    "GET /messages/:userId",
+]
+
+
+def route_template(method, path):
+    """Label a request by method and route template, e.g. 'GET /messages/:userId'"""
+    path = path.split("?", 1)[0]
+    for pattern, template in ROUTE_TEMPLATES:
+        if pattern.match(path):
+            path = template
+            break
+    return f"{method} {path}"
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in the style of HdrHistogram
+
+    Values are recorded as integer microseconds. Each power-of-two range is
+    split into enough linear sub-buckets to keep `significant_figures` of
+    precision, so memory stays bounded no matter how many samples arrive
+    and any percentile is accurate to within that precision.
+    """
+
+    def __init__(self, significant_figures=3):
+        self.significant_figures = significant_figures
+        largest_exact = 2 * 10 ** significant_figures
+        self.sub_bucket_bits = math.ceil(math.log2(largest_exact))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.counts = {}
+        self.count = 0
+        self.min = None
+        self.max = 0
+        self.total = 0
+
+    def _index(self, value):
+        if value < self.sub_bucket_count:
+            return 0, value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return shift, value >> shift
+
+    @staticmethod
+    def _highest_equivalent(index):
+        shift, sub_bucket = index
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, microseconds, count=1):
+        value = max(int(microseconds), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def record_seconds(self, seconds):
+        self.record(seconds * 1_000_000)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, pct):
+        """Value (microseconds) at or below which pct% of samples fall"""
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def summary_ms(self):
+        """Percentiles in milliseconds, the shape stored in baselines"""
+        return {
+            "count": self.count,
+            "mean": round(self.mean / 1000, 3),
+            "p50": round(self.percentile(50) / 1000, 3),
+            "p95": round(self.percentile(95) / 1000, 3),
+            "p99": round(self.percentile(99) / 1000, 3),
+            "max": round(self.max / 1000, 3),
+        }
+
+
+class BenchmarkResult:
+    """Histograms per route plus how many scenario iterations produced them"""
+
+    def __init__(self, histograms, iterations, failures=0):
+        self.histograms = histograms
+        self.iterations = iterations
+        self.failures = failures
+
+    def summary(self):
+        return {route: self.histograms[route].summary_ms() for route in sorted(self.histograms)}
+
+    def to_baseline(self):
+        return {"iterations": self.iterations, "routes": self.summary()}
+
+    def lines(self):
+        out = [f"{'route':<28}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"]
+        for route, stats in self.summary().items():
+            out.append(
+                f"{route:<28}{stats['count']:>7}{stats['p50']:>9.2f}{stats['p95']:>9.2f}"
+                f"{stats['p99']:>9.2f}{stats['max']:>9.2f}"
+            )
+        return out
+
+
+class Regression:
+    def __init__(self, route, baseline_p95, current_p95):
+        self.route = route
+        self.baseline_p95 = baseline_p95
+        self.current_p95 = current_p95
+
+    @property
+    def ratio(self):
+        return self.current_p95 / self.baseline_p95 if self.baseline_p95 else math.inf
+
+    def __str__(self):
+        return (
+            f"{self.route}: p95 {self.baseline_p95:.2f}ms -> {self.current_p95:.2f}ms "
+            f"(+{(self.ratio - 1) * 100:.0f}%)"
+        )
+
+
+def find_regressions(current, baseline, threshold=0.2):
+    """Routes whose p95 grew by more than `threshold` (0.2 = 20%) over the baseline
+
+    Both arguments are baseline-shaped dicts. Routes missing from either side
+    are ignored so new routes can be added without failing the run.
+    """
+    regressions = []
+    for route, stats in current.get("routes", {}).items():
+        previous = baseline.get("routes", {}).get(route)
+        if not previous:
+            continue
+        if stats["p95"] > previous["p95"] * (1 + threshold):
+            regressions.append(Regression(route, previous["p95"], stats["p95"]))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_baseline(result, path):
+    with open(path, "w") as handle:
+        json.dump(result.to_baseline(), handle, indent=2, sort_keys=True)
+        handle.write("\n")
+
+
+class BenchmarkRunner:
+    """Replays the backend test scenarios and records a histogram per route"""
+
+    def __init__(self, base_url, iterations=20, tester_factory=None):
+        self.base_url = base_url
+        self.iterations = iterations
+        self.histograms = {}
+        self.tester_factory = tester_factory
+
+    def _record(self, method, path, seconds, response):
+        # Rejected requests (e.g. the unauthorized-access scenario) take a
+        # different path through the handler and would skew the route
+        if response.status_code >= 400:
+            return
+        label = route_template(method, path)
+        if label not in self.histograms:
+            self.histograms[label] = LatencyHistogram()
+        self.histograms[label].record_seconds(seconds)
+
+    def run(self):
+        factory = self.tester_factory
+        if factory is None:
+            from backend_test import TuckerTripsBackendTester as factory
+
+        failures = 0
+        with ApiClient(self.base_url, recorder=self._record) as client:
+            for _ in range(self.iterations):
+                tester = factory(self.base_url, client=client, run_id=uuid.uuid4().hex[:8], verbose=False)
+                for _, scenario in tester.scenarios():
+                    if not scenario():
+                        failures += 1
+        return BenchmarkResult(self.histograms, self.iterations, failures)
@@ -0,0 +1,203 @@
+"""
+Shared HTTP client layer for the Tucker Trips test harness.
+
+All scenarios talk to the API through per-user sessions that share one
+keep-alive connection pool per host, so a run spends its time in the route
+handlers instead of TCP/TLS setup. Sessions are pre-authenticated: the
+`Authorization: Bearer` header is set once when the token is known.
+
+`ApiClient` is the blocking (requests) flavour used by the functional suite;
+`AsyncApiClient` is the aiohttp flavour used by the load and benchmark modes.
+Both report how many connections were opened versus reused.
+"""
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+DEFAULT_MAX_PER_HOST = 10
+
+
+class ConnectionStats:
+    """Connections opened versus reused over a run"""
+
+    def __init__(self, opened=0, reused=0):
+        self.opened = opened
+        self.reused = reused
+
+    @property
+    def requests(self):
+        return self.opened + self.reused
+
+    @property
+    def reuse_rate(self):
+        return self.reused / self.requests if self.requests else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.requests} requests over {self.opened} connection(s) - "
+            f"{self.reused} reused ({self.reuse_rate * 100:.1f}%)"
+        )
+
+
+class UserSession:
+    """Pre-authenticated view of an ApiClient for one user"""
+
+    def __init__(self, client, token=None):
+        self.client = client
+        self._session = requests.Session()
+        # Share the client's pool instead of creating one per session
+        self._session.mount("http://", client.adapter)
+        self._session.mount("https://", client.adapter)
+        self.token = None
+        if token:
+            self.authenticate(token)
+
+    def authenticate(self, token):
+        """Attach a bearer token to every later request from this session"""
+        self.token = token
+        self._session.headers["Authorization"] = f"Bearer {token}"
+        return self
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.client.timeout)
+        started = time.perf_counter()
+        response = self._session.request(method, f"{self.client.base_url}{path}", **kwargs)
+        if self.client.recorder:
+            self.client.recorder(method, path, time.perf_counter() - started, response)
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+
+class ApiClient:
+    """Blocking client with one keep-alive pool shared by every user session
+
+    `recorder`, when given, is called as recorder(method, path, seconds,
+    response) after every request; the benchmark mode uses it to time routes.
+    """
+
+    def __init__(self, base_url, max_per_host=DEFAULT_MAX_PER_HOST, timeout=30, recorder=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.recorder = recorder
+        # pool_block keeps us at max_per_host sockets instead of opening
+        # throwaway overflow connections when every pooled one is busy
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_per_host, pool_block=True)
+
+    def session(self, token=None):
+        """Return a session for one user, authenticated when a token is given"""
+        return UserSession(self, token)
+
+    def connection_stats(self):
+        opened = reused = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            reused += max(pool.num_requests - pool.num_connections, 0)
+        return ConnectionStats(opened, reused)
+
+    def close(self):
+        self.adapter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncUserSession:
+    """Pre-authenticated view of an AsyncApiClient for one user"""
+
+    def __init__(self, client, token=None):
+        self.client = client
+        self.headers = {}
+        self.token = None
+        if token:
+            self.authenticate(token)
+
+    def authenticate(self, token):
+        self.token = token
+        self.headers = {"Authorization": f"Bearer {token}"}
+        return self
+
+    async def request(self, method, path, json=None, headers=None):
+        """Send a request and return (status, headers, body bytes)"""
+        merged = {**self.headers, **(headers or {})}
+        async with self.client.http.request(
+            method, f"{self.client.base_url}{path}", json=json, headers=merged
+        ) as response:
+            body = await response.read()
+            return response.status, response.headers, body
+
+
+class AsyncApiClient:
+    """aiohttp client with a bounded keep-alive pool shared by every user session
+
+    Use as an async context manager:
+
+        async with AsyncApiClient(base_url, limit=100) as client:
+            alice = client.session(token)
+            status, headers, body = await alice.request("GET", "/users/online")
+    """
+
+    def __init__(self, base_url, limit=100, max_per_host=None, timeout=30):
+        if aiohttp is None:
+            raise RuntimeError("The async client requires aiohttp: pip install aiohttp")
+        self.base_url = base_url.rstrip("/")
+        self.limit = limit
+        self.max_per_host = max_per_host or limit
+        self.timeout = timeout
+        self.stats = ConnectionStats()
+        self.http = None
+
+    def _trace_config(self):
+        trace = aiohttp.TraceConfig()
+
+        async def on_create(session, context, params):
+            self.stats.opened += 1
+
+        async def on_reuse(session, context, params):
+            self.stats.reused += 1
+
+        trace.on_connection_create_end.append(on_create)
+        trace.on_connection_reuseconn.append(on_reuse)
+        return trace
+
+    def session(self, token=None):
+        return AsyncUserSession(self, token)
+
+    def connection_stats(self):
+        return ConnectionStats(self.stats.opened, self.stats.reused)
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.max_per_host)
+        self.http = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[self._trace_config()],
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.http.close()
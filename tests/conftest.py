@@ -0,0 +1,18 @@
+"""Fixtures shared by the offline tests"""
+
+import pytest
+
+from tests.fake_api import FakeApiServer, FakeStore
+
+
+@pytest.fixture
+def fake_store():
+    """Store behind `fake_server`; a module overrides this for other options"""
+    return FakeStore()
+
+
+@pytest.fixture
+def fake_server(fake_store):
+    """The offline fake API, started on its own port for one test"""
+    with FakeApiServer(store=fake_store) as server:
+        yield server
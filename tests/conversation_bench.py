@@ -0,0 +1,114 @@
+"""
+Conversation growth benchmark for GET /api/messages/:userId.
+
+Grows one two-party conversation through a series of sizes and, at each
+size, times the newest-page fetch and an empty `since=` poll and records the
+response body size. With keyset pagination both should stay flat as the
+history grows to 100k messages.
+"""
+
+import uuid
+
+from tests.bench import LatencyHistogram
+from tests.client import ApiClient
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+
+
+def history_text(i):
+    # Fixed width so page size only changes if the page itself does
+    return f"history message {i:09d}"
+
+
+class GrowthRow:
+    """Measurements at one conversation size"""
+
+    def __init__(self, size, page_bytes, page, poll):
+        self.size = size
+        self.page_bytes = page_bytes
+        self.page = page
+        self.poll = poll
+
+    def line(self):
+        return (
+            f"{self.size:>9}{self.page_bytes:>10}"
+            f"{self.page.percentile(50) / 1000:>10.2f}{self.page.percentile(95) / 1000:>10.2f}"
+            f"{self.poll.percentile(50) / 1000:>10.2f}{self.poll.percentile(95) / 1000:>10.2f}"
+        )
+
+
+def is_flat(rows, tolerance=3.0):
+    """True when body size is constant and p50 latency grew less than `tolerance`x"""
+    first, last = rows[0], rows[-1]
+    if first.page_bytes != last.page_bytes:
+        return False
+    baseline = max(first.page.percentile(50), 1)
+    return last.page.percentile(50) <= baseline * tolerance
+
+
+class ConversationBenchmark:
+    """Measures conversation fetches while the history grows
+
+    `seeder(sender_id, recipient_id, count)` adds messages in bulk; by default
+    they are sent through POST /api/messages, which is slow for large sizes
+    against a live server. The offline mode passes a seeder that writes to
+    the fake store directly.
+    """
+
+    def __init__(self, base_url, sizes=DEFAULT_SIZES, samples=50, seeder=None, log=print):
+        self.base_url = base_url
+        self.sizes = sorted(sizes)
+        self.samples = samples
+        self.seeder = seeder
+        self.log = log
+
+    def _register(self, client, name, run_id):
+        response = client.session().post("/auth/register", json={
+            "name": name,
+            "email": f"{name.lower()}+convbench-{run_id}@example.com",
+            "password": "BenchPass123!",
+        })
+        response.raise_for_status()
+        result = response.json()
+        return result["user"]["id"], client.session(result["token"])
+
+    @staticmethod
+    def _api_seeder(session):
+        def seed(sender_id, recipient_id, count):
+            for i in range(count):
+                session.post("/messages", json={"recipientId": recipient_id, "content": history_text(i)})
+        return seed
+
+    def run(self):
+        rows = []
+        run_id = uuid.uuid4().hex[:8]
+        with ApiClient(self.base_url) as client:
+            alice_id, alice = self._register(client, "Alice", run_id)
+            bob_id, bob = self._register(client, "Bob", run_id)
+            seeder = self.seeder or self._api_seeder(alice)
+
+            current = 0
+            for size in self.sizes:
+                self.log(f"Growing conversation to {size} messages...")
+                seeder(alice_id, bob_id, size - current)
+                current = size
+
+                page, poll = LatencyHistogram(), LatencyHistogram()
+                page_bytes = 0
+                latest = None
+                for _ in range(self.samples):
+                    response = bob.get(f"/messages/{alice_id}")
+                    page.record_seconds(response.elapsed.total_seconds())
+                    page_bytes = len(response.content)
+                    latest = response.headers.get("X-Latest-Cursor")
+                for _ in range(self.samples):
+                    response = bob.get(f"/messages/{alice_id}", params={"since": latest})
+                    poll.record_seconds(response.elapsed.total_seconds())
+                rows.append(GrowthRow(size, page_bytes, page, poll))
+        return rows
+
+
+def report_lines(rows):
+    out = [f"{'messages':>9}{'bytes':>10}{'page p50':>10}{'page p95':>10}{'poll p50':>10}{'poll p95':>10}"]
+    out.extend(row.line() for row in rows)
+    return out
@@ -0,0 +1,302 @@
+"""
+Synthetic scale dataset: users, trips and message histories.
+
+Rows follow the tables in supabase-schema.sql and are produced by
+generators, so a 10M-message dataset is never held in memory at once.
+Activity is skewed the way real usage is: a few users own most trips and
+a few conversations hold most messages (Zipf-like weights over users and
+over conversation pairs). The same `seed` always yields the same dataset.
+
+Two bulk loaders consume the generators in batches:
+
+- `PostgresLoader` streams rows with COPY into existing tables (run the
+  migrations or supabase-schema.sql first); requires psycopg
+- `FakeStoreLoader` loads the offline stand-in (`tests.fake_api.FakeStore`)
+  a batch per lock acquisition; it keeps every row in memory, so stay
+  around 1M messages there
+"""
+
+import itertools
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+DESTINATIONS = (
+    "Lisbon, Portugal", "Kyoto, Japan", "Cusco, Peru", "Reykjavik, Iceland", "Cape Town, South Africa",
+    "Hanoi, Vietnam", "Oaxaca, Mexico", "Marrakech, Morocco", "Queenstown, New Zealand", "Tbilisi, Georgia",
+    "Split, Croatia", "Banff, Canada", "Seoul, South Korea", "Buenos Aires, Argentina", "Edinburgh, Scotland",
+)
+AIRLINES = ("TAP Air Portugal", "ANA", "LATAM", "Icelandair", "Delta", "KLM", "Qantas", "Air Canada")
+HOTELS = ("Casa do Rio", "Ryokan Sakura", "Hostel Inti", "Harbor Inn", "Old Town Suites", "Mountain Lodge")
+FIRST_NAMES = ("Alex", "Sam", "Jordan", "Taylor", "Morgan", "Riley", "Casey", "Avery", "Quinn", "Jamie")
+LAST_NAMES = ("Rivera", "Chen", "Okafor", "Novak", "Silva", "Haddad", "Kowalski", "Tanaka", "Murphy", "Ali")
+PHRASES = (
+    "Are we still on for the trip?", "Just booked the flights!", "Check out this hotel",
+    "What time do we land?", "I found a great restaurant near the old town", "Can you send the itinerary?",
+    "Weather looks good for the weekend", "Don't forget your passport", "Photos from today",
+    "Should we rent a car or take the train?",
+)
+
+USER_COLUMNS = ("id", "email", "password", "name", "bio", "last_seen", "is_online", "created_at")
+TRIP_COLUMNS = (
+    "id", "user_id", "title", "destination", "start_date", "end_date", "status", "visibility", "description",
+    "cover_photo", "trip_images", "weather", "overall_comment", "airlines", "accommodations", "segments",
+    "shared_with", "created_at", "updated_at",
+)
+MESSAGE_COLUMNS = ("id", "sender_id", "recipient_id", "conversation_key", "content", "read", "created_at")
+JSON_COLUMNS = {"airlines", "accommodations", "segments", "shared_with"}
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# Every generated account's password, where the loader can hash it
+DATASET_PASSWORD = "DatasetPass123!"
+
+
+def _iso(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def zipf_weights(count, exponent=1.1):
+    """Cumulative weights where item i is picked in proportion to 1/(i+1)^exponent"""
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+class DatasetSpec:
+    """Size and shape of a generated dataset"""
+
+    def __init__(self, users=10_000, trips=50_000, messages=1_000_000, conversations=None, seed=0,
+                 label="dataset", span_days=365):
+        self.users = users
+        self.trips = trips
+        self.messages = messages
+        # Distinct conversation pairs; messages spread over them by Zipf weight
+        self.conversations = conversations or max(users * 2, 1)
+        self.seed = seed
+        self.label = label
+        self.span = timedelta(days=span_days)
+
+
+class DatasetGenerator:
+    """Yields rows for one DatasetSpec; user ids are fixed by the seed"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.user_ids = [
+            str(uuid.UUID(int=random.Random(f"{spec.seed}:user:{i}").getrandbits(128), version=4))
+            for i in range(spec.users)
+        ]
+
+    def users(self):
+        rng = random.Random(f"{self.spec.seed}:users")
+        for i, user_id in enumerate(self.user_ids):
+            created = EPOCH + self.spec.span * (i / max(self.spec.users, 1))
+            yield {
+                "id": user_id,
+                "email": f"{self.spec.label}-{i}@example.com",
+                # Loaders swap in a real hash of DATASET_PASSWORD when they can
+                "password": "!",
+                "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "bio": "" if rng.random() < 0.6 else f"Traveler #{i}",
+                "last_seen": _iso(created + timedelta(days=rng.random() * 30)),
+                "is_online": False,
+                "created_at": _iso(created),
+            }
+
+    @staticmethod
+    def _segments(rng, start):
+        segments = []
+        for index in range(rng.choice((0, 1, 2, 3, 3, 4, 6))):
+            kind = rng.choice(("flight", "flight", "hotel", "transport"))
+            segment = {"id": f"seg-{index}", "type": kind, "date": (start + timedelta(days=index)).date().isoformat()}
+            if kind == "flight":
+                segment.update(airline=rng.choice(AIRLINES), flightNumber=f"{rng.choice('ABCDEFGH')}{rng.randint(100, 9999)}")
+            elif kind == "hotel":
+                segment.update(name=rng.choice(HOTELS))
+            else:
+                segment.update(details=rng.choice(("Train", "Ferry", "Rental car", "Bus")))
+            if rng.random() < 0.7:
+                segment["price"] = str(rng.randint(20, 1500))
+            segments.append(segment)
+        return segments
+
+    def trips(self):
+        rng = random.Random(f"{self.spec.seed}:trips")
+        owners = zipf_weights(self.spec.users)
+        for i in range(self.spec.trips):
+            owner = rng.choices(self.user_ids, cum_weights=owners)[0]
+            created = EPOCH + self.spec.span * (i / max(self.spec.trips, 1))
+            start = created + timedelta(days=rng.randint(-120, 240))
+            end = start + timedelta(days=rng.randint(1, 21))
+            shared = rng.sample(self.user_ids, k=min(rng.choice((0, 0, 0, 1, 2, 4)), len(self.user_ids)))
+            destination = rng.choice(DESTINATIONS)
+            yield {
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "user_id": owner,
+                "title": f"{destination.split(',')[0]} {start.year}",
+                "destination": destination,
+                "start_date": start.date().isoformat(),
+                "end_date": end.date().isoformat(),
+                "status": "taken" if end < EPOCH + self.spec.span else "future",
+                "visibility": "public" if rng.random() < 0.3 else "private",
+                "description": rng.choice(PHRASES),
+                "cover_photo": "",
+                "trip_images": "",
+                "weather": rng.choice(("", "Sunny", "Rainy", "Mild")),
+                "overall_comment": "",
+                "airlines": rng.sample(AIRLINES, k=rng.randint(0, 2)),
+                "accommodations": [f"https://example.com/stay/{rng.randint(1, 10 ** 6)}"
+                                   for _ in range(rng.randint(0, 2))],
+                "segments": self._segments(rng, start),
+                "shared_with": [user_id for user_id in shared if user_id != owner],
+                "created_at": _iso(created),
+                "updated_at": _iso(created),
+            }
+
+    def _pairs(self, rng):
+        # Conversation partners are skewed too: busy users talk more
+        weights = zipf_weights(self.spec.users)
+        pairs = []
+        while len(pairs) < self.spec.conversations:
+            a, b = rng.choices(self.user_ids, cum_weights=weights, k=2)
+            if a != b:
+                pairs.append((a, b))
+        return pairs
+
+    def messages(self):
+        """Messages oldest first; the newest 1% are unread"""
+        rng = random.Random(f"{self.spec.seed}:messages")
+        if self.spec.users < 2:
+            return
+        pairs = self._pairs(rng)
+        weights = zipf_weights(len(pairs))
+        step = self.spec.span / max(self.spec.messages, 1)
+        unread_from = int(self.spec.messages * 0.99)
+        for i in range(self.spec.messages):
+            a, b = rng.choices(pairs, cum_weights=weights)[0]
+            sender, recipient = (a, b) if rng.random() < 0.5 else (b, a)
+            yield {
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "sender_id": sender,
+                "recipient_id": recipient,
+                "conversation_key": f"{a}:{b}" if a < b else f"{b}:{a}",
+                "content": rng.choice(PHRASES),
+                "read": i < unread_from,
+                "created_at": _iso(EPOCH + step * i),
+            }
+
+
+def batched(rows, size):
+    """Lists of up to `size` rows from an iterator"""
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class LoadReport:
+    """Rows loaded and seconds taken, per table"""
+
+    def __init__(self):
+        self.tables = {}
+
+    def add(self, table, rows, seconds):
+        self.tables[table] = (rows, seconds)
+
+    def lines(self):
+        return [
+            f"{table:<10}{rows:>12} rows in {seconds:>7.1f}s ({rows / seconds if seconds else 0:>10.0f} rows/s)"
+            for table, (rows, seconds) in self.tables.items()
+        ]
+
+
+def load_dataset(generator, loader, log=print, batch_size=10_000):
+    """Stream every table of `generator` into `loader`; returns a LoadReport"""
+    report = LoadReport()
+    for table, rows in (("users", generator.users()), ("trips", generator.trips()),
+                        ("messages", generator.messages())):
+        started, count = time.perf_counter(), 0
+        for batch in batched(rows, batch_size):
+            loader.load(table, batch)
+            count += len(batch)
+            if count % (batch_size * 100) == 0:
+                log(f"Loaded {count} {table}")
+        loader.finish(table)
+        report.add(table, count, time.perf_counter() - started)
+    return report
+
+
+class PostgresLoader:
+    """COPY batches into existing tables; columns missing from a table are skipped
+
+    That keeps it working before and after the conversation_key migration.
+    Passwords are a bcrypt hash of DATASET_PASSWORD when the bcrypt package
+    is installed; otherwise "!", which no login matches.
+    """
+
+    def __init__(self, dsn):
+        import psycopg
+
+        self.conn = psycopg.connect(dsn, autocommit=True)
+        self.columns = {}
+        try:
+            import bcrypt
+        except ImportError:
+            self.password_hash = None
+        else:
+            # Hashed once: per-row bcrypt would dominate the load time
+            self.password_hash = bcrypt.hashpw(DATASET_PASSWORD.encode(), bcrypt.gensalt(10)).decode()
+
+    def _columns(self, table, wanted):
+        if table not in self.columns:
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT column_name FROM information_schema.columns WHERE table_name = %s "
+                    "AND table_schema = ANY(current_schemas(false))",
+                    (table,),
+                )
+                present = {name for (name,) in cursor.fetchall()}
+            self.columns[table] = [column for column in wanted if column in present]
+        return self.columns[table]
+
+    def load(self, table, rows):
+        wanted = {"users": USER_COLUMNS, "trips": TRIP_COLUMNS, "messages": MESSAGE_COLUMNS}[table]
+        columns = self._columns(table, wanted)
+        with self.conn.cursor() as cursor, \
+                cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                if table == "users" and self.password_hash:
+                    row["password"] = self.password_hash
+                copy.write_row([json.dumps(row[c]) if c in JSON_COLUMNS else row[c] for c in columns])
+
+    def finish(self, table):
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"ANALYZE {table}")
+
+    def close(self):
+        self.conn.close()
+
+
+class FakeStoreLoader:
+    """Loads generated rows into a FakeStore; accounts log in with DATASET_PASSWORD"""
+
+    def __init__(self, store):
+        from tests.fake_api import _hash_password
+
+        self.store = store
+        self.password_hash = _hash_password(DATASET_PASSWORD)
+
+    def load(self, table, rows):
+        if table == "users":
+            for row in rows:
+                row["password"] = self.password_hash
+        {"users": self.store.load_users, "trips": self.store.load_trips,
+         "messages": self.store.load_messages}[table](rows)
+
+    def finish(self, table):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,1644 @@
+"""
+Offline in-process stand-in for the Tucker Trips API.
+
+Implements the contract of `app/api/handlers/*` (auth, users, messages,
+trips) on top of indexed in-memory structures, so the backend suite and the
+load/benchmark modes can run without Next.js or Supabase:
+
+- HS256 JWTs with the same `{userId, email}` claims and 7 day expiry;
+  verified claims are cached by token hash, and with `auth_cache_debug`
+  (AUTH_CACHE_DEBUG=true in the API) `X-Auth-Cache` reports whether a
+  request hit that cache
+- users are online when `is_online` and seen in the last 5 minutes;
+  heartbeats (and logins) are buffered and written back in batches once
+  the buffer is full or 5s old, checked after every request, and the online list
+  is served from a snapshot rebuilt at most every few seconds, plus the
+  users who started heartbeating since it was built
+- conversations come back oldest first, a page at a time on (created_at,
+  id) keyset cursors, and fetching one marks the other party's messages read
+- GET /messages/unread answers from per-conversation summaries (latest
+  message) and the unread index, so its cost doesn't grow with history
+- GET /events streams new messages and presence changes as server-sent
+  events, one handler thread per open stream
+- GET /trips, /trips/public/all, /trips/:id and /users/online send weak
+  ETags built from updated_at / last_seen watermarks and answer a matching
+  If-None-Match with an empty 304
+- responses use the same camelCase shapes and status codes; the trip
+  routes take `?fields=` projections, and JSON bodies of 1KB and up are
+  gzipped when the client accepts it (the API also offers brotli, which the
+  standard library lacks)
+- Server-Timing ends with `loop`: Node's event-loop delay in the API, here
+  how late a ticking thread wakes while request threads hold the GIL
+
+Start it with `FakeApiServer().start()` (or as a context manager) and point
+the tester at `server.base_url`. Only the standard library is used.
+"""
+
+import base64
+import bisect
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ONLINE_WINDOW_SECONDS = 5 * 60
+MAX_MESSAGE_BATCH = 500
+# Mirrors app/api/lib/presence.js
+PRESENCE_FLUSH_SECONDS = 5
+PRESENCE_FLUSH_BATCH = 200
+ONLINE_SNAPSHOT_TTL_SECONDS = 5
+TOKEN_TTL_SECONDS = 7 * 24 * 60 * 60
+# Mirrors the verifyToken cache in app/api/lib/middleware.js
+TOKEN_CACHE_SIZE = 10000
+# Mirrors app/api/lib/feed.js
+FEED_CACHED_PAGES = 3
+FEED_CACHE_TTL_SECONDS = 10
+# Mirrors app/api/handlers/upload.js and lib/storage.js
+UPLOAD_CONCURRENCY = 4
+MAX_FILE_SIZES = {"trip-images": 10 * 1024 * 1024, "avatars": 2 * 1024 * 1024}
+ALLOWED_MIME_TYPES = {
+    "trip-images": ("image/jpeg", "image/jpg", "image/png", "image/webp", "image/gif"),
+    "avatars": ("image/jpeg", "image/jpg", "image/png", "image/webp"),
+}
+# Mirrors app/api/handlers/events.js
+EVENTS_KEEPALIVE_SECONDS = 25
+EVENTS_RETRY_MS = 3000
+EVENTS_HIGH_WATER_BYTES = 64 * 1024
+EVENTS_STALL_SECONDS = 30
+EVENTS_MAX_BACKLOG_BYTES = 1024 * 1024
+
+# Mirrors app/api/lib/passwords.js
+PASSWORD_POOL_SIZE = 4
+PASSWORD_MAX_QUEUED = PASSWORD_POOL_SIZE * 32
+PASSWORD_RETRY_AFTER_SECONDS = 1
+# message_preview() in the conversation unread counters migration
+MESSAGE_PREVIEW_LENGTH = 100
+# Same as COMPRESSION_THRESHOLD in app/api/lib/compression.js
+COMPRESSION_THRESHOLD = 1024
+# Mirrors eventLoopLag in app/api/lib/timing.js
+LOOP_RESOLUTION_SECONDS = 0.01
+LOOP_WINDOW_SECONDS = 5
+
+EMAIL_RE = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
+UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+ISO_TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}:?\d{2})$")
+
+
+class ApiError(Exception):
+    """Raised by store operations; becomes `{"error": message}` with `status`"""
+
+    def __init__(self, message, status=400, headers=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.headers = headers or {}
+
+
+# Server-Timing phases of the request this thread is serving, like the
+# per-request WeakMap in app/api/lib/timing.js
+_phases = threading.local()
+
+
+def record_phase(name, duration_ms, description=None):
+    """Add to a phase of the current request; entries with the same name and description add up"""
+    entries = getattr(_phases, "entries", None)
+    if entries is not None:
+        key = (name, description)
+        entries[key] = entries.get(key, 0.0) + duration_ms
+
+
+def server_timing_header():
+    entries = getattr(_phases, "entries", None) or {}
+    return ", ".join(
+        f"{name};dur={duration:.3f}" + (f';desc="{description}"' if description else "")
+        for (name, description), duration in entries.items()
+    )
+
+
+class LoopLag:
+    """Stand-in for the API's event-loop delay monitor
+
+    A daemon thread sleeps LOOP_RESOLUTION_SECONDS at a time and records how
+    late it wakes up; request threads hogging the interpreter make it late
+    the way blocking work delays Node's timers. Calling it returns the p99
+    lateness in ms of the last completed window, like eventLoopLag().
+    """
+
+    def __init__(self, resolution=LOOP_RESOLUTION_SECONDS, window=LOOP_WINDOW_SECONDS):
+        self.resolution = resolution
+        self.window = window
+        self.samples = []
+        self.lag_ms = 0.0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._tick, daemon=True)
+
+    def _tick(self):
+        window_started = time.perf_counter()
+        while not self.stopped.is_set():
+            started = time.perf_counter()
+            time.sleep(self.resolution)
+            woke = time.perf_counter()
+            with self.lock:
+                self.samples.append(max(woke - started - self.resolution, 0.0))
+                if woke - window_started >= self.window:
+                    ordered = sorted(self.samples)
+                    self.lag_ms = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+                    self.samples = []
+                    window_started = woke
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def __call__(self):
+        with self.lock:
+            return self.lag_ms
+
+
+def make_etag(*parts):
+    """Weak ETag from watermarks, like `makeETag` in app/api/lib/middleware.js"""
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, (list, tuple)):
+            part = ",".join(part)
+        digest.update(f"{'' if part is None else part}\0".encode())
+    return f'W/"{_b64url(digest.digest())[:22]}"'
+
+
+def not_modified(if_none_match, etag):
+    """Whether If-None-Match already names `etag` (weak comparison), like isNotModified"""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip() == "*" or tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def conditional(if_none_match, etag, build):
+    """(304, None, headers) when the client has `etag`, else (200, build(), headers)"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if not_modified(if_none_match, etag):
+        return 304, None, headers
+    return 200, build(), headers
+
+
+def iso_timestamp(seconds):
+    """Format epoch seconds the way `Date.prototype.toISOString` does"""
+    moment = datetime.fromtimestamp(seconds, tz=timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def _b64url(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64url_decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def sign_token(claims, secret):
+    """Encode an HS256 JWT"""
+    header = _b64url(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+    payload = _b64url(json.dumps(claims, separators=(",", ":")).encode())
+    signing_input = f"{header}.{payload}".encode("ascii")
+    signature = hmac.new(secret.encode(), signing_input, hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64url(signature)}"
+
+
+def verify_token(token, secret, now):
+    """Decode an HS256 JWT, returning its claims or None if invalid or expired"""
+    try:
+        header, payload, signature = token.split(".")
+        expected = hmac.new(secret.encode(), f"{header}.{payload}".encode("ascii"), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            return None
+        claims = json.loads(_b64url_decode(payload))
+    except (ValueError, TypeError):
+        return None
+    if claims.get("exp") is not None and claims["exp"] <= now:
+        return None
+    return claims
+
+
+def format_user(user):
+    return {"id": user["id"], "email": user["email"], "name": user["name"], "bio": user["bio"] or ""}
+
+
+def format_message(message):
+    return {
+        "id": message["id"],
+        "senderId": message["sender_id"],
+        "recipientId": message["recipient_id"],
+        "content": message["content"],
+        "read": message["read"],
+        "createdAt": message["created_at"],
+    }
+
+
+def format_trip(trip, user_name=None, fields=None):
+    """Mirror of `formatTrip` in app/api/lib/middleware.js; `fields` as from trip_fields()"""
+    if fields:
+        return {
+            field: (user_name or "Unknown User") if field == "userName" else trip[TRIP_COLUMNS[field]]
+            for field in fields
+        }
+    formatted = {
+        "id": trip["id"],
+        "userId": trip["user_id"],
+        "title": trip["title"],
+        "destination": trip["destination"],
+        "startDate": trip["start_date"],
+        "endDate": trip["end_date"],
+        "status": trip["status"],
+        "visibility": trip["visibility"],
+        "description": trip["description"],
+        "coverPhoto": trip["cover_photo"],
+        "tripImages": trip["trip_images"],
+        "weather": trip["weather"],
+        "overallComment": trip["overall_comment"],
+        "airlines": trip["airlines"],
+        "accommodations": trip["accommodations"],
+        "segments": trip["segments"],
+        "sharedWith": trip["shared_with"],
+        "createdAt": trip["created_at"],
+        "updatedAt": trip["updated_at"],
+    }
+    if user_name is not None:
+        formatted["userName"] = user_name
+    return formatted
+
+
+def encode_cursor(row):
+    """Same opaque cursor as `encodeCursor` in app/api/lib/middleware.js"""
+    return _b64url(f"{row['created_at']}|{row['id']}".encode())
+
+
+def decode_cursor(cursor):
+    """(created_at, id) of a cursor, None when missing; 400 unless it has the
+    UUID and ISO timestamp encode_cursor produces, like `decodeCursor`"""
+    if not cursor:
+        return None
+    try:
+        created_at, _, row_id = _b64url_decode(cursor).decode().rpartition("|")
+    except ValueError:
+        raise ApiError("Invalid cursor", 400)
+    if not (UUID_RE.match(row_id) and ISO_TIMESTAMP_RE.match(created_at)):
+        raise ApiError("Invalid cursor", 400)
+    return created_at, row_id
+
+
+def _row_key(row):
+    return row["created_at"], row["id"]
+
+
+def conversation_key(user_a, user_b):
+    """Order-independent key for the two participants of a conversation"""
+    return (user_a, user_b) if user_a <= user_b else (user_b, user_a)
+
+
+def _hash_password(password, salt=None, cost=0):
+    # Stand-in for bcrypt: PBKDF2 at 2^cost iterations, "cost$salt$digest".
+    # Cost 0 stays cheap enough for thousands of registrations
+    salt = salt or os.urandom(8).hex()
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), 2 ** cost).hex()
+    return f"{cost}${salt}${digest}"
+
+
+def _password_cost(hashed):
+    return int(hashed.partition("$")[0])
+
+
+def _check_password(password, hashed):
+    cost, salt, _ = hashed.split("$")
+    return hmac.compare_digest(_hash_password(password, salt, int(cost)), hashed)
+
+
+class PasswordPool:
+    """Bounded slots for password hashing, like app/api/lib/passwords.js
+
+    PBKDF2 releases the GIL, so hashes running here leave other requests'
+    threads free. Past `size` running plus `max_queued` waiting, callers get
+    a 503 with Retry-After instead of a place in the queue.
+    """
+
+    def __init__(self, size=PASSWORD_POOL_SIZE, max_queued=PASSWORD_MAX_QUEUED):
+        self.slots = threading.Semaphore(size)
+        self.limit = size + max_queued
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+
+    def run(self, fn, *args):
+        with self.lock:
+            if self.pending >= self.limit:
+                self.rejected += 1
+                raise ApiError("Server busy, retry shortly", 503,
+                               {"Retry-After": str(PASSWORD_RETRY_AFTER_SECONDS)})
+            self.pending += 1
+        try:
+            with self.slots:
+                return fn(*args)
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+
+# Trip request fields (camelCase) -> column names, as in handleUpdateTrip
+TRIP_FIELDS = {
+    "title": "title",
+    "destination": "destination",
+    "startDate": "start_date",
+    "endDate": "end_date",
+    "status": "status",
+    "visibility": "visibility",
+    "description": "description",
+    "coverPhoto": "cover_photo",
+    "tripImages": "trip_images",
+    "weather": "weather",
+    "overallComment": "overall_comment",
+    "airlines": "airlines",
+    "accommodations": "accommodations",
+    "segments": "segments",
+    "sharedWith": "shared_with",
+}
+
+
+# Trip response fields -> columns, for ?fields= as in getTripFields
+TRIP_COLUMNS = {"id": "id", "userId": "user_id", **TRIP_FIELDS, "createdAt": "created_at", "updatedAt": "updated_at"}
+
+
+def trip_fields(query):
+    """Requested trip fields from ?fields=, or None for all of them, like getTripFields"""
+    param = query.get("fields", [None])[0]
+    if not param:
+        return None
+    fields = list(dict.fromkeys(field.strip() for field in param.split(",") if field.strip()))
+    unknown = [field for field in fields if field not in TRIP_COLUMNS and field != "userName"]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}", 400)
+    return fields
+
+
+def _require(condition):
+    if not condition:
+        raise ApiError("Validation failed", 400)
+
+
+def _validate_trip(body):
+    """The checks handleCreateTrip makes: title, destination and startDate are required"""
+    _require(isinstance(body, dict))
+    if not (body.get("title") and body.get("destination") and body.get("startDate")):
+        raise ApiError("Title, destination, and start date are required", 400)
+
+
+def encode_event(event, data):
+    """One server-sent event, as written to the stream; events carry no SSE id"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class EventStream:
+    """One open /events stream: encoded events not yet written to the client
+
+    `backlog` is the bytes queued, like the ReadableStream queue behind
+    controller.desiredSize in app/api/handlers/events.js.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.backlog = 0
+        self.stalled_since = None
+        self.closed = False
+
+    def offer(self, chunk, stall_seconds):
+        """Queue `chunk`; False once the client has stopped reading and should be dropped"""
+        now = time.monotonic()
+        with self.lock:
+            if self.backlog >= EVENTS_HIGH_WATER_BYTES:
+                if self.stalled_since is None:
+                    self.stalled_since = now
+                if now - self.stalled_since >= stall_seconds or self.backlog >= EVENTS_MAX_BACKLOG_BYTES:
+                    return False
+            else:
+                self.stalled_since = None
+            self.backlog += len(chunk)
+        self.queue.put(chunk)
+        return True
+
+    def put(self, chunk):
+        self.queue.put(chunk)
+
+    def close(self):
+        """End the stream without writing what is still queued, like controller.error()"""
+        self.closed = True
+        self.queue.put(None)
+
+    def get(self, timeout=None):
+        if self.closed:
+            return None
+        chunk = self.queue.get(timeout=timeout)
+        if chunk:
+            with self.lock:
+                self.backlog -= len(chunk)
+        return chunk
+
+
+class EventHub:
+    """Open /events streams by user, like app/api/lib/events.js
+
+    Each stream is an EventStream drained by its handler thread; None from a
+    stream tells it to end. A stream whose client stays past the high-water
+    mark for `stall_seconds` is ended and unsubscribed.
+    """
+
+    def __init__(self, stall_seconds=EVENTS_STALL_SECONDS):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.stall_seconds = stall_seconds
+        self.dropped = 0
+
+    def subscribe(self, user_id):
+        events = EventStream()
+        with self.lock:
+            self.subscribers.setdefault(user_id, set()).add(events)
+        return events
+
+    def unsubscribe(self, user_id, events):
+        with self.lock:
+            streams = self.subscribers.get(user_id)
+            if streams:
+                streams.discard(events)
+                if not streams:
+                    del self.subscribers[user_id]
+
+    def _offer(self, user_id, events, chunk):
+        if not events.offer(chunk, self.stall_seconds):
+            self.unsubscribe(user_id, events)
+            with self.lock:
+                self.dropped += 1
+            events.close()
+
+    def _deliver(self, user_id, chunk):
+        with self.lock:
+            streams = list(self.subscribers.get(user_id, ()))
+        for events in streams:
+            self._offer(user_id, events, chunk)
+
+    def publish_message(self, message, cursor):
+        chunk = encode_event("message", {**message, "cursor": cursor})
+        self._deliver(message["recipientId"], chunk)
+        if message["senderId"] != message["recipientId"]:
+            self._deliver(message["senderId"], chunk)
+
+    def publish_presence(self, presence):
+        chunk = encode_event("presence", presence)
+        with self.lock:
+            targets = [(user_id, events) for user_id, streams in self.subscribers.items()
+                       if user_id != presence["userId"] for events in streams]
+        for user_id, events in targets:
+            self._offer(user_id, events, chunk)
+
+    def count(self):
+        with self.lock:
+            return sum(len(streams) for streams in self.subscribers.values())
+
+    def close(self):
+        with self.lock:
+            streams = [events for streams in self.subscribers.values() for events in streams]
+        for events in streams:
+            events.put(None)
+
+
+class UploadedFile:
+    """One file part of a multipart/form-data body"""
+
+    def __init__(self, name, content_type, data):
+        self.name = name
+        self.type = content_type
+        self.data = data
+
+    @property
+    def size(self):
+        return len(self.data)
+
+
+def parse_multipart(content_type, raw):
+    """{"fields": {name: value}, "files": {name: [UploadedFile]}} from a form body
+
+    A minimal parser: it slices the parts out of the body with find(), which
+    keeps big uploads to one copy of each file.
+    """
+    boundary = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not boundary:
+        raise ValueError("multipart body without a boundary")
+    delimiter = b"\r\n--" + boundary.group(1).encode()
+    fields, files = {}, {}
+    body = memoryview(raw)
+    start = raw.find(delimiter[2:])
+    while start != -1:
+        start += len(delimiter) - 2
+        if raw[start:start + 2] == b"--":
+            break
+        headers_end = raw.find(b"\r\n\r\n", start)
+        end = raw.find(delimiter, headers_end)
+        if headers_end == -1 or end == -1:
+            raise ValueError("truncated multipart body")
+        headers = raw[start:headers_end].decode("latin-1")
+        disposition = re.search(r'name="([^"]*)"(?:; filename="([^"]*)")?', headers)
+        part_type = re.search(r"(?im)^content-type:\s*([^\r\n;]+)", headers)
+        data = bytes(body[headers_end + 4:end])
+        if not disposition:
+            raise ValueError("multipart part without a name")
+        name, filename = disposition.groups()
+        if filename is None:
+            fields[name] = data.decode()
+        else:
+            content = part_type.group(1).strip() if part_type else "application/octet-stream"
+            files.setdefault(name, []).append(UploadedFile(filename, content, data))
+        start = end + 2
+    return {"fields": fields, "files": files}
+
+
+class FakeStorage:
+    """Local stand-in for Supabase Storage
+
+    Each upload sleeps `latency` seconds like a storage round trip and keeps
+    only the object's size. `peak_in_flight` is the most uploads that were
+    ever under way at once.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.objects = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def upload(self, bucket, path, data):
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        with self.lock:
+            self.objects[(bucket, path)] = len(data)
+        return {
+            "path": path,
+            "fullPath": f"{bucket}/{path}",
+            "publicUrl": f"http://storage.local/{bucket}/{path}",
+        }
+
+
+class FakeStore:
+    """Users, trips and messages held in indexed in-memory structures
+
+    Indexes:
+      users_by_email   email -> user row
+      presence         user id -> stored last_seen epoch, kept in last_seen
+                       order like an index, so the online query stops at the
+                       first stale entry
+      heartbeats       user id -> latest heartbeat held in memory
+      pending          heartbeats not yet written back to the user rows
+      conversations    (user, user) -> messages oldest first
+      unread           (recipient, sender) -> unread message rows
+      summaries        user id -> {other user id: latest message}, like
+                       the conversation_summaries table
+      trips_by_user    user id -> {trip id: row} in creation order
+      public_feed      (created_at, id) of public trips, ascending, so a feed
+                       page is a bisect plus a slice at any depth
+      shared_feeds     user id -> (created_at, id) of trips shared with them
+    """
+
+    def __init__(self, secret="offline-test-secret", clock=time.time, db_latency=0.0, storage_latency=0.0,
+                 password_cost=0, auth_cache_debug=False):
+        self.secret = secret
+        self.clock = clock
+        # Simulated cost of one database round trip on the message routes
+        self.db_latency = db_latency
+        # Work factor for new password hashes, like BCRYPT_COST
+        self.password_cost = password_cost
+        # Send X-Auth-Cache, like AUTH_CACHE_DEBUG=true
+        self.auth_cache_debug = auth_cache_debug
+        self.passwords = PasswordPool()
+        self.lock = threading.RLock()
+        self.events = EventHub()
+        self.storage = FakeStorage(storage_latency)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.users = {}
+            self.users_by_email = {}
+            self.presence = {}
+            self.heartbeats = {}
+            self.pending = {}
+            self.last_flush = self.clock()
+            self.snapshot = None
+            self.snapshot_built = None
+            self.snapshot_ids = set()
+            # Users heartbeating since the snapshot was built who aren't in it
+            self.arrivals = {}
+            # Counters for the presence stress test
+            self.presence_writes = 0
+            self.snapshot_builds = 0
+            self.db_round_trips = 0
+            # sha256(token) -> claims, least recently used first
+            self.token_cache = OrderedDict()
+            self.token_cache_hits = 0
+            self.token_cache_misses = 0
+            # Hashes upgraded to password_cost at login
+            self.password_rehashes = 0
+            # CPU spent handling requests, summed over handler threads
+            self.requests_served = 0
+            self.request_cpu_seconds = 0.0
+            self.messages = {}
+            self.conversations = {}
+            self.unread = {}
+            self.summaries = {}
+            self.last_message_ms = 0
+            self.trips = {}
+            self.trips_by_user = {}
+            self.public_feed = []
+            self.shared_feeds = {}
+            # First feed pages, like the page cache in app/api/lib/feed.js
+            self.feed_cache = {}
+
+    def now_iso(self):
+        return iso_timestamp(self.clock())
+
+    # ============ AUTH ============
+
+    def issue_token(self, user):
+        issued = int(self.clock())
+        claims = {"userId": user["id"], "email": user["email"], "iat": issued, "exp": issued + TOKEN_TTL_SECONDS}
+        return sign_token(claims, self.secret)
+
+    def _verify_cached(self, token):
+        """Claims for a token and whether they came from the cache"""
+        key = hashlib.sha256(token.encode()).hexdigest()
+        now = self.clock()
+        with self.lock:
+            claims = self.token_cache.get(key)
+            if claims is not None and claims.get("exp", now + 1) > now:
+                self.token_cache.move_to_end(key)
+                self.token_cache_hits += 1
+                return claims, True
+            self.token_cache.pop(key, None)
+            self.token_cache_misses += 1
+
+        claims = verify_token(token, self.secret, now)
+        if claims:
+            with self.lock:
+                self.token_cache[key] = claims
+                if len(self.token_cache) > TOKEN_CACHE_SIZE:
+                    self.token_cache.popitem(last=False)
+        return claims, False
+
+    def authenticate(self, authorization, request=None):
+        """Return the user id for an Authorization header value, or raise 401
+
+        When `request` is given its `auth_cache` is set to "hit" or "miss".
+        """
+        if not authorization:
+            raise ApiError("Unauthorized", 401)
+        claims, hit = self._verify_cached(authorization.replace("Bearer ", "", 1))
+        if request is not None:
+            request.auth_cache = "hit" if hit else "miss"
+        if not claims or "userId" not in claims:
+            raise ApiError("Unauthorized", 401)
+        return claims["userId"]
+
+    def record_request_cpu(self, seconds):
+        with self.lock:
+            self.requests_served += 1
+            self.request_cpu_seconds += seconds
+
+    def register(self, body):
+        _require(isinstance(body, dict))
+        email, password, name = body.get("email"), body.get("password"), body.get("name")
+        _require(isinstance(email, str) and EMAIL_RE.match(email))
+        _require(isinstance(password, str) and len(password) >= 6)
+        _require(isinstance(name, str) and name)
+
+        user = self.create_user(name, email, password)
+        return 201, {"user": format_user(user), "token": self.issue_token(user)}
+
+    def create_user(self, name, email, password):
+        """Insert a user row; register's body, also used to seed stress tests"""
+        with self.lock:
+            if email in self.users_by_email:
+                raise ApiError("User already exists", 409)
+        hashed = self.passwords.run(_hash_password, password, None, self.password_cost)
+        with self.lock:
+            # Again: a concurrent registration may have won while we hashed
+            if email in self.users_by_email:
+                raise ApiError("User already exists", 409)
+            now = self.now_iso()
+            user = {
+                "id": str(uuid.uuid4()),
+                "email": email,
+                "password": hashed,
+                "name": name,
+                "bio": "",
+                "last_seen": now,
+                "is_online": False,
+                "created_at": now,
+            }
+            self.users[user["id"]] = user
+            self.users_by_email[email] = user
+            self.trips_by_user[user["id"]] = {}
+        return user
+
+    def load_users(self, rows):
+        """Bulk insert generated user rows (tests/dataset.py)"""
+        with self.lock:
+            for user in rows:
+                self.users[user["id"]] = user
+                self.users_by_email[user["email"]] = user
+                self.trips_by_user.setdefault(user["id"], {})
+
+    def load_trips(self, rows):
+        """Bulk insert generated trip rows, oldest first"""
+        with self.lock:
+            for trip in rows:
+                self.trips[trip["id"]] = trip
+                self.trips_by_user.setdefault(trip["user_id"], {})[trip["id"]] = trip
+                self._index_trip(trip)
+
+    def load_messages(self, rows):
+        """Bulk insert generated message rows, oldest first"""
+        with self.lock:
+            for message in rows:
+                self.messages[message["id"]] = message
+                self.conversations.setdefault(
+                    conversation_key(message["sender_id"], message["recipient_id"]), []
+                ).append(message)
+                if not message["read"]:
+                    self.unread.setdefault((message["recipient_id"], message["sender_id"]), []).append(message)
+                self._summarize(message)
+
+    def login(self, body):
+        _require(isinstance(body, dict))
+        email, password = body.get("email"), body.get("password")
+        _require(isinstance(email, str) and EMAIL_RE.match(email))
+        _require(isinstance(password, str) and password)
+
+        user = self.users_by_email.get(email)
+        # Checked on the password pool, outside the store lock
+        if not user or not self.passwords.run(_check_password, password, user["password"]):
+            raise ApiError("Invalid credentials", 401)
+
+        rehashed = None
+        if _password_cost(user["password"]) != self.password_cost:
+            try:
+                rehashed = self.passwords.run(_hash_password, password, None, self.password_cost)
+            except ApiError:
+                pass  # best effort, as in handleLogin
+        with self.lock:
+            if rehashed:
+                user["password"] = rehashed
+                self.password_rehashes += 1
+        # Logging in counts as a heartbeat, as in handleLogin
+        self.heartbeat(user["id"])
+        return 200, {"user": format_user(user), "token": self.issue_token(user)}
+
+    def me(self, user_id):
+        user = self.users.get(user_id)
+        if not user:
+            raise ApiError("User not found", 404)
+        return 200, {"user": format_user(user)}
+
+    # ============ USERS ============
+
+    def _write_last_seen(self, user, seen):
+        user["last_seen"] = iso_timestamp(seen)
+        user["is_online"] = True
+        self.presence.pop(user["id"], None)
+        self.presence[user["id"]] = seen
+
+    def update_profile(self, user_id, body):
+        _require(isinstance(body, dict))
+        name, bio = body.get("name"), body.get("bio")
+        _require(name is None or (isinstance(name, str) and name))
+        _require(bio is None or (isinstance(bio, str) and len(bio) <= 500))
+
+        with self.lock:
+            user = self.users.get(user_id)
+            if not user:
+                raise ApiError("User not found", 404)
+            if name:
+                user["name"] = name
+            if bio is not None:
+                user["bio"] = bio
+        return 200, {"user": format_user(user)}
+
+    def _flush_presence(self):
+        """Write buffered heartbeats back, one UPDATE per PRESENCE_FLUSH_BATCH users"""
+        pending = list(self.pending.items())
+        self.pending.clear()
+        self.last_flush = self.clock()
+        for start in range(0, len(pending), PRESENCE_FLUSH_BATCH):
+            self.presence_writes += 1
+            for user_id, seen in pending[start:start + PRESENCE_FLUSH_BATCH]:
+                user = self.users.get(user_id)
+                if user:
+                    self._write_last_seen(user, seen)
+
+    def heartbeat(self, user_id):
+        with self.lock:
+            if user_id in self.users:
+                now = self.clock()
+                was_online = self.heartbeats.get(user_id, float("-inf")) >= now - ONLINE_WINDOW_SECONDS
+                if not was_online:
+                    self.events.publish_presence({"userId": user_id, "online": True, "lastSeen": iso_timestamp(now)})
+                self.pending[user_id] = now
+                self.heartbeats[user_id] = now
+                # Someone new came online; listed from memory until the next rebuild
+                if user_id not in self.snapshot_ids:
+                    self.arrivals[user_id] = None
+                self._flush_presence_if_due()
+        return 200, {"success": True}
+
+    def _flush_presence_if_due(self):
+        if self.pending and (
+            len(self.pending) >= PRESENCE_FLUSH_BATCH or self.clock() - self.last_flush >= PRESENCE_FLUSH_SECONDS
+        ):
+            self._flush_presence()
+
+    def flush_presence_if_due(self):
+        """Run after every request, like flushPresenceIfDue in the route; there is no flush timer"""
+        with self.lock:
+            self._flush_presence_if_due()
+
+    def _rebuild_snapshot(self):
+        self._flush_presence()
+        self.snapshot_builds += 1
+        cutoff = self.clock() - ONLINE_WINDOW_SECONDS
+        snapshot = []
+        # presence is ordered by last_seen, newest last
+        for user_id, seen in reversed(self.presence.items()):
+            if seen < cutoff:
+                break
+            user = self.users[user_id]
+            if user["is_online"]:
+                snapshot.append((user, seen))
+        self.snapshot = snapshot
+        self.snapshot_ids = {user["id"] for user, _ in snapshot}
+        self.snapshot_built = self.clock()
+        self.arrivals = {user_id: None for user_id in self.arrivals if user_id not in self.snapshot_ids}
+
+    def online_users(self, user_id, if_none_match=None):
+        with self.lock:
+            now = self.clock()
+            if self.snapshot_built is None or now - self.snapshot_built >= ONLINE_SNAPSHOT_TTL_SECONDS:
+                self._rebuild_snapshot()
+            cutoff = now - ONLINE_WINDOW_SECONDS
+            online = []
+            arrivals = [(self.users[other_id], self.heartbeats[other_id]) for other_id in self.arrivals
+                        if other_id not in self.snapshot_ids]
+            for user, seen in self.snapshot + arrivals:
+                if user["id"] == user_id:
+                    continue
+                # A newer in-memory heartbeat wins over the snapshot's last_seen
+                seen = max(seen, self.heartbeats.get(user["id"], 0))
+                if seen < cutoff:
+                    continue
+                online.append({
+                    "id": user["id"],
+                    "name": user["name"],
+                    "email": user["email"],
+                    "bio": user["bio"],
+                    "last_seen": iso_timestamp(seen),
+                })
+        etag = make_etag("online", *(
+            part for user in online for part in (user["id"], user["last_seen"], user["name"], user["bio"])
+        ))
+        return conditional(if_none_match, etag, lambda: online)
+
+    # ============ MESSAGES ============
+
+    def _message_timestamp(self):
+        # Strictly increasing so (created_at, id) order is also send order
+        now_ms = max(int(self.clock() * 1000), self.last_message_ms + 1)
+        self.last_message_ms = now_ms
+        return iso_timestamp(now_ms / 1000)
+
+    def insert_message(self, sender_id, recipient_id, content):
+        """Store a message row and index it; also used to seed large histories"""
+        with self.lock:
+            message = {
+                "id": str(uuid.uuid4()),
+                "sender_id": sender_id,
+                "recipient_id": recipient_id,
+                "content": content,
+                "read": False,
+                "created_at": self._message_timestamp(),
+            }
+            self.messages[message["id"]] = message
+            self.conversations.setdefault(conversation_key(sender_id, recipient_id), []).append(message)
+            self.unread.setdefault((recipient_id, sender_id), []).append(message)
+            self._summarize(message)
+        return message
+
+    def _summarize(self, message):
+        """Make `message` the latest of its conversation for both sides, like the insert trigger"""
+        sender_id, recipient_id = message["sender_id"], message["recipient_id"]
+        for user_id, other_id in ((recipient_id, sender_id), (sender_id, recipient_id)):
+            conversations = self.summaries.setdefault(user_id, {})
+            latest = conversations.get(other_id)
+            if latest is None or _row_key(message) >= _row_key(latest):
+                conversations[other_id] = message
+
+    def _round_trip(self, label=None):
+        started = time.perf_counter()
+        with self.lock:
+            self.db_round_trips += 1
+        if self.db_latency:
+            time.sleep(self.db_latency)
+        record_phase("db", (time.perf_counter() - started) * 1000, label)
+
+    @staticmethod
+    def _valid_message(body):
+        return (
+            isinstance(body, dict)
+            and isinstance(body.get("recipientId"), str) and bool(UUID_RE.match(body["recipientId"]))
+            and isinstance(body.get("content"), str) and 1 <= len(body["content"]) <= 1000
+        )
+
+    def send_message(self, user_id, body):
+        if not (isinstance(body, dict) and body.get("recipientId") and body.get("content")):
+            raise ApiError("Recipient and content are required", 400)
+        _require(self._valid_message(body))
+        self._round_trip("messages.insert")
+        message = self.insert_message(user_id, body["recipientId"], body["content"])
+        formatted = format_message(message)
+        self.events.publish_message(formatted, encode_cursor(message))
+        return 200, formatted
+
+    def send_message_batch(self, user_id, body):
+        _require(isinstance(body, dict))
+        messages = body.get("messages")
+        _require(isinstance(messages, list) and 1 <= len(messages) <= MAX_MESSAGE_BATCH)
+
+        results = [None] * len(messages)
+        valid = []
+        for index, item in enumerate(messages):
+            if self._valid_message(item):
+                valid.append((index, item))
+            else:
+                results[index] = {"index": index, "ok": False, "error": "Validation failed"}
+
+        # Recipient lookup, then one insert for the whole batch
+        self._round_trip("users.select")
+        self._round_trip("messages.insert")
+        sent = 0
+        with self.lock:
+            for index, item in valid:
+                if item["recipientId"] not in self.users:
+                    results[index] = {"index": index, "ok": False, "error": "Recipient not found"}
+                    continue
+                message = self.insert_message(user_id, item["recipientId"], item["content"])
+                results[index] = {"index": index, "ok": True, "message": format_message(message)}
+                self.events.publish_message(results[index]["message"], encode_cursor(message))
+                sent += 1
+        return 200, {"results": results, "sent": sent, "failed": len(messages) - sent}
+
+    def _mark_read(self, user_id, other_user_id, newest):
+        unread = self.unread.get((user_id, other_user_id))
+        if not unread:
+            return
+        cutoff = bisect.bisect_right(unread, newest["created_at"], key=lambda m: m["created_at"])
+        for message in unread[:cutoff]:
+            message["read"] = True
+        del unread[:cutoff]
+
+    def get_conversation(self, user_id, other_user_id, query=None):
+        query = query or {}
+        limit = _limit_param(query, 50)
+        before = decode_cursor(query.get("before", [None])[0])
+        since = decode_cursor(query.get("since", [None])[0])
+
+        # Page and read marking are one call, like get_conversation_page
+        self._round_trip("get_conversation_page")
+        with self.lock:
+            history = self.conversations.get(conversation_key(user_id, other_user_id), [])
+            if since:
+                start = bisect.bisect_right(history, since, key=_row_key)
+                rows = history[start:start + limit + 1]
+            else:
+                end = bisect.bisect_left(history, before, key=_row_key) if before else len(history)
+                rows = history[max(end - limit - 1, 0):end]
+            has_more = len(rows) > limit
+            page = rows[:limit] if since else rows[-limit:]
+            formatted = [format_message(message) for message in page]
+            if page:
+                # Mark messages as read after selecting them
+                self._mark_read(user_id, other_user_id, page[-1])
+
+        headers = {"X-Has-More": "true" if has_more else "false"}
+        if page:
+            headers["X-Latest-Cursor"] = encode_cursor(page[-1])
+        elif since:
+            headers["X-Latest-Cursor"] = query["since"][0]
+        if not since and has_more:
+            headers["X-Next-Cursor"] = encode_cursor(page[0])
+        return 200, formatted, headers
+
+    def unread_summary(self, user_id, query):
+        """Unread count and latest message per conversation, newest first, like handleGetUnreadSummary"""
+        page, limit = self._page_params(query, 50)
+        offset = (page - 1) * limit
+        # The page and the unread total are two queries sent together
+        self._round_trip("conversation_summaries.select")
+        with self.lock:
+            conversations = self.summaries.get(user_id, {})
+            ordered = sorted(conversations.items())
+            ordered.sort(key=lambda item: item[1]["created_at"], reverse=True)
+            rows = ordered[offset:offset + limit + 1]
+            total_unread = sum(len(self.unread.get((user_id, other_id), ())) for other_id in conversations)
+            summary = [
+                {
+                    "userId": other_id,
+                    "userName": self.users[other_id]["name"] if other_id in self.users else "Unknown User",
+                    "unreadCount": len(self.unread.get((user_id, other_id), ())),
+                    "lastMessage": {
+                        "id": latest["id"],
+                        "senderId": latest["sender_id"],
+                        "preview": latest["content"][:MESSAGE_PREVIEW_LENGTH],
+                        "createdAt": latest["created_at"],
+                    },
+                }
+                for other_id, latest in rows[:limit]
+            ]
+        return 200, {
+            "conversations": summary,
+            "totalUnread": total_unread,
+            "pagination": {"page": page, "limit": limit, "hasMore": len(rows) > limit},
+        }
+
+    # ============ TRIPS ============
+
+    def _owned_trip(self, user_id, trip_id):
+        trip = self.trips_by_user.get(user_id, {}).get(trip_id)
+        if not trip:
+            raise ApiError("Trip not found", 404)
+        return trip
+
+    @staticmethod
+    def _feed_remove(feed, key):
+        index = bisect.bisect_left(feed, key)
+        if index < len(feed) and feed[index] == key:
+            del feed[index]
+
+    def _index_trip(self, trip):
+        key = _row_key(trip)
+        if trip["visibility"] == "public":
+            bisect.insort(self.public_feed, key)
+        for other_id in trip["shared_with"]:
+            bisect.insort(self.shared_feeds.setdefault(other_id, []), key)
+        self.feed_cache.clear()
+
+    def _unindex_trip(self, trip):
+        key = _row_key(trip)
+        if trip["visibility"] == "public":
+            self._feed_remove(self.public_feed, key)
+        for other_id in trip["shared_with"]:
+            self._feed_remove(self.shared_feeds.get(other_id, []), key)
+        self.feed_cache.clear()
+
+    def _user_name(self, trip):
+        user = self.users.get(trip["user_id"])
+        return user["name"] if user else "Unknown User"
+
+    @staticmethod
+    def _page_params(query, default_limit):
+        """(page, limit) clamped like getPaginationParams"""
+        page = _int_param(query, "page", 1)
+        limit = _int_param(query, "limit", default_limit)
+        return (page if page >= 1 else 1), (default_limit if limit < 1 else min(limit, 100))
+
+    def _page(self, rows, query, default_limit, with_user_name):
+        """Newest-first page of an insertion-ordered dict, like getPaginationParams"""
+        page, limit = self._page_params(query, default_limit)
+        offset = (page - 1) * limit
+        total = len(rows)
+        selected = list(reversed(rows.values()))[offset:offset + limit]
+        fields = trip_fields(query)
+        if fields and not with_user_name and "userName" in fields:
+            fields.remove("userName")  # own trips drop userName, as the handler does
+        trips = [
+            format_trip(trip, self._user_name(trip) if with_user_name else None, fields)
+            for trip in selected
+        ]
+        return {
+            "trips": trips,
+            "pagination": {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "totalPages": -(-total // limit),
+                "hasMore": offset + limit < total,
+            },
+        }
+
+    def _feed_page(self, kind, cache_key, feed, query):
+        """(payload, etag) for a newest-first page of a feed, by ?cursor= keyset or ?page= offset like getTripFeed"""
+        page = max(_int_param(query, "page", 1), 1)
+        limit = _int_param(query, "limit", 12)
+        limit = 12 if limit < 1 else min(limit, 100)
+        after = decode_cursor(query.get("cursor", [None])[0])
+        fields = trip_fields(query)
+
+        if not after and page <= FEED_CACHED_PAGES:
+            cache_key = (cache_key, page, limit, tuple(fields or ()))
+            cached = self.feed_cache.get(cache_key)
+            if cached and cached[0] > self.clock():
+                return cached[1]
+        else:
+            cache_key = None
+
+        end = bisect.bisect_left(feed, after) if after else len(feed) - (page - 1) * limit
+        keys = feed[max(end - limit - 1, 0):max(end, 0)][::-1]
+        has_more = len(keys) > limit
+        rows = [self.trips[trip_id] for _, trip_id in keys[:limit]]
+        total = len(feed)
+        payload = {
+            "trips": [format_trip(trip, self._user_name(trip), fields) for trip in rows],
+            "pagination": {
+                "page": None if after else page,
+                "limit": limit,
+                "total": total,
+                "totalPages": -(-total // limit),
+                "hasMore": has_more,
+                "nextCursor": encode_cursor(rows[-1]) if has_more else None,
+            },
+        }
+        pagination = payload["pagination"]
+        etag = make_etag(
+            kind, pagination["page"], limit, total, pagination["nextCursor"], fields,
+            *(f"{trip['id']}@{trip['updated_at']}" for trip in rows),
+        )
+        if cache_key:
+            self.feed_cache[cache_key] = (self.clock() + FEED_CACHE_TTL_SECONDS, (payload, etag))
+        return payload, etag
+
+    def insert_trip(self, user_id, trip):
+        """Store a trip row and add it to the feeds it belongs to"""
+        with self.lock:
+            self.trips[trip["id"]] = trip
+            self.trips_by_user.setdefault(user_id, {})[trip["id"]] = trip
+            self._index_trip(trip)
+        return trip
+
+    def create_trip(self, user_id, body):
+        _validate_trip(body)
+        now = self.now_iso()
+        trip = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "title": body["title"],
+            "destination": body["destination"],
+            "start_date": body["startDate"],
+            "end_date": body.get("endDate") or body["startDate"],
+            "status": body.get("status") or "future",
+            "visibility": body.get("visibility") or "private",
+            "description": body.get("description") or "",
+            "cover_photo": body.get("coverPhoto") or "",
+            "trip_images": body.get("tripImages") or "",
+            "weather": body.get("weather") or "",
+            "overall_comment": body.get("overallComment") or "",
+            "airlines": body.get("airlines") or [],
+            "accommodations": body.get("accommodations") or [],
+            "segments": body.get("segments") or [],
+            # Sharing only happens through POST /trips/:id/share
+            "shared_with": [],
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.insert_trip(user_id, trip)
+        return 200, format_trip(trip)
+
+    def user_trips(self, user_id, query, if_none_match=None):
+        page, limit = self._page_params(query, 10)
+        fields = trip_fields(query)
+        # The count and newest updated_at come from one query, as in handleGetUserTrips
+        self._round_trip("trips.count")
+        with self.lock:
+            rows = self.trips_by_user.get(user_id, {})
+            newest = max((trip["updated_at"] for trip in rows.values()), default=None)
+            etag = make_etag("trips", user_id, len(rows), newest, page, limit, fields)
+
+        def build():
+            self._round_trip("trips.select")
+            with self.lock:
+                return self._page(self.trips_by_user.get(user_id, {}), query, 10, False)
+
+        return conditional(if_none_match, etag, build)
+
+    def public_trip_feed(self, query, if_none_match=None):
+        with self.lock:
+            payload, etag = self._feed_page("public", "public", self.public_feed, query)
+        return conditional(if_none_match, etag, lambda: payload)
+
+    def shared_trip_feed(self, user_id, query, if_none_match=None):
+        with self.lock:
+            payload, etag = self._feed_page(
+                "shared", ("shared", user_id), self.shared_feeds.get(user_id, []), query
+            )
+        return conditional(if_none_match, etag, lambda: payload)
+
+    def get_trip(self, user_id, trip_id, query=None, if_none_match=None):
+        fields = trip_fields(query or {})
+        if fields and "userName" in fields:
+            fields.remove("userName")
+        if if_none_match:
+            # Only updated_at is read before deciding on a 304
+            self._round_trip("trips.watermark")
+            with self.lock:
+                etag = make_etag("trip", trip_id, self._owned_trip(user_id, trip_id)["updated_at"], fields)
+            if not_modified(if_none_match, etag):
+                return conditional(if_none_match, etag, None)
+        self._round_trip("trips.select")
+        with self.lock:
+            trip = self._owned_trip(user_id, trip_id)
+            etag = make_etag("trip", trip_id, trip["updated_at"], fields)
+            formatted = format_trip(trip, fields=fields)
+        return conditional(if_none_match, etag, lambda: formatted)
+
+    def update_trip(self, user_id, trip_id, body):
+        _require(isinstance(body, dict))
+        with self.lock:
+            trip = self._owned_trip(user_id, trip_id)
+            self._unindex_trip(trip)
+            for field, column in TRIP_FIELDS.items():
+                if field in body:
+                    trip[column] = body[field]
+            trip["updated_at"] = self.now_iso()
+            self._index_trip(trip)
+        return 200, format_trip(trip)
+
+    def share_trip(self, user_id, trip_id, body):
+        recipient_email = body.get("recipientEmail") if isinstance(body, dict) else None
+        if not recipient_email:
+            raise ApiError("Recipient email is required", 400)
+        if not EMAIL_RE.match(recipient_email):
+            raise ApiError("Invalid email address", 400)
+
+        with self.lock:
+            trip = self.trips_by_user.get(user_id, {}).get(trip_id)
+            if not trip:
+                raise ApiError("Trip not found or you do not have permission to share it", 404)
+            recipient = self.users_by_email.get(recipient_email.lower())
+            if recipient and recipient["id"] not in trip["shared_with"]:
+                self._unindex_trip(trip)
+                trip["shared_with"] = [*trip["shared_with"], recipient["id"]]
+                trip["updated_at"] = self.now_iso()
+                self._index_trip(trip)
+        return 200, {
+            "success": True,
+            "message": f"Trip shared with {recipient['name']}" if recipient
+            else f"Invitation sent to {recipient_email}",
+            "isNewUser": recipient is None,
+            "recipientEmail": recipient_email,
+            "sharedTrip": {"id": trip["id"], "title": trip["title"], "destination": trip["destination"]},
+        }
+
+    def delete_trip(self, user_id, trip_id):
+        with self.lock:
+            trip = self.trips_by_user.get(user_id, {}).pop(trip_id, None)
+            if trip:
+                del self.trips[trip_id]
+                self._unindex_trip(trip)
+        return 200, {"success": True}
+
+    def _upload_one(self, user_id, bucket, folder, upload):
+        if upload.size > MAX_FILE_SIZES[bucket]:
+            return "failed", {"file": upload.name,
+                              "error": f"File size exceeds {MAX_FILE_SIZES[bucket] / 1024 / 1024:.1f}MB limit"}
+        if upload.type not in ALLOWED_MIME_TYPES[bucket]:
+            allowed = ", ".join(ALLOWED_MIME_TYPES[bucket])
+            return "failed", {"file": upload.name,
+                              "error": f"File type {upload.type} not allowed. Allowed types: {allowed}"}
+        path = f"{user_id}/{folder}/{uuid.uuid4().hex[:8]}_{upload.name}"
+        return "uploaded", {"originalName": upload.name, **self.storage.upload(bucket, path, upload.data)}
+
+    def upload(self, user_id, form):
+        """POST /upload: validate and store files UPLOAD_CONCURRENCY at a time, results in order"""
+        _require(isinstance(form, dict) and "files" in form)
+        uploads = form["files"].get("files", [])
+        if not uploads:
+            raise ApiError("No files provided", 400)
+        bucket = form["fields"].get("bucket") or "trip-images"
+        _require(bucket in MAX_FILE_SIZES)
+        folder = form["fields"].get("folder") or "trips"
+
+        with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as pool:
+            results = list(pool.map(lambda upload: self._upload_one(user_id, bucket, folder, upload), uploads))
+        uploaded = [entry for outcome, entry in results if outcome == "uploaded"]
+        failed = [entry for outcome, entry in results if outcome == "failed"]
+        message = f"Uploaded {len(uploaded)} file(s)" + (f", {len(failed)} failed" if failed else "")
+        return 200, {"success": not failed, "uploaded": uploaded, "failed": failed, "message": message}
+
+
+def _int_param(query, name, default):
+    try:
+        return int(query.get(name, [str(default)])[0])
+    except ValueError:
+        return default
+
+
+def _limit_param(query, default):
+    """`limit` clamped the way the handlers clamp it (1..100)"""
+    limit = _int_param(query, "limit", default)
+    return default if limit < 1 else min(limit, 100)
+
+
+# (method, path, store call, requires auth); `:name` segments are params
+ROUTES = [
+    ("POST", "/auth/register", lambda s, r: s.register(r.body), False),
+    ("POST", "/auth/login", lambda s, r: s.login(r.body), False),
+    ("GET", "/auth/me", lambda s, r: s.me(r.user_id), True),
+    ("PATCH", "/users/profile", lambda s, r: s.update_profile(r.user_id, r.body), True),
+    ("POST", "/users/heartbeat", lambda s, r: s.heartbeat(r.user_id), True),
+    ("GET", "/users/online", lambda s, r: s.online_users(r.user_id, r.headers.get("If-None-Match")), True),
+    ("POST", "/messages", lambda s, r: s.send_message(r.user_id, r.body), True),
+    ("POST", "/messages/batch", lambda s, r: s.send_message_batch(r.user_id, r.body), True),
+    ("GET", "/messages/unread", lambda s, r: s.unread_summary(r.user_id, r.query), True),
+    ("GET", "/messages/:other", lambda s, r: s.get_conversation(r.user_id, r.params["other"], r.query), True),
+    ("POST", "/trips", lambda s, r: s.create_trip(r.user_id, r.body), True),
+    ("GET", "/trips", lambda s, r: s.user_trips(r.user_id, r.query, r.headers.get("If-None-Match")), True),
+    ("GET", "/trips/public/all", lambda s, r: s.public_trip_feed(r.query, r.headers.get("If-None-Match")), True),
+    ("GET", "/trips/shared",
+     lambda s, r: s.shared_trip_feed(r.user_id, r.query, r.headers.get("If-None-Match")), True),
+    ("GET", "/trips/:id",
+     lambda s, r: s.get_trip(r.user_id, r.params["id"], r.query, r.headers.get("If-None-Match")), True),
+    ("PATCH", "/trips/:id", lambda s, r: s.update_trip(r.user_id, r.params["id"], r.body), True),
+    ("DELETE", "/trips/:id", lambda s, r: s.delete_trip(r.user_id, r.params["id"]), True),
+    ("POST", "/trips/:id/share", lambda s, r: s.share_trip(r.user_id, r.params["id"], r.body), True),
+    ("POST", "/upload", lambda s, r: s.upload(r.user_id, r.body), True),
+]
+
+
+class Router:
+    """Mirror of `createRouter` in app/api/lib/router.js
+
+    Fixed paths are one dict lookup; parameterized paths are bucketed by
+    method and segment count, and a fixed path wins over a parameterized one.
+    """
+
+    def __init__(self, routes):
+        self.fixed = {}
+        self.parameterized = {}
+        for method, path, call, requires_auth in routes:
+            segments = tuple(segment for segment in path.split("/") if segment)
+            if not any(segment.startswith(":") for segment in segments):
+                self.fixed[(method, segments)] = (call, requires_auth)
+                continue
+            self.parameterized.setdefault((method, len(segments)), []).append((segments, call, requires_auth))
+
+    def match(self, method, segments):
+        """(call, requires auth, params) for a request, or None"""
+        found = self.fixed.get((method, segments))
+        if found:
+            return found[0], found[1], {}
+        for pattern, call, requires_auth in self.parameterized.get((method, len(segments)), ()):
+            params = {}
+            for expected, actual in zip(pattern, segments):
+                if expected.startswith(":"):
+                    params[expected[1:]] = actual
+                elif expected != actual:
+                    break
+            else:
+                return call, requires_auth, params
+        return None
+
+
+ROUTER = Router(ROUTES)
+
+
+class FakeRequest:
+    """What a store call needs from the HTTP request"""
+
+    def __init__(self, method, route, query, headers, body):
+        self.method = method
+        self.route = route
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.params = {}
+        self.user_id = None
+        self.auth_cache = None
+
+
+def _accepts_gzip(accept_encoding):
+    """Whether Accept-Encoding allows gzip, as pickEncoding reads it"""
+    for part in (accept_encoding or "").split(","):
+        coding, *params = part.strip().lower().split(";")
+        refused = any(re.fullmatch(r"\s*q=0(\.0*)?\s*", param) for param in params)
+        if coding in ("gzip", "*") and not refused:
+            return True
+    return False
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse sockets
+    disable_nagle_algorithm = True
+    server_version = "TuckerTripsFake/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self):
+        store = self.server.store
+        started = time.thread_time()
+        url = urlsplit(self.path)
+        route = url.path
+        if route.startswith("/api"):
+            route = route[len("/api"):] or "/"
+        route = route.rstrip("/") or "/"
+
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type") or ""
+        try:
+            if content_type.startswith("multipart/form-data"):
+                body = parse_multipart(content_type, raw)
+            else:
+                body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = None
+
+        request = FakeRequest(self.command, route, parse_qs(url.query), self.headers, body)
+        if self.command == "GET" and route == "/events":
+            return self._stream_events(request)
+        headers, timing, match = {}, None, None
+        _phases.entries = {}
+        try:
+            dispatch_started = time.perf_counter()
+            match = ROUTER.match(self.command, tuple(segment for segment in route.split("/") if segment))
+            dispatch_ms = (time.perf_counter() - dispatch_started) * 1000
+            if match:
+                timing = f"route;dur={dispatch_ms:.3f}"
+                call, requires_auth, request.params = match
+                if requires_auth:
+                    auth_started = time.perf_counter()
+                    try:
+                        request.user_id = store.authenticate(self.headers.get("Authorization"), request)
+                    finally:
+                        record_phase("auth", (time.perf_counter() - auth_started) * 1000)
+                if body is None:
+                    raise ApiError("Invalid JSON body", 400)
+                # Store calls return (status, payload) or (status, payload, headers)
+                status, payload, *extra = call(store, request)
+                headers = extra[0] if extra else {}
+            else:
+                status, payload = 404, {"error": f"Route {route} not found"}
+        except ApiError as error:
+            status, payload = error.status, {"error": error.message}
+            headers = error.headers
+        except Exception:  # mirror the route's sanitized 500
+            status, payload = 500, {"error": "Internal server error", "code": "INTERNAL_ERROR"}
+
+        if request.auth_cache and store.auth_cache_debug:
+            headers = {**headers, "X-Auth-Cache": request.auth_cache}
+        if match:
+            store.flush_presence_if_due()
+        self._send(status, payload, headers, timing, dispatch_started)
+        _phases.entries = None
+        store.record_request_cpu(time.thread_time() - started)
+
+    def _send(self, status, payload, headers=None, timing=None, started=None):
+        """Write a JSON response
+
+        With `timing` (the route entry), Server-Timing carries the request's
+        phases, then `timing`, then the total since `started`. Large bodies
+        are gzipped when the client accepts it, like successResponse.
+        """
+        format_started = time.perf_counter()
+        # A 304 (payload None) has no body at all
+        data = b"" if payload is None else json.dumps(payload).encode()
+        if payload is not None:
+            record_phase("format", (time.perf_counter() - format_started) * 1000)
+        if len(data) >= COMPRESSION_THRESHOLD:
+            headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+            if _accepts_gzip(self.headers.get("Accept-Encoding")):
+                compress_started = time.perf_counter()
+                data = gzip.compress(data, compresslevel=6)
+                record_phase("compress", (time.perf_counter() - compress_started) * 1000)
+                headers["Content-Encoding"] = "gzip"
+        if timing:
+            finished = time.perf_counter()
+            total = f"total;dur={(finished - started) * 1000:.3f}, loop;dur={self.server.loop_lag():.3f}"
+            headers = {**(headers or {}), "Server-Timing": f"{server_timing_header()}, {timing}, {total}"}
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream_events(self, request):
+        """GET /events: hold the connection open and write events as they arrive"""
+        store = self.server.store
+        token = request.query.get("token", [None])[0]
+        authorization = self.headers.get("Authorization") or (f"Bearer {token}" if token else None)
+        try:
+            user_id = store.authenticate(authorization, request)
+        except ApiError as error:
+            return self._send(error.status, {"error": error.message})
+
+        events = store.events.subscribe(user_id)
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache, no-transform")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            self.wfile.write(f"retry: {EVENTS_RETRY_MS}\n\n".encode() + encode_event("ready", {"userId": user_id}))
+            while True:
+                try:
+                    chunk = events.get(timeout=EVENTS_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    chunk = b": keepalive\n\n"
+                if chunk is None:
+                    break
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            store.events.unsubscribe(user_id, events)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _dispatch
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class FakeHttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for thousands of simultaneous connects from the stream harness
+    request_queue_size = 1024
+
+
+class FakeApiServer:
+    """Threaded HTTP server around a FakeStore, bound to an ephemeral port
+
+        with FakeApiServer() as server:
+            TuckerTripsBackendTester(server.base_url).run_all_tests()
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, store=None):
+        self.store = store or FakeStore()
+        self.httpd = FakeHttpServer((host, port), FakeApiHandler)
+        self.httpd.store = self.store
+        self.httpd.loop_lag = LoopLag()
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self):
+        self.httpd.loop_lag.start()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.store.events.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+        self.httpd.loop_lag.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,133 @@
+"""
+Deep paging benchmark for GET /api/trips/public/all.
+
+Seeds a large public feed (1M trips by default), then times fetching pages
+1, 10, 100, 1000 and 10000 two ways: by `?cursor=` keyset, the way the
+client walks the feed, and by `?page=` offset. The cursor for page N is the
+`nextCursor` of page N-1, fetched once and not timed. With keyset paging
+the cursor column should stay flat however deep the page is, while the
+offset column grows with the number of rows the database has to skip.
+
+Page 1 is the same for both and is normally served from the feed's page
+cache, so flatness is judged from the second measured page onward.
+"""
+
+import uuid
+
+from tests.bench import LatencyHistogram
+from tests.client import ApiClient
+
+DEFAULT_PAGES = (1, 10, 100, 1_000, 10_000)
+PAGE_LIMIT = 12
+
+
+def trip_body(i):
+    return {
+        "title": f"Feed trip {i:09d}",
+        "destination": "Lisbon, Portugal",
+        "startDate": "2025-06-01",
+        "endDate": "2025-06-08",
+        "visibility": "public",
+    }
+
+
+class PageRow:
+    """Measurements at one page depth"""
+
+    def __init__(self, page, page_bytes, cursor, offset):
+        self.page = page
+        self.page_bytes = page_bytes
+        self.cursor = cursor
+        self.offset = offset
+
+    def line(self):
+        return (
+            f"{self.page:>7}{self.page_bytes:>9}"
+            f"{self.cursor.percentile(50) / 1000:>12.2f}{self.cursor.percentile(95) / 1000:>12.2f}"
+            f"{self.offset.percentile(50) / 1000:>12.2f}{self.offset.percentile(95) / 1000:>12.2f}"
+        )
+
+
+def is_flat(rows, tolerance=3.0):
+    """True when cursor p50 at the deepest page is within `tolerance`x of the second page"""
+    if len(rows) < 2:
+        return True
+    first, last = rows[1], rows[-1]
+    baseline = max(first.cursor.percentile(50), 1)
+    return last.cursor.percentile(50) <= baseline * tolerance
+
+
+class FeedBenchmark:
+    """Times public feed pages at increasing depth
+
+    `seeder(user_id, count)` adds public trips in bulk; by default they are
+    created through POST /api/trips, which takes a long time for 1M trips
+    against a live server. The offline mode passes a seeder that writes to
+    the fake store directly.
+    """
+
+    def __init__(self, base_url, trips=1_000_000, pages=DEFAULT_PAGES, samples=30, seeder=None, log=print):
+        self.base_url = base_url
+        self.trips = trips
+        self.pages = sorted(pages)
+        self.samples = samples
+        self.seeder = seeder
+        self.log = log
+
+    def _register(self, client):
+        run_id = uuid.uuid4().hex[:8]
+        response = client.session().post("/auth/register", json={
+            "name": "Feed Bench",
+            "email": f"feedbench-{run_id}@example.com",
+            "password": "BenchPass123!",
+        })
+        response.raise_for_status()
+        result = response.json()
+        return result["user"]["id"], client.session(result["token"])
+
+    @staticmethod
+    def _api_seeder(session):
+        def seed(user_id, count):
+            for i in range(count):
+                session.post("/trips", json=trip_body(i))
+        return seed
+
+    def _cursor_for(self, session, page):
+        if page <= 1:
+            return None
+        response = session.get("/trips/public/all", params={"page": page - 1, "limit": PAGE_LIMIT})
+        response.raise_for_status()
+        return response.json()["pagination"]["nextCursor"]
+
+    def _time(self, session, params):
+        histogram, page_bytes = LatencyHistogram(), 0
+        for _ in range(self.samples):
+            response = session.get("/trips/public/all", params=params)
+            response.raise_for_status()
+            histogram.record_seconds(response.elapsed.total_seconds())
+            page_bytes = len(response.content)
+        return histogram, page_bytes
+
+    def run(self):
+        rows = []
+        with ApiClient(self.base_url) as client:
+            user_id, session = self._register(client)
+            self.log(f"Seeding {self.trips} public trips...")
+            (self.seeder or self._api_seeder(session))(user_id, self.trips)
+
+            for page in self.pages:
+                self.log(f"Timing page {page}...")
+                cursor = self._cursor_for(session, page)
+                params = {"cursor": cursor, "limit": PAGE_LIMIT} if cursor else {"limit": PAGE_LIMIT}
+                by_cursor, page_bytes = self._time(session, params)
+                by_offset, _ = self._time(session, {"page": page, "limit": PAGE_LIMIT})
+                rows.append(PageRow(page, page_bytes, by_cursor, by_offset))
+        return rows
+
+
+def report_lines(rows):
+    out = [
+        f"{'page':>7}{'bytes':>9}{'cursor p50':>12}{'cursor p95':>12}{'offset p50':>12}{'offset p95':>12}"
+    ]
+    out.extend(row.line() for row in rows)
+    return out
@@ -0,0 +1,199 @@
+"""
+Concurrent load generation for the Tucker Trips API.
+
+Registers N synthetic users and keeps a fixed number of requests in flight
+against the chat and presence endpoints (heartbeat, online users, send
+message, get conversation), then reports throughput and p50/p95/p99 latency
+per endpoint.
+
+Requires aiohttp (`pip install aiohttp`).
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from tests.client import AsyncApiClient
+
+# Relative weights of each operation in the steady-state workload
+DEFAULT_MIX = {
+    "POST /users/heartbeat": 3,
+    "GET /users/online": 2,
+    "POST /messages": 3,
+    "GET /messages/:userId": 2,
+}
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list (0 when empty)"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+class EndpointStats:
+    """Latency samples (ms) and error count for one endpoint"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+    @property
+    def count(self):
+        return len(self.latencies) + self.errors
+
+    def record(self, latency_ms, ok=True):
+        if ok:
+            self.latencies.append(latency_ms)
+        else:
+            self.errors += 1
+
+    def summary(self):
+        samples = sorted(self.latencies)
+        return {
+            "requests": self.count,
+            "errors": self.errors,
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "max": samples[-1] if samples else 0.0,
+        }
+
+
+class LoadReport:
+    """Per-endpoint results of a load run"""
+
+    def __init__(self, elapsed, endpoints, users, concurrency, connections=None):
+        self.elapsed = elapsed
+        self.endpoints = endpoints
+        self.users = users
+        self.concurrency = concurrency
+        self.connections = connections
+
+    @property
+    def total_requests(self):
+        return sum(stats.count for stats in self.endpoints.values())
+
+    @property
+    def total_errors(self):
+        return sum(stats.errors for stats in self.endpoints.values())
+
+    def throughput(self, endpoint=None):
+        """Requests per second overall, or for a single endpoint"""
+        if self.elapsed <= 0:
+            return 0.0
+        if endpoint is None:
+            return self.total_requests / self.elapsed
+        return self.endpoints[endpoint].count / self.elapsed
+
+    def lines(self):
+        """Human readable report, one line per endpoint"""
+        out = [
+            f"Load run: {self.users} users, {self.concurrency} in flight, "
+            f"{self.elapsed:.1f}s, {self.total_requests} requests "
+            f"({self.throughput():.1f} req/s), {self.total_errors} errors",
+            f"{'endpoint':<26}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}",
+        ]
+        for endpoint in sorted(self.endpoints):
+            s = self.endpoints[endpoint].summary()
+            out.append(
+                f"{endpoint:<26}{self.throughput(endpoint):>9.1f}{s['p50']:>9.1f}"
+                f"{s['p95']:>9.1f}{s['p99']:>9.1f}{s['errors']:>8}"
+            )
+        if self.connections is not None:
+            out.append(f"Connections: {self.connections}")
+        return out
+
+
+class LoadGenerator:
+    """Drives the API with synthetic users and a fixed number of in-flight requests"""
+
+    def __init__(self, base_url, users=20, concurrency=50, duration=30.0,
+                 mix=None, log=print, seed=None):
+        if aiohttp is None:
+            raise RuntimeError("Load mode requires aiohttp: pip install aiohttp")
+        if users < 2:
+            raise ValueError("Load mode needs at least 2 users to exchange messages")
+        self.base_url = base_url.rstrip("/")
+        self.users = users
+        self.concurrency = concurrency
+        self.duration = duration
+        self.mix = mix or DEFAULT_MIX
+        self.log = log
+        self.random = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.accounts = []  # list of (user_id, AsyncUserSession)
+        self.endpoints = {name: EndpointStats() for name in self.mix}
+
+    async def _register(self, client, index):
+        payload = {
+            "name": f"Load User {index}",
+            "email": f"load-{self.run_id}-{index}@example.com",
+            "password": "LoadTestPass123!",
+        }
+        status, _, body = await client.session().request("POST", "/auth/register", json=payload)
+        if status not in (200, 201):
+            raise RuntimeError(f"Registering load user {index} failed: {status} - {body[:200]!r}")
+        result = json.loads(body)
+        return result["user"]["id"], client.session(result["token"])
+
+    async def _operation(self, endpoint):
+        user_id, session = self.random.choice(self.accounts)
+        peer_id = user_id
+        while peer_id == user_id:
+            peer_id, _ = self.random.choice(self.accounts)
+
+        if endpoint == "POST /users/heartbeat":
+            return await session.request("POST", "/users/heartbeat")
+        if endpoint == "GET /users/online":
+            return await session.request("GET", "/users/online")
+        if endpoint == "POST /messages":
+            payload = {"recipientId": peer_id, "content": f"load message {uuid.uuid4().hex[:12]}"}
+            return await session.request("POST", "/messages", json=payload)
+        if endpoint == "GET /messages/:userId":
+            return await session.request("GET", f"/messages/{peer_id}")
+        raise ValueError(f"Unknown endpoint in workload mix: {endpoint}")
+
+    async def _worker(self, deadline):
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        while time.perf_counter() < deadline:
+            endpoint = self.random.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                status, _, _ = await self._operation(endpoint)
+                ok = 200 <= status < 300
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                # A total timeout is not a ClientError; count it rather than end the run
+                ok = False
+            self.endpoints[endpoint].record((time.perf_counter() - started) * 1000, ok)
+
+    async def run(self):
+        async with AsyncApiClient(self.base_url, limit=self.concurrency) as client:
+            self.log(f"Registering {self.users} synthetic users...")
+            self.accounts = await asyncio.gather(
+                *(self._register(client, i) for i in range(self.users))
+            )
+
+            self.log(f"Running load for {self.duration:.0f}s with {self.concurrency} requests in flight...")
+            started = time.perf_counter()
+            deadline = started + self.duration
+            await asyncio.gather(*(self._worker(deadline) for _ in range(self.concurrency)))
+            elapsed = time.perf_counter() - started
+
+        return LoadReport(elapsed, self.endpoints, self.users, self.concurrency,
+                          client.connection_stats())
+
+
+def run_load(base_url, **kwargs):
+    """Run a load test synchronously and return its LoadReport"""
+    return asyncio.run(LoadGenerator(base_url, **kwargs).run())
@@ -0,0 +1,140 @@
+"""
+Parallel, isolated runs of the backend test scenarios.
+
+Every scenario gets a fresh tester with its own run_id, so its accounts
+(alice.johnson+<run_id>@example.com, ...) collide neither with another
+scenario's nor with an earlier run's, and the suite can be rerun against
+the same database. A scenario that builds on others (online tracking needs
+registered users that sent a heartbeat) first replays those steps on its
+own accounts; that setup is timed apart from the scenario itself.
+
+Scenarios run on a thread pool sharing one keep-alive ApiClient. Each
+scenario's log is buffered and printed as one block when it finishes, and
+the results are merged into one report, in suite order, with per-scenario
+timings.
+"""
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tests.client import DEFAULT_MAX_PER_HOST, ApiClient
+
+
+class ScenarioResult:
+    """Outcome, timings and buffered log of one isolated scenario"""
+
+    def __init__(self, name, passed, setup_seconds, seconds, lines):
+        self.name = name
+        self.passed = passed
+        self.setup_seconds = setup_seconds
+        self.seconds = seconds
+        self.lines = lines
+
+    def line(self):
+        status = "PASS" if self.passed else "FAIL"
+        return f"{self.name:<34}{status:>6}{self.setup_seconds:>9.2f}{self.seconds:>9.2f}"
+
+
+class SuiteReport:
+    """Merged results of a parallel run"""
+
+    def __init__(self, results, wall_seconds, workers, connections=None):
+        self.results = results
+        self.wall_seconds = wall_seconds
+        self.workers = workers
+        self.connections = connections
+
+    @property
+    def passed(self):
+        return sum(result.passed for result in self.results)
+
+    @property
+    def failed(self):
+        return len(self.results) - self.passed
+
+    @property
+    def serial_seconds(self):
+        """What the scenarios would take back to back, setup included"""
+        return sum(result.setup_seconds + result.seconds for result in self.results)
+
+    def lines(self):
+        out = [f"{'scenario':<34}{'result':>6}{'setup s':>9}{'run s':>9}"]
+        out.extend(result.line() for result in self.results)
+        slowest = max((result.setup_seconds + result.seconds for result in self.results), default=0.0)
+        out.append(
+            f"✅ Passed: {self.passed}  ❌ Failed: {self.failed} - {self.wall_seconds:.2f}s wall on "
+            f"{self.workers} worker(s), slowest scenario {slowest:.2f}s, {self.serial_seconds:.2f}s back to back"
+        )
+        if self.connections is not None:
+            out.append(f"🔌 Connections: {self.connections}")
+        return out
+
+
+class ParallelSuite:
+    """Runs each of the tester's scenarios in isolation, `workers` at a time
+
+    `workers` defaults to one per scenario. `output` receives each finished
+    scenario's log lines; `recorder` is passed on to the ApiClient.
+    """
+
+    def __init__(self, base_url, workers=None, tester_factory=None, output=print,
+                 recorder=None):
+        self.base_url = base_url
+        self.workers = workers
+        self.tester_factory = tester_factory
+        self.output = output
+        self.recorder = recorder
+
+    def _run_one(self, client, factory, name):
+        lines = []
+        tester = factory(self.base_url, client=client, run_id=uuid.uuid4().hex[:8], output=lines.append)
+        scenario = dict(tester.scenarios())[name]
+        tester.log(f"--- Running: {name} ---")
+
+        started = time.perf_counter()
+        passed = True
+        try:
+            for step in tester.prerequisites(name):
+                if not step():
+                    tester.log(f"❌ Setup step {step.__name__} failed")
+                    passed = False
+                    break
+        except Exception as e:
+            tester.log(f"❌ Setup failed with exception: {str(e)}")
+            passed = False
+        setup_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        if passed:
+            try:
+                passed = bool(scenario())
+            except Exception as e:
+                tester.log(f"❌ {name} FAILED with exception: {str(e)}")
+                passed = False
+        seconds = time.perf_counter() - started
+        tester.log(f"{'✅' if passed else '❌'} {name} {'PASSED' if passed else 'FAILED'}")
+        return ScenarioResult(name, passed, setup_seconds, seconds, lines)
+
+    def run(self):
+        factory = self.tester_factory
+        if factory is None:
+            from backend_test import TuckerTripsBackendTester as factory
+
+        started = time.perf_counter()
+        results = {}
+        with ApiClient(self.base_url) as probe:
+            names = [name for name, _ in factory(self.base_url, client=probe, verbose=False).scenarios()]
+        workers = self.workers or len(names)
+        # Each worker holds at most one connection at a time
+        with ApiClient(self.base_url, max_per_host=max(workers, DEFAULT_MAX_PER_HOST),
+                       recorder=self.recorder) as client, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._run_one, client, factory, name) for name in names]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result.name] = result
+                for line in result.lines:
+                    self.output(line)
+            connections = client.connection_stats()
+        return SuiteReport([results[name] for name in names], time.perf_counter() - started, workers, connections)
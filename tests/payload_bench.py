@@ -0,0 +1,157 @@
+"""
+Payload benchmark for the trips endpoints.
+
+Seeds trips carrying realistic itineraries (segments, accommodations,
+airlines, long comments), then fetches each view with and without
+compression and reports bytes on the wire and response time:
+
+- GET /trips and GET /trips/public/all in full, as the dashboard used to
+  fetch them
+- the same lists with `?fields=` set to what a dashboard card shows
+  (LIST_FIELDS)
+- GET /trips/:id, the detail view, which still needs everything
+
+Wire bytes are read off the socket undecoded, so a gzip or br row shows
+what actually crossed the network. Times cover the whole body, not just
+the headers.
+"""
+
+import time
+import uuid
+
+from tests.client import ApiClient
+from tests.load import percentile
+
+LIST_FIELDS = ("id", "title", "destination", "startDate", "endDate", "coverPhoto")
+DEFAULT_ENCODINGS = ("identity", "gzip")
+PAGE_LIMIT = 10
+
+
+def heavy_trip_body(i, segments=12):
+    """A trip with a full itinerary, as a traveller's dashboard fills up"""
+    return {
+        "title": f"Payload trip {i:05d}",
+        "destination": "Kyoto, Japan",
+        "startDate": "2025-04-01",
+        "endDate": "2025-04-14",
+        "visibility": "public",
+        "description": "Two weeks of temples, gardens and day trips out of Kyoto. " * 4,
+        "coverPhoto": f"https://images.example.com/trips/{i:05d}/cover.jpg",
+        "overallComment": "Would go back in a heartbeat; book the ryokan early and skip the JR pass. " * 6,
+        "airlines": [f"Japan Airlines JL{100 + i % 900}", f"ANA NH{200 + i % 800}"],
+        "accommodations": [
+            f"Ryokan {n}, {n} Gion-machi, Higashiyama-ku, Kyoto - quiet rooms, excellent breakfast"
+            for n in range(3)
+        ],
+        "segments": [
+            {"day": day, "location": f"Stop {day}", "activities": ["temple", "garden", "market"],
+             "notes": "Arrive before the tour buses; the late afternoon light is best for photos."}
+            for day in range(1, segments + 1)
+        ],
+    }
+
+
+class PayloadRow:
+    """Bytes on the wire and timings for one view fetched with one Accept-Encoding"""
+
+    def __init__(self, view, encoding, content_encoding, wire_bytes, latencies_ms):
+        self.view = view
+        self.encoding = encoding
+        self.content_encoding = content_encoding
+        self.wire_bytes = wire_bytes
+        self.latencies_ms = sorted(latencies_ms)
+
+    @property
+    def p50(self):
+        return percentile(self.latencies_ms, 50)
+
+    @property
+    def p95(self):
+        return percentile(self.latencies_ms, 95)
+
+    def line(self):
+        return (
+            f"{self.view:<30}{self.encoding:>10}{self.content_encoding or '-':>10}"
+            f"{self.wire_bytes:>10}{self.p50:>10.2f}{self.p95:>10.2f}"
+        )
+
+
+class PayloadBenchmark:
+    """Fetches list and detail views of the trips endpoints and measures their payloads"""
+
+    def __init__(self, base_url, trips=PAGE_LIMIT, samples=20, encodings=DEFAULT_ENCODINGS, log=print):
+        self.base_url = base_url
+        self.trips = trips
+        self.samples = samples
+        self.encodings = encodings
+        self.log = log
+
+    def _register(self, client):
+        run_id = uuid.uuid4().hex[:8]
+        response = client.session().post("/auth/register", json={
+            "name": "Payload Bench",
+            "email": f"payloadbench-{run_id}@example.com",
+            "password": "BenchPass123!",
+        })
+        response.raise_for_status()
+        return client.session(response.json()["token"])
+
+    def views(self, trip_id):
+        """(label, path, params) for every view measured"""
+        fields = ",".join(LIST_FIELDS)
+        return [
+            ("GET /trips", "/trips", {"limit": PAGE_LIMIT}),
+            ("GET /trips ?fields", "/trips", {"limit": PAGE_LIMIT, "fields": fields}),
+            ("GET /trips/public/all", "/trips/public/all", {"limit": PAGE_LIMIT}),
+            ("GET /trips/public/all ?fields", "/trips/public/all", {"limit": PAGE_LIMIT, "fields": fields}),
+            ("GET /trips/:id", f"/trips/{trip_id}", {}),
+        ]
+
+    def _measure(self, session, view, path, params, encoding):
+        latencies, wire_bytes, content_encoding = [], 0, None
+        for _ in range(self.samples):
+            started = time.perf_counter()
+            response = session.get(path, params=params, headers={"Accept-Encoding": encoding}, stream=True)
+            raw = response.raw.read(decode_content=False)
+            latencies.append((time.perf_counter() - started) * 1000)
+            response.close()
+            if response.status_code != 200:
+                raise RuntimeError(f"{view} failed: {response.status_code} - {raw[:200]!r}")
+            wire_bytes = len(raw)
+            content_encoding = response.headers.get("Content-Encoding")
+        return PayloadRow(view, encoding, content_encoding, wire_bytes, latencies)
+
+    def run(self):
+        rows = []
+        with ApiClient(self.base_url) as client:
+            session = self._register(client)
+            self.log(f"Seeding {self.trips} trips with full itineraries...")
+            trip_id = None
+            for i in range(self.trips):
+                response = session.post("/trips", json=heavy_trip_body(i))
+                response.raise_for_status()
+                trip_id = response.json()["id"]
+
+            for view, path, params in self.views(trip_id):
+                self.log(f"Fetching {view}...")
+                for encoding in self.encodings:
+                    rows.append(self._measure(session, view, path, params, encoding))
+        return rows
+
+
+def find_row(rows, view, encoding):
+    return next(row for row in rows if row.view == view and row.encoding == encoding)
+
+
+def report_lines(rows):
+    out = [f"{'view':<30}{'accept':>10}{'encoding':>10}{'bytes':>10}{'p50 ms':>10}{'p95 ms':>10}"]
+    out.extend(row.line() for row in rows)
+    encodings = {row.encoding for row in rows}
+    if "identity" in encodings:
+        full = find_row(rows, "GET /trips", "identity")
+        smallest = min((row for row in rows if row.view == "GET /trips ?fields"), key=lambda row: row.wire_bytes)
+        out.append(
+            f"Dashboard list: {full.wire_bytes} bytes in full, {smallest.wire_bytes} with ?fields "
+            f"({smallest.encoding}) - {full.wire_bytes / max(smallest.wire_bytes, 1):.1f}x smaller"
+        )
+    return out
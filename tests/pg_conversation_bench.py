@@ -0,0 +1,213 @@
+"""
+Before/after benchmark for the conversation_key migration on a local Postgres.
+
+Builds the messages table as the earlier migrations leave it in a scratch
+schema, seeds millions of background messages between random users plus a
+few "hot" conversations of the requested sizes, and times the newest-page
+query for each hot conversation:
+
+- before: the two-way `(sender, recipient) OR (recipient, sender)` filter
+  the handlers used, with only the pre-existing indexes
+- after: `conversation_key = ...` once
+  supabase/migrations/20250112000000_message_conversation_key.sql has run
+  (the migration itself, backfill included, is applied and timed)
+
+Rows are generated inside Postgres with generate_series, in chunks, so
+seeding never holds the data set in this process. The scratch schema is
+dropped at the end.
+
+Requires psycopg (`pip install "psycopg[binary]"`) and a database the DSN's
+role can create schemas in.
+"""
+
+import time
+import uuid
+from pathlib import Path
+
+from tests.load import percentile
+
+MIGRATION = (
+    Path(__file__).resolve().parent.parent
+    / "supabase" / "migrations" / "20250112000000_message_conversation_key.sql"
+)
+
+DEFAULT_MESSAGES = 5_000_000
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+SEED_CHUNK = 500_000
+PAGE_LIMIT = 50
+
+# messages as left by 20250101000000_initial_schema.sql and
+# 20250110000000_conversation_page_rpc.sql, minus the users foreign keys
+SCHEMA_SQL = """
+CREATE TABLE messages (
+  id TEXT PRIMARY KEY,
+  sender_id TEXT NOT NULL,
+  recipient_id TEXT NOT NULL,
+  content TEXT NOT NULL,
+  read BOOLEAN DEFAULT FALSE,
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE INDEX idx_messages_sender_id ON messages(sender_id);
+CREATE INDEX idx_messages_recipient_id ON messages(recipient_id);
+CREATE INDEX idx_messages_created_at ON messages(created_at);
+CREATE INDEX idx_messages_conversation ON messages(sender_id, recipient_id);
+CREATE INDEX idx_messages_conversation_created ON messages(sender_id, recipient_id, created_at, id);
+"""
+
+# Background traffic: random pairs among `users` users, one second apart
+BACKGROUND_SQL = """
+INSERT INTO messages (id, sender_id, recipient_id, content, read, created_at)
+SELECT 'bg-' || g,
+       'user-' || (random() * %(users)s)::int,
+       'user-' || (random() * %(users)s)::int,
+       'background message ' || g,
+       TRUE,
+       TIMESTAMPTZ '2024-01-01' + g * INTERVAL '1 second'
+FROM generate_series(%(start)s, %(stop)s) AS g
+"""
+
+# One hot conversation spread over the same time range as the background
+HOT_SQL = """
+INSERT INTO messages (id, sender_id, recipient_id, content, read, created_at)
+SELECT 'hot-' || %(size)s || '-' || g,
+       CASE WHEN g %% 2 = 0 THEN %(a)s ELSE %(b)s END,
+       CASE WHEN g %% 2 = 0 THEN %(b)s ELSE %(a)s END,
+       'hot message ' || g,
+       TRUE,
+       TIMESTAMPTZ '2024-01-01' + (g * %(spacing)s) * INTERVAL '1 second'
+FROM generate_series(1, %(size)s) AS g
+"""
+
+BEFORE_SQL = """
+SELECT * FROM messages
+WHERE (sender_id = %(a)s AND recipient_id = %(b)s) OR (sender_id = %(b)s AND recipient_id = %(a)s)
+ORDER BY created_at DESC, id DESC
+LIMIT %(limit)s
+"""
+
+AFTER_SQL = """
+SELECT * FROM messages
+WHERE conversation_key = conversation_key(%(a)s, %(b)s)
+ORDER BY created_at DESC, id DESC
+LIMIT %(limit)s
+"""
+
+
+def plan_summary(cursor, sql, params):
+    """Node types of a query plan, outermost first, e.g. 'Limit > Index Scan Backward'"""
+    cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+    node, names = cursor.fetchone()[0][0]["Plan"], []
+    while node:
+        name = node["Node Type"]
+        if node.get("Index Name"):
+            name += f" ({node['Index Name']})"
+        names.append(name)
+        node = (node.get("Plans") or [None])[0]
+    return " > ".join(names)
+
+
+class QueryTiming:
+    """Latencies (ms) and plan for one query on one conversation"""
+
+    def __init__(self, latencies, plan):
+        self.latencies = sorted(latencies)
+        self.plan = plan
+
+    @property
+    def p50(self):
+        return percentile(self.latencies, 50)
+
+    @property
+    def p95(self):
+        return percentile(self.latencies, 95)
+
+
+class ConversationRow:
+    """Before/after timings for one hot conversation"""
+
+    def __init__(self, size, before, after):
+        self.size = size
+        self.before = before
+        self.after = after
+
+    def line(self):
+        speedup = self.before.p50 / self.after.p50 if self.after.p50 else float("inf")
+        return (
+            f"{self.size:>9}{self.before.p50:>12.2f}{self.before.p95:>12.2f}"
+            f"{self.after.p50:>12.2f}{self.after.p95:>12.2f}{speedup:>9.1f}x"
+        )
+
+
+class PgConversationBenchmark:
+    """Seeds a scratch schema and compares the conversation page query before and after"""
+
+    def __init__(self, dsn, messages=DEFAULT_MESSAGES, sizes=DEFAULT_SIZES, users=100_000, samples=30,
+                 log=print):
+        self.dsn = dsn
+        self.messages = messages
+        self.sizes = sorted(sizes)
+        self.users = users
+        self.samples = samples
+        self.log = log
+        self.schema = f"bench_conversation_{uuid.uuid4().hex[:8]}"
+        self.migration_seconds = None
+
+    def _seed(self, cursor):
+        for start in range(1, self.messages + 1, SEED_CHUNK):
+            stop = min(start + SEED_CHUNK - 1, self.messages)
+            cursor.execute(BACKGROUND_SQL, {"users": self.users, "start": start, "stop": stop})
+            self.log(f"Seeded {stop}/{self.messages} background messages")
+        for size in self.sizes:
+            cursor.execute(HOT_SQL, {
+                "size": size, "a": f"hot-a-{size}", "b": f"hot-b-{size}",
+                "spacing": max(self.messages // size, 1),
+            })
+        cursor.execute("ANALYZE messages")
+
+    def _time(self, cursor, sql, size):
+        params = {"a": f"hot-a-{size}", "b": f"hot-b-{size}", "limit": PAGE_LIMIT + 1}
+        latencies = []
+        for _ in range(self.samples):
+            started = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            latencies.append((time.perf_counter() - started) * 1000)
+        return QueryTiming(latencies, plan_summary(cursor, sql, params))
+
+    def run(self):
+        import psycopg
+
+        rows = []
+        with psycopg.connect(self.dsn, autocommit=True) as conn, conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {self.schema}")
+            try:
+                cursor.execute(f"SET search_path TO {self.schema}")
+                cursor.execute(SCHEMA_SQL)
+                self._seed(cursor)
+
+                self.log("Timing the two-way filter...")
+                before = {size: self._time(cursor, BEFORE_SQL, size) for size in self.sizes}
+
+                self.log(f"Applying {MIGRATION.name}...")
+                started = time.perf_counter()
+                with conn.transaction():
+                    cursor.execute(MIGRATION.read_text())
+                self.migration_seconds = time.perf_counter() - started
+                cursor.execute("ANALYZE messages")
+
+                self.log("Timing the conversation key lookup...")
+                for size in self.sizes:
+                    rows.append(ConversationRow(size, before[size], self._time(cursor, AFTER_SQL, size)))
+            finally:
+                cursor.execute(f"DROP SCHEMA {self.schema} CASCADE")
+        return rows
+
+
+def report_lines(rows, migration_seconds=None):
+    out = [f"{'messages':>9}{'before p50':>12}{'before p95':>12}{'after p50':>12}{'after p95':>12}{'speedup':>10}"]
+    out.extend(row.line() for row in rows)
+    for row in rows:
+        out.append(f"Plan at {row.size}: before {row.before.plan}; after {row.after.plan}")
+    if migration_seconds is not None:
+        out.append(f"Migration (backfill and index build): {migration_seconds:.1f}s")
+    return out
@@ -0,0 +1,171 @@
+"""
+Polling workload for the conditional GET routes.
+
+A dashboard left open polls GET /trips, /trips/public/all, /trips/:id and
+/users/online every few seconds, and almost every poll finds nothing new.
+This replays that: `pollers` sessions (tabs of one traveller's dashboard)
+poll the four routes for `rounds` rounds while, every `write_every` rounds,
+the traveller edits a trip and another user sends a heartbeat.
+
+It runs twice: once polling blindly, once sending back the last ETag in
+If-None-Match the way a browser revalidates. Per route it reports 200s and
+304s, bytes on the wire (gzip accepted, as browsers do) and server time
+summed from the Server-Timing `total`. The conditional run should move a
+fraction of the bytes and spend less server time, and every write must
+still show up as a 200 on the next poll.
+"""
+
+import time
+import uuid
+
+from tests.client import ApiClient
+from tests.payload_bench import heavy_trip_body
+from tests.server_timing import parse_server_timing
+
+POLLED_ROUTES = ("GET /trips", "GET /trips/public/all", "GET /trips/:id", "GET /users/online")
+
+
+class RoutePolls:
+    """Counts, wire bytes and server time for one route in one mode"""
+
+    def __init__(self):
+        self.ok = 0
+        self.not_modified = 0
+        self.wire_bytes = 0
+        self.server_ms = 0.0
+
+
+class PollReport:
+    """Both runs of the polling workload"""
+
+    def __init__(self, pollers, rounds, writes, blind, conditional, stale):
+        self.pollers = pollers
+        self.rounds = rounds
+        self.writes = writes
+        self.blind = blind
+        self.conditional = conditional
+        # 304s for polls right after a write, which changed every polled route
+        self.stale = stale
+
+    @staticmethod
+    def _total(mode, attribute):
+        return sum(getattr(stats, attribute) for stats in mode.values())
+
+    @property
+    def bytes_saved(self):
+        blind = self._total(self.blind, "wire_bytes")
+        return 1 - self._total(self.conditional, "wire_bytes") / blind if blind else 0.0
+
+    @property
+    def server_time_saved(self):
+        blind = self._total(self.blind, "server_ms")
+        return 1 - self._total(self.conditional, "server_ms") / blind if blind else 0.0
+
+    def lines(self):
+        out = [
+            f"{'route':<24}{'mode':>12}{'200':>7}{'304':>7}{'bytes':>11}{'server ms':>11}"
+        ]
+        for route in POLLED_ROUTES:
+            for label, mode in (("blind", self.blind), ("conditional", self.conditional)):
+                stats = mode[route]
+                out.append(
+                    f"{route:<24}{label:>12}{stats.ok:>7}{stats.not_modified:>7}"
+                    f"{stats.wire_bytes:>11}{stats.server_ms:>11.1f}"
+                )
+        out.append(
+            f"{self.pollers} pollers x {self.rounds} rounds, {self.writes} writes: "
+            f"{self.bytes_saved:.0%} fewer bytes, {self.server_time_saved:.0%} less server time "
+            f"with If-None-Match, {self.stale} stale 304(s)"
+        )
+        return out
+
+
+class PollBenchmark:
+    """Replays dashboard polling with and without If-None-Match"""
+
+    def __init__(self, base_url, pollers=10, rounds=30, write_every=5, trips=10, log=print):
+        self.base_url = base_url
+        self.pollers = pollers
+        self.rounds = rounds
+        self.write_every = write_every
+        self.trips = trips
+        self.log = log
+
+    def _register(self, client, name):
+        run_id = uuid.uuid4().hex[:8]
+        response = client.session().post("/auth/register", json={
+            "name": name,
+            "email": f"pollbench-{run_id}@example.com",
+            "password": "BenchPass123!",
+        })
+        response.raise_for_status()
+        return client.session(response.json()["token"])
+
+    def _poll(self, session, route, path, etags, stats):
+        """One poll; returns the status code"""
+        headers = {"Accept-Encoding": "gzip"}
+        if etags is not None and route in etags:
+            headers["If-None-Match"] = etags[route]
+        response = session.get(path, headers=headers, stream=True)
+        raw = response.raw.read(decode_content=False)
+        response.close()
+        if response.status_code not in (200, 304):
+            raise RuntimeError(f"{route} failed: {response.status_code} - {raw[:200]!r}")
+
+        if etags is not None and response.headers.get("ETag"):
+            etags[route] = response.headers["ETag"]
+        if response.status_code == 304:
+            stats.not_modified += 1
+        else:
+            stats.ok += 1
+        stats.wire_bytes += len(raw)
+        stats.server_ms += sum(
+            duration for name, duration, _ in parse_server_timing(response.headers.get("Server-Timing"))
+            if name == "total"
+        )
+        return response.status_code
+
+    def _run(self, owner, tabs, friend, trip_ids, conditional):
+        mode = {route: RoutePolls() for route in POLLED_ROUTES}
+        etags = [{} if conditional else None for _ in tabs]
+        paths = {
+            "GET /trips": "/trips",
+            "GET /trips/public/all": "/trips/public/all",
+            "GET /trips/:id": f"/trips/{trip_ids[0]}",
+            "GET /users/online": "/users/online",
+        }
+        writes = stale = 0
+        for round_number in range(self.rounds):
+            wrote = round_number > 0 and round_number % self.write_every == 0
+            if wrote:
+                # Timestamps have millisecond resolution
+                time.sleep(0.002)
+                owner.patch(f"/trips/{trip_ids[0]}", json={"title": f"Edited in round {round_number}"})
+                friend.post("/users/heartbeat")
+                writes += 1
+            for tab, tab_etags in zip(tabs, etags):
+                for route in POLLED_ROUTES:
+                    status = self._poll(tab, route, paths[route], tab_etags, mode[route])
+                    # Each write changes all four routes, so every tab must see it
+                    if wrote and status == 304:
+                        stale += 1
+        return mode, writes, stale
+
+    def run(self):
+        with ApiClient(self.base_url) as client:
+            owner = self._register(client, "Poll Owner")
+            friend = self._register(client, "Poll Friend")
+            friend.post("/users/heartbeat")
+            self.log(f"Seeding {self.trips} public trips...")
+            trip_ids = []
+            for i in range(self.trips):
+                response = owner.post("/trips", json=heavy_trip_body(i))
+                response.raise_for_status()
+                trip_ids.append(response.json()["id"])
+            tabs = [client.session(owner.token) for _ in range(self.pollers)]
+
+            self.log(f"Polling blind: {self.pollers} tabs x {self.rounds} rounds...")
+            blind, writes, _ = self._run(owner, tabs, friend, trip_ids, conditional=False)
+            self.log("Polling with If-None-Match...")
+            conditional, _, stale = self._run(owner, tabs, friend, trip_ids, conditional=True)
+        return PollReport(self.pollers, self.rounds, writes, blind, conditional, stale)
@@ -0,0 +1,157 @@
+"""
+Presence stress test for POST /api/users/heartbeat and GET /api/users/online.
+
+Brings a large population of users (5k by default) online, has every one of
+them heartbeat for a few rounds, then checks that the online list contains
+each of them exactly once and never the viewer. It reports heartbeat
+throughput and, when a write counter is available (the offline fake exposes
+one), how many database writes those heartbeats cost.
+
+Requires aiohttp (`pip install aiohttp`).
+"""
+
+import asyncio
+import json
+import time
+import uuid
+
+from tests.client import AsyncApiClient
+
+
+class PresenceReport:
+    """Outcome of one stress run"""
+
+    def __init__(self, users, rounds, heartbeats, errors, elapsed, missing, duplicates,
+                 viewer_listed, writes=None):
+        self.users = users
+        self.rounds = rounds
+        self.heartbeats = heartbeats
+        self.errors = errors
+        self.elapsed = elapsed
+        self.missing = missing
+        self.duplicates = duplicates
+        self.viewer_listed = viewer_listed
+        self.writes = writes
+
+    @property
+    def heartbeat_rate(self):
+        return self.heartbeats / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def write_rate(self):
+        return self.writes / self.elapsed if self.writes is not None and self.elapsed else None
+
+    @property
+    def ok(self):
+        return not (self.errors or self.missing or self.duplicates or self.viewer_listed)
+
+    def lines(self):
+        out = [
+            f"Users: {self.users}, rounds: {self.rounds}, heartbeats: {self.heartbeats} "
+            f"in {self.elapsed:.2f}s ({self.heartbeat_rate:.0f}/s), errors: {self.errors}",
+            f"Online list: {self.missing} missing, {self.duplicates} duplicated, "
+            f"viewer listed: {'yes' if self.viewer_listed else 'no'}",
+        ]
+        if self.writes is not None:
+            out.append(
+                f"Database writes: {self.writes} ({self.write_rate:.1f}/s, "
+                f"{self.writes / max(self.heartbeats, 1):.4f} per heartbeat)"
+            )
+        return out
+
+
+class PresenceStress:
+    """Drives heartbeats for many users and verifies the online list
+
+    `seeder(count)` may return a list of (user_id, token) pairs to skip
+    registering through the API; `write_counter()` may return the running
+    count of presence writes so the report can show the database write rate.
+    """
+
+    def __init__(self, base_url, users=5000, rounds=3, concurrency=200, settle=12.0,
+                 seeder=None, write_counter=None, log=print):
+        if users < 2:
+            raise ValueError("The presence stress test needs at least 2 users")
+        self.base_url = base_url
+        self.users = users
+        self.rounds = rounds
+        self.concurrency = concurrency
+        self.settle = settle
+        self.seeder = seeder
+        self.write_counter = write_counter
+        self.log = log
+        self.run_id = uuid.uuid4().hex[:8]
+
+    async def _register(self, client, index):
+        payload = {
+            "name": f"Presence User {index}",
+            "email": f"presence-{self.run_id}-{index}@example.com",
+            "password": "PresencePass123!",
+        }
+        status, _, body = await client.session().request("POST", "/auth/register", json=payload)
+        if status not in (200, 201):
+            raise RuntimeError(f"Registering presence user {index} failed: {status} - {body[:200]!r}")
+        result = json.loads(body)
+        return result["user"]["id"], result["token"]
+
+    async def _accounts(self, client, limit):
+        if self.seeder:
+            return self.seeder(self.users)
+
+        async def register(index):
+            async with limit:
+                return await self._register(client, index)
+
+        return await asyncio.gather(*(register(i) for i in range(self.users)))
+
+    async def _heartbeat_round(self, sessions, limit):
+        async def beat(session):
+            async with limit:
+                status, _, _ = await session.request("POST", "/users/heartbeat")
+                return 200 <= status < 300
+
+        results = await asyncio.gather(*(beat(session) for session in sessions))
+        return results.count(False)
+
+    async def _check_online(self, viewer, viewer_id, expected):
+        """Poll until everyone is listed or `settle` seconds pass
+
+        Against a live deployment other instances only write their buffered
+        heartbeats back every few seconds, so the first read may be short.
+        """
+        deadline = time.perf_counter() + self.settle
+        while True:
+            status, _, body = await viewer.request("GET", "/users/online")
+            listed = [user["id"] for user in json.loads(body)] if status == 200 else []
+            missing = len(expected - set(listed))
+            if not missing or time.perf_counter() >= deadline:
+                return missing, len(listed) - len(set(listed)), viewer_id in listed
+            await asyncio.sleep(1.0)
+
+    async def run(self):
+        limit = asyncio.Semaphore(self.concurrency)
+        async with AsyncApiClient(self.base_url, limit=self.concurrency) as client:
+            self.log(f"Preparing {self.users} presence users...")
+            accounts = await self._accounts(client, limit)
+            sessions = [client.session(token) for _, token in accounts]
+
+            writes_before = self.write_counter() if self.write_counter else None
+            errors = 0
+            started = time.perf_counter()
+            for round_number in range(1, self.rounds + 1):
+                self.log(f"Heartbeat round {round_number}/{self.rounds}...")
+                errors += await self._heartbeat_round(sessions, limit)
+            elapsed = time.perf_counter() - started
+            writes = self.write_counter() - writes_before if self.write_counter else None
+
+            viewer_id = accounts[0][0]
+            expected = {user_id for user_id, _ in accounts[1:]}
+            missing, duplicates, viewer_listed = await self._check_online(sessions[0], viewer_id, expected)
+
+        return PresenceReport(self.users, self.rounds, self.users * self.rounds, errors, elapsed,
+                              missing, duplicates, viewer_listed, writes)
+
+
+def run_presence_stress(base_url, **kwargs):
+    """Run the presence stress test synchronously and return its PresenceReport"""
+    return asyncio.run(PresenceStress(base_url, **kwargs).run())
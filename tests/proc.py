@@ -0,0 +1,70 @@
+"""
+/proc readers for a server process running on this machine.
+
+Used by the harness modes that report server-side resource use (CPU per
+request, memory per connection, growth over a soak run). Linux only.
+"""
+
+import os
+
+
+class ProcessCpu:
+    """Cumulative user+system CPU seconds of a local process, from /proc"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK")
+
+    def __call__(self):
+        with open(f"/proc/{self.pid}/stat") as handle:
+            # The command name may contain spaces; fields resume after ')'
+            fields = handle.read().rsplit(")", 1)[1].split()
+        utime, stime = int(fields[11]), int(fields[12])
+        return (utime + stime) / self.ticks
+
+
+class ProcessMemory:
+    """Resident set size of a local process in bytes, from /proc"""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    def __call__(self):
+        with open(f"/proc/{self.pid}/status") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+
+class ProcessPeakMemory:
+    """Peak resident set size of a local process in bytes, from /proc
+
+    `reset()` clears the high-water mark so the next reading covers only
+    what ran in between; it needs write access to the process's clear_refs,
+    which the owner of the process has.
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    def reset(self):
+        with open(f"/proc/{self.pid}/clear_refs", "w") as handle:
+            handle.write("5")
+
+    def __call__(self):
+        with open(f"/proc/{self.pid}/status") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+
+class ProcessFileDescriptors:
+    """Open file descriptors (sockets, files, pipes) of a local process, from /proc"""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    def __call__(self):
+        return len(os.listdir(f"/proc/{self.pid}/fd"))
@@ -0,0 +1,117 @@
+"""
+Route dispatch micro-benchmark for the catch-all API route.
+
+Hits the first route in the table (POST /auth/register) and the last one
+(DELETE /trips/:id) alternately and compares how long the server took to
+find each one's handler, read from the `route` entry of the Server-Timing
+header. With the compiled route table both should cost about the same; with
+the old if-chain the last route paid for every check above it.
+
+The register request sends an empty body so it stops at validation and no
+user is created; the delete targets a trip id that doesn't exist. Both
+must still reach their handlers: a request the table didn't match (the
+route's own "Route ... not found") is counted as unmatched.
+"""
+
+import re
+import time
+import uuid
+
+from tests.client import ApiClient
+from tests.load import percentile
+
+DEFAULT_ROUTES = (("POST", "/auth/register"), ("DELETE", "/trips/:id"))
+ROUTE_TIMING_RE = re.compile(r"(?:^|,)\s*route;dur=([0-9.]+)")
+UNMATCHED_RE = re.compile(r"^Route .* not found$")
+
+
+def is_unmatched(response):
+    """True for the 404 the route sends when no handler matched"""
+    if response.status_code != 404:
+        return False
+    try:
+        return bool(UNMATCHED_RE.match(response.json().get("error", "")))
+    except ValueError:
+        return False
+
+
+def route_dispatch_ms(response):
+    """Dispatch time from a response's Server-Timing header, None if missing"""
+    match = ROUTE_TIMING_RE.search(response.headers.get("Server-Timing", ""))
+    return float(match.group(1)) if match else None
+
+
+class RouteSamples:
+    """Dispatch and end-to-end times (ms) for one route"""
+
+    def __init__(self, label):
+        self.label = label
+        self.dispatch = []
+        self.latency = []
+        self.unmatched = 0
+
+    def line(self):
+        dispatch, latency = sorted(self.dispatch), sorted(self.latency)
+        return (
+            f"{self.label:<22}{percentile(dispatch, 50):>14.3f}{percentile(dispatch, 95):>14.3f}"
+            f"{percentile(latency, 50):>12.2f}{percentile(latency, 95):>12.2f}"
+        )
+
+
+def is_position_independent(samples, tolerance=2.0, floor_ms=0.01):
+    """True when every route's dispatch p50 is within `tolerance`x of the fastest
+
+    `floor_ms` keeps timer noise on sub-microsecond lookups from failing it.
+    """
+    medians = [percentile(sorted(s.dispatch), 50) for s in samples]
+    if not all(s.dispatch for s in samples):
+        return False
+    return max(medians) <= max(min(medians) * tolerance, min(medians) + floor_ms)
+
+
+class RouteDispatchBenchmark:
+    """Alternates requests to `routes` and collects their dispatch times"""
+
+    def __init__(self, base_url, requests=2000, log=print):
+        self.base_url = base_url
+        self.requests = requests
+        self.log = log
+
+    def _register(self, client):
+        response = client.session().post("/auth/register", json={
+            "name": "Route Bench",
+            "email": f"routebench-{uuid.uuid4().hex[:8]}@example.com",
+            "password": "BenchPass123!",
+        })
+        response.raise_for_status()
+        return client.session(response.json()["token"])
+
+    def run(self):
+        samples = [RouteSamples(f"{method} {path}") for method, path in DEFAULT_ROUTES]
+        with ApiClient(self.base_url) as client:
+            anonymous, user = client.session(), self._register(client)
+            missing_trip = str(uuid.uuid4())
+            calls = [
+                lambda: anonymous.post("/auth/register", json={}),
+                lambda: user.delete(f"/trips/{missing_trip}"),
+            ]
+
+            self.log(f"Sending {self.requests} requests to each route...")
+            for _ in range(self.requests):
+                for call, route in zip(calls, samples):
+                    started = time.perf_counter()
+                    response = call()
+                    elapsed = (time.perf_counter() - started) * 1000
+                    if is_unmatched(response):
+                        route.unmatched += 1
+                    dispatch = route_dispatch_ms(response)
+                    if dispatch is not None:
+                        route.dispatch.append(dispatch)
+                        route.latency.append(elapsed)
+        return samples
+
+
+def report_lines(samples):
+    out = [f"{'route':<22}{'dispatch p50':>14}{'dispatch p95':>14}{'total p50':>12}{'total p95':>12}"]
+    out.extend(s.line() for s in samples)
+    return out
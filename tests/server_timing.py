@@ -0,0 +1,109 @@
+"""
+Per-route phase breakdown from Server-Timing response headers.
+
+The API reports how each request's time was spent (see app/api/lib/timing.js):
+`auth`, `hash`, `db` (one entry per query, described as e.g. "users.select"),
+`storage`, `format`, `compress`, then `route` (dispatch) and `total`, and
+`loop`, the process's event-loop delay, which is not part of the request.
+`PhaseBreakdown` is an ApiClient recorder that collects those entries per
+route template and prints the mean of each phase, so a slow route can be
+pinned on token checks, queries or JSON shaping without an APM.
+"""
+
+import re
+import threading
+from collections import defaultdict
+
+from tests.bench import route_template
+
+ENTRY_RE = re.compile(r'^\s*([^;,\s]+)((?:\s*;\s*[^;,]+)*)\s*$')
+PARAM_RE = re.compile(r'\s*;\s*(\w+)\s*=\s*("[^"]*"|[^;]*)')
+
+# Printed first, in this order; other phases follow as first seen
+PHASE_ORDER = ("auth", "hash", "db", "storage", "format", "compress")
+# Entries reported separately or not spent on the request
+NOT_PHASES = ("route", "total", "loop")
+
+
+def parse_server_timing(header):
+    """[(name, duration_ms, description)] from a Server-Timing header value"""
+    entries = []
+    for part in (header or "").split(","):
+        match = ENTRY_RE.match(part)
+        if not match:
+            continue
+        params = {key: value.strip('"') for key, value in PARAM_RE.findall(match.group(2))}
+        try:
+            duration = float(params.get("dur", 0))
+        except ValueError:
+            duration = 0.0
+        entries.append((match.group(1), duration, params.get("desc")))
+    return entries
+
+
+class RoutePhases:
+    """Summed phase and query times for one route"""
+
+    def __init__(self):
+        self.requests = 0
+        self.client_ms = 0.0
+        self.phases = defaultdict(float)
+        self.queries = defaultdict(lambda: [0, 0.0])
+
+    def record(self, client_ms, entries):
+        self.requests += 1
+        self.client_ms += client_ms
+        for name, duration, description in entries:
+            self.phases[name] += duration
+            if name == "db":
+                query = self.queries[description or "?"]
+                query[0] += 1
+                query[1] += duration
+
+    def mean(self, name):
+        return self.phases.get(name, 0.0) / self.requests if self.requests else 0.0
+
+
+class PhaseBreakdown:
+    """ApiClient recorder aggregating Server-Timing phases per route; thread safe"""
+
+    def __init__(self):
+        self.routes = defaultdict(RoutePhases)
+        self.lock = threading.Lock()
+
+    def record(self, method, path, seconds, response):
+        entries = parse_server_timing(response.headers.get("Server-Timing"))
+        if not entries:
+            return
+        with self.lock:
+            self.routes[route_template(method, path)].record(seconds * 1000, entries)
+
+    def phase_names(self):
+        seen = []
+        for stats in self.routes.values():
+            for name in stats.phases:
+                if name not in seen and name not in NOT_PHASES:
+                    seen.append(name)
+        return [name for name in PHASE_ORDER if name in seen] + [name for name in seen if name not in PHASE_ORDER]
+
+    def lines(self):
+        """Mean ms per request: client round trip, server total, each phase and what's left"""
+        names = self.phase_names()
+        out = [
+            f"{'route':<28}{'n':>6}{'client':>9}{'server':>9}"
+            + "".join(f"{name:>9}" for name in names) + f"{'route':>9}{'other':>9}"
+        ]
+        for label in sorted(self.routes):
+            stats = self.routes[label]
+            total = stats.mean("total")
+            accounted = sum(stats.mean(name) for name in names) + stats.mean("route")
+            out.append(
+                f"{label:<28}{stats.requests:>6}{stats.client_ms / stats.requests:>9.2f}{total:>9.2f}"
+                + "".join(f"{stats.mean(name):>9.2f}" for name in names)
+                + f"{stats.mean('route'):>9.2f}{max(total - accounted, 0.0):>9.2f}"
+            )
+            for description, (calls, duration) in sorted(stats.queries.items()):
+                out.append(
+                    f"  db {description:<24}{calls / stats.requests:>6.1f} call(s){duration / calls:>9.2f} ms each"
+                )
+        return out
@@ -0,0 +1,371 @@
+"""
+Endurance (soak) run for the Tucker Trips API.
+
+Replays a mixed workload for as long as asked, hours if need be:
+heartbeats and online lists, chat (send, read a conversation, the unread
+summary), trip CRUD and photo uploads, from `users` accounts with
+`concurrency` requests in flight. Trips are created and deleted at the same
+rate, so the data a request touches stays about the same size and any
+growth on the server side is the server's own.
+
+Every `interval` seconds it samples:
+
+- request count, errors and p50/p95 latency over the interval
+- the server's resident memory and open file descriptors, through
+  `rss_probe()` / `fd_probe()` (tests.proc.ProcessMemory and
+  ProcessFileDescriptors for a local server)
+- event-loop delay, the largest `loop` entry the API reported in its
+  Server-Timing headers over the interval
+
+At the end each series is compared over the run, past a warm-up: memory
+and descriptors are flagged when they grow quarter after quarter
+(a leak keeps climbing, a cache levels off), latency and loop delay when
+the last quarter ends up well above the first (drift).
+
+Offline the fake shares this process and keeps every message and upload
+in memory, so its memory figure grows with the data and includes the
+client; run against a local server with --server-pid for server-only
+numbers.
+"""
+
+import itertools
+import os
+import random
+import threading
+import time
+import uuid
+from statistics import median
+
+from tests.client import ApiClient
+from tests.load import percentile
+from tests.server_timing import parse_server_timing
+
+# Relative weights of each operation in the workload
+DEFAULT_MIX = {
+    "POST /users/heartbeat": 4,
+    "GET /users/online": 2,
+    "POST /messages": 3,
+    "GET /messages/:userId": 2,
+    "GET /messages/unread": 1,
+    "POST /trips": 1,
+    "GET /trips": 2,
+    "PATCH /trips/:id": 1,
+    "DELETE /trips/:id": 1,
+    "POST /upload": 1,
+}
+UPLOAD_BYTES = 64 * 1024
+WARMUP = 0.2
+# Fewer samples than this past the warm-up aren't judged
+MIN_TREND_SAMPLES = 8
+
+
+def trip_body(title):
+    return {
+        "title": title,
+        "destination": "Lisbon, Portugal",
+        "startDate": "2025-05-01",
+        "endDate": "2025-05-08",
+        "visibility": "private",
+        "description": "Soak run trip",
+    }
+
+
+class SoakSample:
+    """What was measured over one sampling interval"""
+
+    def __init__(self, elapsed, requests, errors, latencies, rss=None, fds=None, loop_ms=None):
+        self.elapsed = elapsed
+        self.requests = requests
+        self.errors = errors
+        latencies = sorted(latencies)
+        self.p50 = percentile(latencies, 50)
+        self.p95 = percentile(latencies, 95)
+        self.rss = rss
+        self.fds = fds
+        self.loop_ms = loop_ms
+
+    def line(self):
+        rss = "n/a" if self.rss is None else f"{self.rss / 1024 / 1024:.1f}"
+        fds = "n/a" if self.fds is None else str(self.fds)
+        loop = "n/a" if self.loop_ms is None else f"{self.loop_ms:.2f}"
+        return (
+            f"{self.elapsed:>9.0f}{self.requests:>9}{self.errors:>8}{self.p50:>9.2f}{self.p95:>9.2f}"
+            f"{rss:>10}{fds:>7}{loop:>9}"
+        )
+
+
+class Trend:
+    """Level of one sampled series early and late in the run, and whether that's a problem"""
+
+    def __init__(self, name, unit, start, end, flagged, reason):
+        self.name = name
+        self.unit = unit
+        self.start = start
+        self.end = end
+        self.flagged = flagged
+        self.reason = reason
+
+    def line(self):
+        if self.start is None:
+            return f"➖ {self.name}: {self.reason}"
+        mark = "❌" if self.flagged else "✅"
+        return f"{mark} {self.name}: {self.start:.2f} -> {self.end:.2f} {self.unit} ({self.reason})"
+
+
+def detect_trend(name, unit, values, tolerance, floor, monotonic, warmup=WARMUP):
+    """Trend of a series past its warm-up, or None when nothing was measured
+
+    Leading zeros are dropped before the warm-up is cut: they were read
+    before the source had anything to report (the API's loop delay stays 0
+    until its first 5s window closes). Fewer than MIN_TREND_SAMPLES left is
+    reported as "insufficient samples" rather than judged. The rest is cut
+    into quarters and each is reduced to its median, so a spike or a
+    garbage collection doesn't decide anything. With `monotonic`
+    (resources) it is flagged when every quarter is above the one before
+    and the last is above the first by more than `tolerance` (a fraction)
+    and `floor` (absolute); without it (latency) the last quarter being
+    that far above the first is enough.
+    """
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    values = list(itertools.dropwhile(lambda value: value == 0, values))
+    values = values[int(len(values) * warmup):]
+    if len(values) < MIN_TREND_SAMPLES:
+        return Trend(name, unit, None, None, False, "insufficient samples")
+    size = len(values) / 4
+    levels = [median(values[round(i * size):round((i + 1) * size)]) for i in range(4)]
+    start, end = levels[0], levels[-1]
+    grew = end - start > max(tolerance * start, floor)
+    if monotonic:
+        climbing = all(later > earlier for earlier, later in zip(levels, levels[1:]))
+        flagged = grew and climbing
+        reason = "keeps growing" if flagged else "levels off" if grew else "flat"
+    else:
+        flagged = grew
+        reason = "drifting up" if flagged else "stable"
+    return Trend(name, unit, start, end, flagged, reason)
+
+
+class SoakReport:
+    """Samples of a soak run and the trends found in them"""
+
+    def __init__(self, samples, operations, trends, users, concurrency):
+        self.samples = samples
+        self.operations = operations
+        self.trends = trends
+        self.users = users
+        self.concurrency = concurrency
+
+    @property
+    def requests(self):
+        return sum(sample.requests for sample in self.samples)
+
+    @property
+    def errors(self):
+        return sum(sample.errors for sample in self.samples)
+
+    @property
+    def flagged(self):
+        return [trend for trend in self.trends if trend.flagged]
+
+    @property
+    def ok(self):
+        return not self.errors and not self.flagged
+
+    def lines(self, rows=12):
+        """Header, up to `rows` evenly spaced samples, then the trends"""
+        elapsed = self.samples[-1].elapsed if self.samples else 0.0
+        out = [
+            f"Soak run: {elapsed:.0f}s, {self.users} users, {self.concurrency} in flight, "
+            f"{self.requests} requests, {self.errors} errors",
+            f"{'seconds':>9}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'RSS MiB':>10}{'fds':>7}{'loop ms':>9}",
+        ]
+        step = max(1, -(-len(self.samples) // rows))
+        shown = self.samples[::step]
+        if self.samples and shown[-1] is not self.samples[-1]:
+            shown.append(self.samples[-1])
+        out.extend(sample.line() for sample in shown)
+        out.append("Operations: " + ", ".join(f"{name} {count}" for name, count in sorted(self.operations.items())))
+        out.extend(trend.line() for trend in self.trends)
+        return out
+
+
+class SoakRun:
+    """Drives the mixed workload and samples the server every `interval` seconds
+
+    `seeder(count)` may return (user_id, token) pairs to skip registering
+    through the API.
+    """
+
+    def __init__(self, base_url, users=20, concurrency=20, duration=3600.0, interval=10.0, mix=None,
+                 rss_probe=None, fd_probe=None, seeder=None, memory_tolerance=0.1, latency_tolerance=0.5,
+                 log=print, seed=None):
+        if users < 2:
+            raise ValueError("Soak mode needs at least 2 users to exchange messages")
+        self.base_url = base_url
+        self.users = users
+        self.concurrency = concurrency
+        self.duration = duration
+        self.interval = interval
+        self.mix = mix or DEFAULT_MIX
+        self.rss_probe = rss_probe
+        self.fd_probe = fd_probe
+        self.seeder = seeder
+        self.memory_tolerance = memory_tolerance
+        self.latency_tolerance = latency_tolerance
+        self.log = log
+        self.random = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.accounts = []
+        self.operations = {name: 0 for name in self.mix}
+        self._reset_interval()
+
+    def _reset_interval(self):
+        self.latencies = []
+        self.errors = 0
+        self.loop_ms = None
+
+    def _record(self, method, path, seconds, response):
+        """ApiClient recorder: interval latencies, errors and the API's reported loop delay"""
+        loop = [duration for name, duration, _ in parse_server_timing(response.headers.get("Server-Timing"))
+                if name == "loop"]
+        with self.lock:
+            self.latencies.append(seconds * 1000)
+            if response.status_code >= 400:
+                self.errors += 1
+            if loop:
+                self.loop_ms = max(self.loop_ms or 0.0, *loop)
+
+    def _register(self, client, index):
+        response = client.session().post("/auth/register", json={
+            "name": f"Soak User {index}",
+            "email": f"soak-{self.run_id}-{index}@example.com",
+            "password": "SoakPass123!",
+        })
+        response.raise_for_status()
+        result = response.json()
+        return result["user"]["id"], result["token"]
+
+    def _operation(self, rng, endpoint, payload, trips):
+        """One request; `trips` holds this worker's (session, trip id) pairs, so no two workers edit a trip"""
+        user_id, session = rng.choice(self.accounts)
+        peer_id = user_id
+        while peer_id == user_id:
+            peer_id, _ = rng.choice(self.accounts)
+        n = next(self.counter)
+
+        trip_id = None
+        if endpoint in ("PATCH /trips/:id", "DELETE /trips/:id"):
+            if not trips:
+                # Nothing to edit yet; keep the mix balanced by creating one
+                endpoint = "POST /trips"
+            elif endpoint == "DELETE /trips/:id":
+                session, trip_id = trips.pop(rng.randrange(len(trips)))
+            else:
+                session, trip_id = rng.choice(trips)
+
+        if endpoint == "POST /users/heartbeat":
+            session.post("/users/heartbeat")
+        elif endpoint == "GET /users/online":
+            session.get("/users/online")
+        elif endpoint == "POST /messages":
+            session.post("/messages", json={"recipientId": peer_id, "content": f"soak message {n}"})
+        elif endpoint == "GET /messages/:userId":
+            session.get(f"/messages/{peer_id}")
+        elif endpoint == "GET /messages/unread":
+            session.get("/messages/unread")
+        elif endpoint == "POST /trips":
+            response = session.post("/trips", json=trip_body(f"Soak trip {n}"))
+            if response.status_code in (200, 201):
+                trips.append((session, response.json()["id"]))
+        elif endpoint == "GET /trips":
+            session.get("/trips")
+        elif endpoint == "PATCH /trips/:id":
+            session.patch(f"/trips/{trip_id}", json={"title": f"Soak trip {n} (edited)"})
+        elif endpoint == "DELETE /trips/:id":
+            session.delete(f"/trips/{trip_id}")
+        elif endpoint == "POST /upload":
+            session.post("/upload", files=[("files", (f"soak-{n}.jpg", payload, "image/jpeg"))],
+                         data={"folder": "soak"})
+        else:
+            raise ValueError(f"Unknown endpoint in workload mix: {endpoint}")
+        with self.lock:
+            self.operations[endpoint] += 1
+
+    def _worker(self, seed, deadline, payload):
+        rng = random.Random(seed)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        trips = []
+        while time.perf_counter() < deadline:
+            try:
+                self._operation(rng, rng.choices(names, weights)[0], payload, trips)
+            except Exception:  # connection errors count like error responses
+                with self.lock:
+                    self.errors += 1
+
+    def _sample(self, elapsed):
+        with self.lock:
+            latencies, errors, loop_ms = self.latencies, self.errors, self.loop_ms
+            self._reset_interval()
+        return SoakSample(
+            elapsed, len(latencies), errors, latencies,
+            rss=self.rss_probe() if self.rss_probe else None,
+            fds=self.fd_probe() if self.fd_probe else None,
+            loop_ms=loop_ms,
+        )
+
+    def trends(self, samples):
+        series = [
+            ("server memory", "MiB", [s.rss / 1024 / 1024 if s.rss is not None else None for s in samples],
+             self.memory_tolerance, 16.0, True),
+            ("open file descriptors", "fds", [s.fds for s in samples], self.memory_tolerance, 10, True),
+            ("p95 latency", "ms", [s.p95 if s.requests else None for s in samples], self.latency_tolerance, 5.0, False),
+            ("event-loop delay", "ms", [s.loop_ms for s in samples], self.latency_tolerance, 5.0, False),
+        ]
+        found = (detect_trend(name, unit, values, tolerance, floor, monotonic)
+                 for name, unit, values, tolerance, floor, monotonic in series)
+        return [trend for trend in found if trend]
+
+    def run(self):
+        # One payload shared by every upload keeps the client side small
+        payload = os.urandom(UPLOAD_BYTES)
+        with ApiClient(self.base_url, max_per_host=self.concurrency, recorder=self._record) as client:
+            self.log(f"Preparing {self.users} soak users...")
+            if self.seeder:
+                accounts = self.seeder(self.users)
+            else:
+                accounts = [self._register(client, i) for i in range(self.users)]
+            self.accounts = [(user_id, client.session(token)) for user_id, token in accounts]
+            self._sample(0.0)
+
+            self.log(f"Soaking for {self.duration:.0f}s, sampling every {self.interval:g}s...")
+            started = time.perf_counter()
+            deadline = started + self.duration
+            workers = [
+                threading.Thread(target=self._worker, args=(self.random.random(), deadline, payload), daemon=True)
+                for _ in range(self.concurrency)
+            ]
+            for worker in workers:
+                worker.start()
+
+            samples = []
+            next_sample = started + self.interval
+            while next_sample <= deadline + 1e-6:
+                time.sleep(max(next_sample - time.perf_counter(), 0))
+                samples.append(self._sample(time.perf_counter() - started))
+                if len(samples) % max(1, round(60 / self.interval)) == 0:
+                    self.log(samples[-1].line())
+                next_sample += self.interval
+            for worker in workers:
+                worker.join()
+
+        return SoakReport(samples, self.operations, self.trends(samples), self.users, self.concurrency)
+
+
+def run_soak(base_url, **kwargs):
+    """Run a soak test and return its SoakReport"""
+    return SoakRun(base_url, **kwargs).run()
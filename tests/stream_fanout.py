@@ -0,0 +1,207 @@
+"""
+Fan-out harness for the GET /api/events server-sent events stream.
+
+Opens thousands of concurrent subscriptions, one per synthetic user, then:
+
+- sends messages to subscribed users and times send -> receipt on the
+  recipient's stream
+- brings one more user online with a heartbeat and times how long the
+  presence event takes to reach every subscriber
+
+It also samples server memory before and after the subscriptions open to
+estimate the cost of one open stream. `memory_probe()` returns the server's
+resident bytes: `tests.proc.ProcessMemory(pid)` for a local server; offline
+the fake shares this process, so the figure includes the client side too.
+
+Requires aiohttp (`pip install aiohttp`).
+"""
+
+import asyncio
+import json
+import time
+import uuid
+
+from tests.client import AsyncApiClient
+from tests.load import percentile
+
+
+async def read_events(response):
+    """Yield (event, data) pairs from a text/event-stream response"""
+    event, data = "message", []
+    while True:
+        line = await response.content.readline()
+        if not line:
+            return
+        line = line.decode().rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+
+
+class FanoutReport:
+    """Delivery latencies and memory for one fan-out run"""
+
+    def __init__(self, subscribers, messages, delivery, presence, connect_seconds, memory_per_stream=None):
+        self.subscribers = subscribers
+        self.messages = messages
+        self.delivery = sorted(delivery)
+        self.presence = sorted(presence)
+        self.connect_seconds = connect_seconds
+        self.memory_per_stream = memory_per_stream
+
+    @property
+    def missing_messages(self):
+        return self.messages - len(self.delivery)
+
+    @property
+    def missing_presence(self):
+        return self.subscribers - len(self.presence)
+
+    @property
+    def ok(self):
+        return not (self.missing_messages or self.missing_presence)
+
+    @staticmethod
+    def _latency(samples):
+        return (
+            f"p50 {percentile(samples, 50):.2f}ms, p95 {percentile(samples, 95):.2f}ms, "
+            f"p99 {percentile(samples, 99):.2f}ms, max {percentile(samples, 100):.2f}ms"
+        )
+
+    def lines(self):
+        out = [
+            f"Subscriptions: {self.subscribers} open in {self.connect_seconds:.2f}s",
+            f"Message delivery ({len(self.delivery)}/{self.messages}): {self._latency(self.delivery)}",
+            f"Presence fan-out ({len(self.presence)}/{self.subscribers}): {self._latency(self.presence)}",
+        ]
+        if self.memory_per_stream is not None:
+            out.append(f"Memory: {self.memory_per_stream / 1024:.1f} KiB per open stream")
+        return out
+
+
+class StreamFanout:
+    """Opens `subscribers` event streams and measures delivery to them
+
+    `seeder(count)` may return (user_id, token) pairs to skip registering
+    through the API.
+    """
+
+    def __init__(self, base_url, subscribers=2000, messages=500, concurrency=50, timeout=15.0,
+                 seeder=None, memory_probe=None, log=print):
+        self.base_url = base_url
+        self.subscribers = subscribers
+        self.messages = messages
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.seeder = seeder
+        self.memory_probe = memory_probe
+        self.log = log
+        self.run_id = uuid.uuid4().hex[:8]
+
+    async def _register(self, client, index):
+        payload = {
+            "name": f"Stream User {index}",
+            "email": f"stream-{self.run_id}-{index}@example.com",
+            "password": "StreamPass123!",
+        }
+        status, _, body = await client.session().request("POST", "/auth/register", json=payload)
+        if status not in (200, 201):
+            raise RuntimeError(f"Registering stream user {index} failed: {status} - {body[:200]!r}")
+        result = json.loads(body)
+        return result["user"]["id"], result["token"]
+
+    async def _accounts(self, client, count, limit):
+        if self.seeder:
+            return self.seeder(count)
+
+        async def register(index):
+            async with limit:
+                return await self._register(client, index)
+
+        return await asyncio.gather(*(register(i) for i in range(count)))
+
+    async def _subscribe(self, client, token, ready, received, presence, expected_presence):
+        async with client.http.get(
+            f"{client.base_url}/events", headers={"Authorization": f"Bearer {token}"}, timeout=None
+        ) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Opening event stream failed: {response.status}")
+            async for event, data in read_events(response):
+                now = time.perf_counter()
+                if event == "ready":
+                    ready.set()
+                elif event == "message":
+                    received[data["content"]] = now
+                elif event == "presence" and data["userId"] == expected_presence and data["online"]:
+                    presence.append(now)
+
+    async def run(self):
+        limit = asyncio.Semaphore(self.concurrency)
+        # Every stream holds a connection for the whole run
+        async with AsyncApiClient(self.base_url, limit=self.subscribers + self.concurrency) as client:
+            self.log(f"Preparing {self.subscribers} subscribers...")
+            # Two extra accounts: one sends the messages, one comes online
+            accounts = await self._accounts(client, self.subscribers + 2, limit)
+            subscribers, (_, sender_token), (newcomer_id, newcomer_token) = (
+                accounts[:self.subscribers], accounts[-2], accounts[-1]
+            )
+
+            memory_before = self.memory_probe() if self.memory_probe else None
+            received, presence, sent_at = {}, [], {}
+            readies = [asyncio.Event() for _ in subscribers]
+
+            self.log(f"Opening {self.subscribers} event streams...")
+            started = time.perf_counter()
+            streams = [
+                asyncio.create_task(self._subscribe(client, token, ready, received, presence, newcomer_id))
+                for (_, token), ready in zip(subscribers, readies)
+            ]
+            try:
+                await asyncio.wait_for(asyncio.gather(*(ready.wait() for ready in readies)), self.timeout)
+                connect_seconds = time.perf_counter() - started
+                memory_per_stream = None
+                if memory_before is not None:
+                    memory_per_stream = max(self.memory_probe() - memory_before, 0) / self.subscribers
+
+                self.log(f"Sending {self.messages} messages...")
+                sender = client.session(sender_token)
+
+                async def send(index):
+                    recipient_id, _ = subscribers[index % len(subscribers)]
+                    content = f"fanout {self.run_id} {index}"
+                    async with limit:
+                        sent_at[content] = time.perf_counter()
+                        await sender.request("POST", "/messages", json={"recipientId": recipient_id, "content": content})
+
+                await asyncio.gather(*(send(i) for i in range(self.messages)))
+
+                self.log("Broadcasting a presence change...")
+                presence_sent = time.perf_counter()
+                await client.session(newcomer_token).request("POST", "/users/heartbeat")
+
+                deadline = time.perf_counter() + self.timeout
+                while time.perf_counter() < deadline and (
+                    len(received) < self.messages or len(presence) < self.subscribers
+                ):
+                    await asyncio.sleep(0.05)
+            finally:
+                for stream in streams:
+                    stream.cancel()
+                await asyncio.gather(*streams, return_exceptions=True)
+
+        delivery = [(received[content] - sent) * 1000 for content, sent in sent_at.items() if content in received]
+        presence_latency = [(at - presence_sent) * 1000 for at in presence]
+        return FanoutReport(self.subscribers, self.messages, delivery, presence_latency,
+                            connect_seconds, memory_per_stream)
+
+
+def run_stream_fanout(base_url, **kwargs):
+    """Run the fan-out harness synchronously and return its FanoutReport"""
+    return asyncio.run(StreamFanout(base_url, **kwargs).run())
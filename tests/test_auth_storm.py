@@ -0,0 +1,47 @@
+"""Login storms don't hold up unrelated routes; old hashes are upgraded at login (offline)"""
+
+from tests.auth_storm import run_auth_storm
+from tests.client import ApiClient
+from tests.fake_api import FakeApiServer, FakeStore, PASSWORD_MAX_QUEUED, PASSWORD_POOL_SIZE, _password_cost
+from tests.load import percentile
+
+
+def test_probe_routes_stay_fast_during_a_login_storm():
+    with FakeApiServer(store=FakeStore(password_cost=13)) as server:
+        report = run_auth_storm(server.base_url, accounts=50, concurrency=20, duration=2.0, baseline=1.0,
+                                log=lambda _: None, seed=1)
+
+    assert report.errors == 0
+    assert report.logins > 0
+    # Heartbeat and online don't wait behind the hashes
+    assert report.probe_p99_during < percentile(report.login_latencies, 50)
+
+
+def test_full_hashing_queue_answers_503_with_retry_after():
+    store = FakeStore()
+    with FakeApiServer(store=store) as server, ApiClient(server.base_url) as client:
+        session = client.session()
+        assert session.post("/auth/register", json={
+            "name": "Busy", "email": "busy@example.com", "password": "BusyPass123!",
+        }).status_code == 201
+
+        store.passwords.pending = PASSWORD_POOL_SIZE + PASSWORD_MAX_QUEUED
+        response = session.post("/auth/login", json={"email": "busy@example.com", "password": "BusyPass123!"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+
+def test_login_rehashes_at_the_current_cost():
+    store = FakeStore(password_cost=0)
+    credentials = {"email": "rehash@example.com", "password": "RehashPass123!"}
+    with FakeApiServer(store=store) as server, ApiClient(server.base_url) as client:
+        session = client.session()
+        assert session.post("/auth/register", json={"name": "Rehash", **credentials}).status_code == 201
+
+        store.password_cost = 4
+        assert session.post("/auth/login", json=credentials).status_code == 200
+        assert _password_cost(store.users_by_email[credentials["email"]]["password"]) == 4
+        assert session.post("/auth/login", json=credentials).status_code == 200
+        assert session.post("/auth/login", json={**credentials, "password": "wrong-password"}).status_code == 401
+
+    assert store.password_rehashes == 1
@@ -0,0 +1,60 @@
+"""Tests for the latency histogram, baseline comparison and benchmark runner"""
+
+import random
+
+from tests.bench import (
+    BENCHMARK_ROUTES,
+    BenchmarkRunner,
+    LatencyHistogram,
+    find_regressions,
+    route_template,
+)
+
+
+def test_histogram_percentiles_within_precision():
+    rng = random.Random(7)
+    samples = sorted(rng.randint(100, 5_000_000) for _ in range(10_000))
+    histogram = LatencyHistogram(significant_figures=3)
+    for value in samples:
+        histogram.record(value)
+
+    for pct in (50, 95, 99):
+        exact = samples[int(pct / 100 * len(samples)) - 1]
+        assert abs(histogram.percentile(pct) - exact) <= exact * 0.002
+    assert histogram.count == len(samples)
+    assert histogram.max == samples[-1]
+
+
+def test_histogram_merge_matches_single_histogram():
+    combined, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for value in range(1, 2000):
+        combined.record(value * 37)
+        (left if value % 2 else right).record(value * 37)
+    left.merge(right)
+    assert left.counts == combined.counts
+    assert left.percentile(95) == combined.percentile(95)
+
+
+def test_route_template_collapses_ids():
+    user_id = "4f1c2b1e-8a51-4a4e-9d6b-0c2f7e9f3a11"
+    assert route_template("GET", f"/messages/{user_id}") == "GET /messages/:userId"
+    assert route_template("DELETE", f"/trips/{user_id}") == "DELETE /trips/:id"
+    assert route_template("GET", "/trips/public/all?page=2") == "GET /trips/public/all"
+
+
+def test_find_regressions_uses_threshold():
+    baseline = {"routes": {"GET /users/online": {"p95": 10.0}, "POST /messages": {"p95": 10.0}}}
+    current = {"routes": {
+        "GET /users/online": {"p95": 11.9},
+        "POST /messages": {"p95": 12.5},
+        "GET /trips": {"p95": 99.0},  # not in the baseline yet
+    }}
+    regressions = find_regressions(current, baseline, threshold=0.2)
+    assert [r.route for r in regressions] == ["POST /messages"]
+
+
+def test_runner_covers_benchmark_routes(fake_server):
+    result = BenchmarkRunner(fake_server.base_url, iterations=2).run()
+    assert result.failures == 0
+    assert all(result.histograms[route].count for route in BENCHMARK_ROUTES)
+    assert result.histograms["POST /auth/register"].count == 4
@@ -0,0 +1,21 @@
+"""Conversation benchmark harness against the offline fake
+
+The fake is a Python stand-in, so its timings say nothing about the
+handler or Postgres; run --conversation-bench against a live server for
+that. What it can check is the property the bench relies on: a fetch
+returns one page, whatever the size of the history.
+"""
+
+from tests.conversation_bench import ConversationBenchmark, history_text
+
+
+def test_page_size_does_not_grow_with_history(fake_server):
+    def seeder(sender_id, recipient_id, count):
+        for i in range(count):
+            fake_server.store.insert_message(sender_id, recipient_id, history_text(i))
+
+    rows = ConversationBenchmark(
+        fake_server.base_url, sizes=(100, 2_000), samples=3, seeder=seeder, log=lambda _: None
+    ).run()
+
+    assert rows[0].page_bytes == rows[1].page_bytes
@@ -0,0 +1,54 @@
+"""Generated datasets are deterministic, skewed and usable through the API (offline)"""
+
+import statistics
+from collections import Counter
+
+from tests.client import ApiClient
+from tests.dataset import DATASET_PASSWORD, DatasetGenerator, DatasetSpec, FakeStoreLoader, load_dataset
+
+
+def small_spec(seed=0):
+    return DatasetSpec(users=500, trips=2_000, messages=20_000, seed=seed, label=f"small-{seed}")
+
+
+def test_same_seed_same_rows():
+    first, second = DatasetGenerator(small_spec()), DatasetGenerator(small_spec())
+    assert list(first.messages()) == list(second.messages())
+    assert list(first.trips()) == list(second.trips())
+    assert next(DatasetGenerator(small_spec(seed=1)).users())["id"] != next(first.users())["id"]
+
+
+def test_messages_and_trips_are_skewed():
+    generator = DatasetGenerator(small_spec())
+    per_conversation = Counter(message["conversation_key"] for message in generator.messages())
+    sizes = sorted(per_conversation.values())
+    assert sizes[-1] > 50 * statistics.median(sizes)
+
+    per_owner = sorted(Counter(trip["user_id"] for trip in generator.trips()).values())
+    assert per_owner[-1] > 20 * statistics.median(per_owner)
+
+
+def test_loaded_dataset_is_served_by_the_api(fake_server):
+    generator = DatasetGenerator(small_spec())
+    report = load_dataset(generator, FakeStoreLoader(fake_server.store), log=lambda _: None, batch_size=1_000)
+    assert {table: rows for table, (rows, _) in report.tables.items()} == {
+        "users": 500, "trips": 2_000, "messages": 20_000,
+    }
+
+    busiest = Counter(message["conversation_key"] for message in generator.messages()).most_common(1)[0][0]
+    user_id, other_id = busiest.split(":")
+    email = next(user["email"] for user in generator.users() if user["id"] == user_id)
+
+    with ApiClient(fake_server.base_url) as client:
+        response = client.session().post("/auth/login", json={"email": email, "password": DATASET_PASSWORD})
+        assert response.status_code == 200
+        session = client.session(response.json()["token"])
+
+        page = session.get(f"/messages/{other_id}", params={"limit": 20})
+        assert page.status_code == 200
+        assert len(page.json()) == 20
+        assert page.headers["X-Has-More"] == "true"
+
+        feed = session.get("/trips/public/all")
+        assert feed.status_code == 200
+        assert feed.json()["trips"]
@@ -0,0 +1,332 @@
+"""Contract tests for the offline fake API and the backend suite running on it"""
+
+import base64
+import time
+
+import pytest
+
+from backend_test import TuckerTripsBackendTester
+from tests.client import ApiClient
+from tests.fake_api import FakeApiServer, FakeStore, sign_token
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def server(clock):
+    with FakeApiServer(store=FakeStore(clock=clock)) as running:
+        yield running
+
+
+@pytest.fixture
+def client(server):
+    with ApiClient(server.base_url) as pooled:
+        yield pooled
+
+
+def register(client, name):
+    response = client.session().post("/auth/register", json={
+        "name": name,
+        "email": f"{name.lower()}@example.com",
+        "password": "SecurePass123!",
+    })
+    assert response.status_code == 201
+    result = response.json()
+    return result["user"]["id"], client.session(result["token"])
+
+
+def test_backend_suite_passes_offline(server):
+    assert TuckerTripsBackendTester(server.base_url).run_all_tests()
+
+
+def test_server_starts_quickly():
+    started = time.perf_counter()
+    with FakeApiServer():
+        elapsed = time.perf_counter() - started
+    assert elapsed < 0.5
+
+
+def test_duplicate_registration_conflicts(client):
+    register(client, "Alice")
+    response = client.session().post("/auth/register", json={
+        "name": "Alice", "email": "alice@example.com", "password": "SecurePass123!",
+    })
+    assert response.status_code == 409
+
+
+def test_login_and_me(client):
+    user_id, _ = register(client, "Alice")
+    response = client.session().post("/auth/login", json={"email": "alice@example.com", "password": "SecurePass123!"})
+    assert response.status_code == 200
+    me = client.session(response.json()["token"]).get("/auth/me")
+    assert me.json()["user"]["id"] == user_id
+
+    wrong = client.session().post("/auth/login", json={"email": "alice@example.com", "password": "nope"})
+    assert wrong.status_code == 401
+
+
+def test_tampered_and_expired_tokens_are_rejected(client, clock, server):
+    user_id, alice = register(client, "Alice")
+    forged = sign_token({"userId": user_id, "email": "alice@example.com"}, "wrong-secret")
+    assert client.session(forged).get("/auth/me").status_code == 401
+
+    clock.advance(7 * 24 * 60 * 60)
+    assert alice.get("/auth/me").status_code == 401
+
+
+def test_online_window_is_five_minutes(client, clock):
+    alice_id, alice = register(client, "Alice")
+    _, bob = register(client, "Bob")
+    alice.post("/users/heartbeat")
+
+    clock.advance(4 * 60)
+    assert [user["id"] for user in bob.get("/users/online").json()] == [alice_id]
+
+    clock.advance(2 * 60)
+    assert bob.get("/users/online").json() == []
+
+
+def test_conversation_order_and_read_marking(client):
+    alice_id, alice = register(client, "Alice")
+    bob_id, bob = register(client, "Bob")
+    for text in ("one", "two"):
+        alice.post("/messages", json={"recipientId": bob_id, "content": text})
+    bob.post("/messages", json={"recipientId": alice_id, "content": "three"})
+
+    history = bob.get(f"/messages/{alice_id}").json()
+    assert [message["content"] for message in history] == ["one", "two", "three"]
+    assert not any(message["read"] for message in history)
+
+    # Bob's fetch marked Alice's messages read, but not his own reply
+    history = alice.get(f"/messages/{bob_id}").json()
+    assert [message["read"] for message in history] == [True, True, False]
+
+
+def test_message_validation(client):
+    _, alice = register(client, "Alice")
+    assert alice.post("/messages", json={"recipientId": "not-a-uuid", "content": "hi"}).status_code == 400
+
+
+def test_trip_lifecycle(client):
+    _, alice = register(client, "Alice")
+    bob_id, bob = register(client, "Bob")
+    trip = alice.post("/trips", json={
+        "title": "Kyoto", "destination": "Japan", "startDate": "2025-04-01", "endDate": "2025-04-10",
+        "visibility": "public",
+    }).json()
+
+    assert alice.get("/trips").json()["pagination"]["total"] == 1
+    public = bob.get("/trips/public/all").json()["trips"]
+    assert [(t["id"], t["userName"]) for t in public] == [(trip["id"], "Alice")]
+    assert bob.get(f"/trips/{trip['id']}").status_code == 404
+
+    shared = alice.post(f"/trips/{trip['id']}/share", json={"recipientEmail": "bob@example.com"}).json()
+    assert shared["isNewUser"] is False
+    assert bob.get("/trips/shared").json()["trips"][0]["sharedWith"] == [bob_id]
+
+    updated = alice.patch(f"/trips/{trip['id']}", json={"visibility": "private"}).json()
+    assert updated["visibility"] == "private"
+    assert bob.get("/trips/public/all").json()["trips"] == []
+
+    assert alice.delete(f"/trips/{trip['id']}").json() == {"success": True}
+    assert alice.get(f"/trips/{trip['id']}").status_code == 404
+    assert bob.get("/trips/shared").json()["trips"] == []
+
+
+def test_trip_create_keeps_the_modal_contract(client):
+    bob_id, _ = register(client, "Bob")
+    _, alice = register(client, "Alice")
+
+    # As components/NewTripModal.js sends it: images joined into one string, no end date
+    response = alice.post("/trips", json={
+        "title": "Oslo", "destination": "Norway", "startDate": "2025-06-01",
+        "tripImages": "http://storage.local/a.jpg,http://storage.local/b.jpg", "sharedWith": [bob_id],
+    })
+    assert response.status_code == 200
+    trip = response.json()
+    assert trip["endDate"] == "2025-06-01"
+    assert trip["tripImages"] == "http://storage.local/a.jpg,http://storage.local/b.jpg"
+    assert trip["sharedWith"] == []
+
+    missing = alice.post("/trips", json={"title": "Oslo", "destination": "Norway"})
+    assert missing.status_code == 400
+    assert missing.json()["error"] == "Title, destination, and start date are required"
+
+
+def test_since_page_only_marks_returned_messages_read(client):
+    alice_id, alice = register(client, "Alice")
+    bob_id, bob = register(client, "Bob")
+    alice.post("/messages", json={"recipientId": bob_id, "content": "first"})
+    cursor = bob.get(f"/messages/{alice_id}").headers["X-Latest-Cursor"]
+    for text in ("second", "third"):
+        alice.post("/messages", json={"recipientId": bob_id, "content": text})
+
+    page = bob.get(f"/messages/{alice_id}", params={"since": cursor, "limit": 1})
+    assert [m["content"] for m in page.json()] == ["second"]
+    assert page.headers["X-Has-More"] == "true"
+
+    history = alice.get(f"/messages/{bob_id}").json()
+    assert [m["read"] for m in history] == [True, True, False]
+
+
+def test_heartbeats_are_buffered_and_online_list_is_cached(client, clock, server):
+    alice_id, alice = register(client, "Alice")
+    _, bob = register(client, "Bob")
+    store = server.store
+
+    alice.post("/users/heartbeat")
+    assert store.presence_writes == 0
+
+    # Alice is new to the snapshot, so the first read rebuilds it and flushes
+    assert [user["id"] for user in bob.get("/users/online").json()] == [alice_id]
+    assert (store.presence_writes, store.snapshot_builds) == (1, 1)
+
+    for _ in range(10):
+        alice.post("/users/heartbeat")
+        bob.get("/users/online")
+    assert (store.presence_writes, store.snapshot_builds) == (1, 1)
+
+    clock.advance(6)
+    bob.get("/users/online")
+    assert (store.presence_writes, store.snapshot_builds) == (2, 2)
+
+
+def test_new_arrivals_do_not_rebuild_the_online_snapshot(client, clock, server):
+    _, bob = register(client, "Bob")
+    store = server.store
+    bob.get("/users/online")
+    assert store.snapshot_builds == 1
+
+    arrivals = [register(client, f"User{i}") for i in range(20)]
+    for user_id, session in arrivals:
+        session.post("/users/heartbeat")
+        # Listed straight away, from memory rather than a rebuild
+        assert user_id in {user["id"] for user in bob.get("/users/online").json()}
+    assert store.snapshot_builds == 1
+
+    clock.advance(6)
+    online = bob.get("/users/online").json()
+    assert store.snapshot_builds == 2
+    assert {user["id"] for user in online} == {user_id for user_id, _ in arrivals}
+
+
+def test_login_goes_through_the_presence_buffer(client, clock, server):
+    _, bob = register(client, "Bob")
+    register(client, "Carol")
+    store = server.store
+
+    response = client.session().post("/auth/login", json={"email": "carol@example.com", "password": "SecurePass123!"})
+    carol_id = response.json()["user"]["id"]
+    assert store.presence_writes == 0
+    assert carol_id in store.pending
+
+    # Any request flushes the buffer once it is due; no timer is involved
+    clock.advance(6)
+    bob.get("/auth/me")
+    assert store.presence_writes == 1
+    assert store.users[carol_id]["is_online"]
+    assert [user["id"] for user in bob.get("/users/online").json()] == [carol_id]
+
+
+def test_conversation_fetch_is_one_round_trip(client, server):
+    alice_id, alice = register(client, "Alice")
+    bob_id, bob = register(client, "Bob")
+    sent = alice.post("/messages", json={"recipientId": bob_id, "content": "hello"}).json()
+
+    before = server.store.db_round_trips
+    assert bob.get(f"/messages/{alice_id}").json()[0]["read"] is False
+    assert server.store.db_round_trips - before == 1
+
+    history = alice.get(f"/messages/{bob_id}").json()
+    assert [(m["id"], m["read"]) for m in history] == [(sent["id"], True)]
+
+
+def test_auth_cache_outcome_is_only_sent_when_enabled(client, server):
+    _, alice = register(client, "Alice")
+    assert "X-Auth-Cache" not in alice.get("/auth/me").headers
+
+    server.store.auth_cache_debug = True
+    assert alice.get("/auth/me").headers["X-Auth-Cache"] == "hit"
+
+
+def test_cached_tokens_still_expire(client, clock, server):
+    server.store.auth_cache_debug = True
+    _, alice = register(client, "Alice")
+    assert alice.get("/auth/me").headers["X-Auth-Cache"] == "miss"
+    assert alice.get("/auth/me").headers["X-Auth-Cache"] == "hit"
+
+    clock.advance(7 * 24 * 60 * 60)
+    assert alice.get("/auth/me").status_code == 401
+
+
+def test_public_feed_cursor_walk_has_no_gaps(client, clock):
+    _, alice = register(client, "Alice")
+    _, bob = register(client, "Bob")
+    for i in range(25):
+        clock.advance(1)
+        alice.post("/trips", json={
+            "title": f"Trip {i}", "destination": "Peru", "startDate": "2025-05-01", "endDate": "2025-05-09",
+            "visibility": "public",
+        })
+
+    first = bob.get("/trips/public/all", params={"limit": 10}).json()
+    seen, cursor = [t["title"] for t in first["trips"]], first["pagination"]["nextCursor"]
+    while cursor:
+        page = bob.get("/trips/public/all", params={"limit": 10, "cursor": cursor}).json()
+        assert page["pagination"]["page"] is None
+        seen += [t["title"] for t in page["trips"]]
+        cursor = page["pagination"]["nextCursor"]
+    assert seen == [f"Trip {i}" for i in reversed(range(25))]
+
+    # A new trip clears the cached first page
+    clock.advance(1)
+    alice.post("/trips", json={
+        "title": "Trip 25", "destination": "Peru", "startDate": "2025-05-01", "endDate": "2025-05-09",
+        "visibility": "public",
+    })
+    assert bob.get("/trips/public/all", params={"limit": 10}).json()["trips"][0]["title"] == "Trip 25"
+
+
+def test_crafted_cursors_are_rejected(client):
+    alice_id, alice = register(client, "Alice")
+    crafted = base64.urlsafe_b64encode(
+        b'2025-01-01T00:00:00Z|00000000-0000-0000-0000-000000000000),or(visibility.eq.private'
+    ).decode().rstrip("=")
+
+    for path, name in (("/trips/public/all", "cursor"), ("/trips/shared", "cursor"),
+                       (f"/messages/{alice_id}", "before"), (f"/messages/{alice_id}", "since")):
+        for cursor in (crafted, "not-a-cursor"):
+            response = alice.get(path, params={name: cursor})
+            assert response.status_code == 400, (path, name, cursor)
+            assert response.json()["error"] == "Invalid cursor"
+
+
+def test_upload_keeps_per_file_results_in_order(client):
+    _, alice = register(client, "Alice")
+    files = [
+        ("files", ("a.jpg", b"\xff\xd8jpeg", "image/jpeg")),
+        ("files", ("notes.txt", b"hello", "text/plain")),
+        ("files", ("b.png", b"\x89PNG\r\n", "image/png")),
+    ]
+    result = alice.post("/upload", files=files, data={"folder": "trips"}).json()
+
+    assert [entry["originalName"] for entry in result["uploaded"]] == ["a.jpg", "b.png"]
+    assert [entry["file"] for entry in result["failed"]] == ["notes.txt"]
+    assert result["success"] is False
+    assert result["message"] == "Uploaded 2 file(s), 1 failed"
+    empty = alice.post("/upload", files=[("folder", (None, "trips"))])
+    assert (empty.status_code, empty.json()["error"]) == (400, "No files provided")
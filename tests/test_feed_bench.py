@@ -0,0 +1,22 @@
+"""Feed benchmark harness against the offline fake
+
+The fake is a Python stand-in, so its timings say nothing about the feed
+queries or their indexes; run --feed-bench against a live server for that.
+What it can check is that the cursors the bench walks reach deep pages
+that are as full as shallow ones, so the timings compare like with like.
+"""
+
+from tests.feed_bench import FeedBenchmark, trip_body
+
+
+def test_deep_cursor_pages_are_full_pages(fake_server):
+    def seeder(user_id, count):
+        for i in range(count):
+            fake_server.store.create_trip(user_id, trip_body(i))
+
+    rows = FeedBenchmark(
+        fake_server.base_url, trips=2_000, pages=(1, 10, 100), samples=3, seeder=seeder, log=lambda _: None
+    ).run()
+
+    # Page 1 reports its page number, cursor pages report null, so compare those two
+    assert rows[1].page_bytes == rows[2].page_bytes
@@ -0,0 +1,30 @@
+"""Isolated scenarios run in parallel, rerun cleanly and merge into one report (offline)"""
+
+from tests.fake_api import FakeApiServer, FakeStore
+from tests.parallel import ParallelSuite
+
+
+def test_parallel_suite_reruns_against_the_same_store():
+    # Database latency dominates, as against a real backend
+    with FakeApiServer(store=FakeStore(db_latency=0.01)) as server:
+        first = ParallelSuite(server.base_url, output=lambda _: None).run()
+        second = ParallelSuite(server.base_url, output=lambda _: None).run()
+
+    for report in (first, second):
+        assert report.failed == 0, report.lines()
+        assert [result.name for result in report.results][0] == "User Registration and Login"
+        assert len(report.results) == report.workers == 10
+
+    slowest = max(result.setup_seconds + result.seconds for result in second.results)
+    assert second.wall_seconds < second.serial_seconds / 2
+    assert second.wall_seconds < slowest * 2
+
+
+def test_online_tracking_gets_its_own_registration_and_heartbeat(fake_server):
+    lines = []
+    report = ParallelSuite(fake_server.base_url, workers=1, output=lines.append).run()
+
+    assert report.failed == 0
+    online = next(result for result in report.results if result.name == "Online User Tracking")
+    assert online.setup_seconds > 0
+    assert any("Bob found in online users" in line for line in online.lines)
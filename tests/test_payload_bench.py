@@ -0,0 +1,40 @@
+"""Trip list projections and response compression (offline)"""
+
+from tests.client import ApiClient
+from tests.payload_bench import LIST_FIELDS, PayloadBenchmark, find_row
+
+
+def test_projected_and_compressed_lists_are_a_fraction_of_the_full_payload(fake_server):
+    rows = PayloadBenchmark(fake_server.base_url, samples=3, log=lambda _: None).run()
+
+    full = find_row(rows, "GET /trips", "identity")
+    projected = find_row(rows, "GET /trips ?fields", "identity")
+    gzipped = find_row(rows, "GET /trips", "gzip")
+    assert full.content_encoding is None
+    assert gzipped.content_encoding == "gzip"
+    assert projected.wire_bytes * 5 < full.wire_bytes
+    assert gzipped.wire_bytes * 3 < full.wire_bytes
+    # The detail view keeps everything: one trip outweighs a projected page of ten
+    assert find_row(rows, "GET /trips/:id", "identity").wire_bytes > projected.wire_bytes
+
+
+def test_fields_selects_only_the_requested_fields(fake_server):
+    with ApiClient(fake_server.base_url) as client:
+        token = client.session().post("/auth/register", json={
+            "name": "Fields", "email": "fields@example.com", "password": "FieldsPass123!",
+        }).json()["token"]
+        session = client.session(token)
+        session.post("/trips", json={
+            "title": "Porto", "destination": "Portugal", "startDate": "2025-05-01", "endDate": "2025-05-03",
+            "visibility": "public",
+        })
+
+        fields = ",".join(LIST_FIELDS)
+        mine = session.get("/trips", params={"fields": fields}).json()["trips"]
+        feed = session.get("/trips/public/all", params={"fields": "id,title,userName"})
+        unknown = session.get("/trips", params={"fields": "title,password"})
+
+    assert list(mine[0]) == list(LIST_FIELDS)
+    assert feed.json()["trips"] == [{"id": mine[0]["id"], "title": "Porto", "userName": "Fields"}]
+    assert unknown.status_code == 400
+    assert "password" in unknown.json()["error"]
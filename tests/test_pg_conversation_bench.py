@@ -0,0 +1,24 @@
+"""conversation_key migration on a real Postgres (skipped without one)
+
+Set TEST_DATABASE_URL to a database the role can create schemas in.
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("psycopg")
+DSN = os.environ.get("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not DSN, reason="TEST_DATABASE_URL is not set")
+
+
+def test_conversation_key_index_serves_the_page():
+    from tests.pg_conversation_bench import PgConversationBenchmark
+
+    rows = PgConversationBenchmark(
+        DSN, messages=200_000, sizes=(1_000, 20_000), users=5_000, samples=5, log=lambda _: None
+    ).run()
+
+    for row in rows:
+        assert "idx_messages_conversation_key_created" in row.after.plan
+        assert "Sort" not in row.after.plan
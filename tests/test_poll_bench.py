@@ -0,0 +1,62 @@
+"""ETag / If-None-Match on the polled routes (offline)"""
+
+import time
+
+from tests.client import ApiClient
+from tests.poll_bench import PollBenchmark
+from tests.server_timing import parse_server_timing
+
+
+def _register(client, name, email):
+    response = client.session().post("/auth/register", json={"name": name, "email": email, "password": "Pass123!"})
+    return client.session(response.json()["token"])
+
+
+def test_matching_if_none_match_gets_an_empty_304_until_something_changes(fake_server):
+    with ApiClient(fake_server.base_url) as client:
+        owner = _register(client, "Owner", "owner@example.com")
+        friend = _register(client, "Friend", "friend@example.com")
+        friend.post("/users/heartbeat")
+        trip_id = owner.post("/trips", json={
+            "title": "Oslo", "destination": "Norway", "startDate": "2025-02-01", "endDate": "2025-02-05",
+            "visibility": "public",
+        }).json()["id"]
+
+        paths = ["/trips", "/trips/public/all", f"/trips/{trip_id}", "/users/online"]
+        etags = {path: owner.get(path).headers["ETag"] for path in paths}
+        repeats = {path: owner.get(path, headers={"If-None-Match": etags[path]}) for path in paths}
+        wildcard = owner.get("/trips", headers={"If-None-Match": "*"})
+
+        time.sleep(0.002)
+        owner.patch(f"/trips/{trip_id}", json={"title": "Bergen"})
+        friend.post("/users/heartbeat")
+        after_write = {path: owner.get(path, headers={"If-None-Match": etags[path]}) for path in paths}
+
+    for path, response in repeats.items():
+        assert response.status_code == 304, path
+        assert response.content == b""
+        assert response.headers["ETag"] == etags[path]
+    assert wildcard.status_code == 304
+    # /trips answers from the count query alone
+    queries = {desc for name, _, desc in parse_server_timing(repeats["/trips"].headers["Server-Timing"])
+               if name == "db"}
+    assert queries == {"trips.count"}
+
+    for path, response in after_write.items():
+        assert response.status_code == 200, path
+        assert response.headers["ETag"] != etags[path]
+    assert after_write[f"/trips/{trip_id}"].json()["title"] == "Bergen"
+
+
+def test_polling_with_etags_saves_bytes_and_server_time(fake_server):
+    report = PollBenchmark(fake_server.base_url, pollers=4, rounds=12, write_every=4, trips=6,
+                           log=lambda _: None).run()
+
+    assert report.stale == 0
+    assert report.writes == 2
+    for route, stats in report.conditional.items():
+        # First poll of each tab plus one per write
+        assert stats.ok == 4 * (1 + report.writes), route
+        assert report.blind[route].not_modified == 0
+    assert report.bytes_saved > 0.5
+    assert report.server_time_saved > 0
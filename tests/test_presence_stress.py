@@ -0,0 +1,23 @@
+"""Presence stress test: 5k users heartbeating against the offline fake"""
+
+import uuid
+
+from tests.fake_api import PRESENCE_FLUSH_BATCH
+from tests.presence_stress import run_presence_stress
+
+
+def test_five_thousand_heartbeating_users(fake_server):
+    store = fake_server.store
+
+    def seeder(count):
+        run_id = uuid.uuid4().hex[:8]
+        users = [store.create_user(f"User {i}", f"user-{run_id}-{i}@example.com", "StressPass123!")
+                 for i in range(count)]
+        return [(user["id"], store.issue_token(user)) for user in users]
+
+    report = run_presence_stress(fake_server.base_url, users=5000, rounds=2, seeder=seeder,
+                                 write_counter=lambda: store.presence_writes, log=lambda _: None)
+
+    assert report.ok, report.lines()
+    # One UPDATE per batch of heartbeats rather than one per heartbeat
+    assert report.writes <= report.heartbeats // PRESENCE_FLUSH_BATCH + report.elapsed / 5 + 2
@@ -0,0 +1,23 @@
+"""Route table matching, and the route bench harness against the offline fake
+
+The fake's Python router says nothing about dispatch cost in lib/router.js
+(run --route-bench against a live server to compare the first and last
+routes), so the bench test checks that both routes reach their handlers.
+"""
+
+from tests.fake_api import ROUTER
+from tests.route_bench import RouteDispatchBenchmark
+
+
+def test_router_prefers_fixed_paths():
+    assert ROUTER.match("GET", ("trips", "shared"))[2] == {}
+    assert ROUTER.match("GET", ("trips", "abc"))[2] == {"id": "abc"}
+    assert ROUTER.match("POST", ("trips", "abc", "share"))[2] == {"id": "abc"}
+    assert ROUTER.match("PUT", ("trips", "abc")) is None
+
+
+def test_both_bench_routes_reach_their_handlers(fake_server):
+    samples = RouteDispatchBenchmark(fake_server.base_url, requests=20, log=lambda _: None).run()
+
+    # An unmatched request would time the table's miss path, not the route
+    assert [(s.unmatched, len(s.dispatch)) for s in samples] == [(0, 20), (0, 20)]
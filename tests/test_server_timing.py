@@ -0,0 +1,38 @@
+"""Server-Timing phases are emitted per request and broken down per route (offline)"""
+
+from tests.client import ApiClient
+from tests.fake_api import FakeApiServer, FakeStore
+from tests.server_timing import PhaseBreakdown, parse_server_timing
+
+
+def test_parse_server_timing():
+    assert parse_server_timing('auth;dur=0.5, db;dur=3.25;desc="users.select", route;dur=0.01, cache') == [
+        ("auth", 0.5, None), ("db", 3.25, "users.select"), ("route", 0.01, None), ("cache", 0.0, None),
+    ]
+    assert parse_server_timing(None) == []
+
+
+def test_conversation_phases_add_up_per_route():
+    phases = PhaseBreakdown()
+    with FakeApiServer(store=FakeStore(db_latency=0.005)) as server, \
+            ApiClient(server.base_url, recorder=phases.record) as client:
+        users = []
+        for name in ("alice", "bob"):
+            result = client.session().post("/auth/register", json={
+                "name": name, "email": f"{name}@example.com", "password": "TimingPass123!",
+            }).json()
+            users.append((result["user"]["id"], client.session(result["token"])))
+        (alice_id, alice), (bob_id, bob) = users
+
+        alice.post("/messages", json={"recipientId": bob_id, "content": "hello"})
+        response = bob.get(f"/messages/{alice_id}")
+
+    names = [name for name, _, _ in parse_server_timing(response.headers["Server-Timing"])]
+    assert names == ["auth", "db", "format", "route", "total", "loop"]
+
+    stats = phases.routes["GET /messages/:userId"]
+    assert stats.requests == 1
+    assert stats.mean("db") >= 5
+    assert stats.mean("total") >= stats.mean("auth") + stats.mean("db") + stats.mean("format")
+    assert dict(stats.queries)["get_conversation_page"][0] == 1
+    assert any(line.startswith("GET /messages/:userId") for line in phases.lines())
@@ -0,0 +1,55 @@
+"""Soak run against the offline fake, and leak/drift detection on sampled series"""
+
+import os
+
+from backend_test import store_seeder
+from tests.proc import ProcessFileDescriptors, ProcessMemory
+from tests.soak import DEFAULT_MIX, detect_trend, run_soak
+
+MIB = 1024 * 1024
+
+
+def test_mixed_workload_is_sampled_every_interval(fake_server):
+    report = run_soak(fake_server.base_url, users=6, concurrency=4, duration=2.0, interval=0.25,
+                      seeder=store_seeder(fake_server.store, "soak"), rss_probe=ProcessMemory(os.getpid()),
+                      fd_probe=ProcessFileDescriptors(os.getpid()), log=lambda _: None, seed=1)
+
+    assert report.errors == 0, report.lines()
+    assert len(report.samples) == 8
+    assert all(sample.rss and sample.fds and sample.loop_ms is not None for sample in report.samples)
+    assert all(report.operations[name] for name in DEFAULT_MIX), report.operations
+    assert {trend.name for trend in report.trends} == {
+        "server memory", "open file descriptors", "p95 latency", "event-loop delay",
+    }
+
+
+def test_growth_is_flagged_only_when_it_keeps_climbing():
+    warmup = [400.0, 600.0]
+    leaking = warmup + [100.0 + 2 * i for i in range(40)]
+    cache = warmup + [100.0 + min(i, 10) * 5 for i in range(40)]
+    sawtooth = warmup + [100.0 + (i % 5) * 10 for i in range(40)]
+
+    assert detect_trend("memory", "MiB", leaking, 0.1, 16, monotonic=True).flagged
+    assert not detect_trend("memory", "MiB", cache, 0.1, 16, monotonic=True).flagged
+    assert not detect_trend("memory", "MiB", sawtooth, 0.1, 16, monotonic=True).flagged
+    assert detect_trend("memory", "MiB", [MIB] * 3, 0.1, 16, monotonic=True).reason == "insufficient samples"
+    assert detect_trend("memory", "MiB", [None] * 40, 0.1, 16, monotonic=True) is None
+
+
+def test_latency_drift_is_flagged_even_when_noisy():
+    drifting = [5.0 + (i % 3) + i * 0.5 for i in range(40)]
+    steady = [5.0 + (i % 7) for i in range(40)]
+
+    assert detect_trend("p95", "ms", drifting, 0.5, 5, monotonic=False).flagged
+    assert not detect_trend("p95", "ms", steady, 0.5, 5, monotonic=False).flagged
+
+
+def test_loop_delay_before_the_first_window_is_not_drift():
+    # An 8s run: the API reports 0 until its first 5s window closes
+    short = [0.0] * 5 + [12.0, 11.0, 12.5, 12.0]
+    trend = detect_trend("event-loop delay", "ms", short, 0.5, 5, monotonic=False)
+    assert not trend.flagged
+    assert trend.reason == "insufficient samples"
+
+    steady = [0.0] * 5 + [12.0 + (i % 3) for i in range(40)]
+    assert detect_trend("event-loop delay", "ms", steady, 0.5, 5, monotonic=False).reason == "stable"
@@ -0,0 +1,69 @@
+"""Event stream fan-out against the offline fake"""
+
+import json
+
+import requests
+
+from backend_test import store_seeder
+from tests.client import ApiClient
+from tests.fake_api import EVENTS_HIGH_WATER_BYTES, EventHub, encode_event
+from tests.stream_fanout import run_stream_fanout
+
+
+def test_messages_and_presence_reach_every_subscriber(fake_server):
+    report = run_stream_fanout(fake_server.base_url, subscribers=300, messages=100,
+                               seeder=store_seeder(fake_server.store, "stream"), log=lambda _: None)
+
+    assert report.ok, report.lines()
+
+
+def test_events_require_a_token(fake_server):
+    response = requests.get(f"{fake_server.base_url}/events", params={"token": "not-a-token"}, timeout=5)
+    assert response.status_code == 401
+
+
+def test_a_subscriber_that_stops_reading_is_dropped():
+    hub = EventHub(stall_seconds=0)
+    stalled, reading = hub.subscribe("stalled"), hub.subscribe("reading")
+    chunk_size = len(encode_event("presence", {"userId": "someone", "online": True}))
+
+    for _ in range(EVENTS_HIGH_WATER_BYTES // chunk_size + 2):
+        hub.publish_presence({"userId": "someone", "online": True})
+        assert reading.get(timeout=1)
+
+    assert hub.dropped == 1
+    assert hub.count() == 1
+    # Ended at once, without writing the backlog first
+    assert stalled.get(timeout=1) is None
+    assert reading.backlog == 0
+
+
+def test_message_events_carry_their_cursor_instead_of_an_event_id(fake_server):
+    with ApiClient(fake_server.base_url) as client:
+        users = {}
+        for name in ("alice", "bob"):
+            response = client.session().post("/auth/register", json={
+                "email": f"{name}@example.com", "password": "SecurePass123!", "name": name,
+            })
+            users[name] = response.json()
+        with requests.get(f"{fake_server.base_url}/events", params={"token": users["bob"]["token"]},
+                          stream=True, timeout=5) as stream:
+            lines = stream.iter_lines(chunk_size=1, decode_unicode=True)
+            assert "event: ready" in [next(lines) for _ in range(4)]
+            alice = client.session(users["alice"]["token"])
+            sent = alice.post("/messages", json={"recipientId": users["bob"]["user"]["id"], "content": "hi"})
+            event = []
+            for line in lines:
+                if line:
+                    event.append(line)
+                elif event:
+                    break
+        data = json.loads(event[-1][len("data:"):])
+
+        page = alice.get(f"/messages/{users['bob']['user']['id']}", params={"since": data["cursor"]})
+
+    assert event[0] == "event: message"
+    assert len(event) == 2
+    assert data["id"] == sent.json()["id"]
+    # The cursor resumes the conversation after the message
+    assert page.json() == []
@@ -0,0 +1,20 @@
+"""Token reuse scenario against the offline fake"""
+
+from backend_test import store_seeder
+from tests.fake_api import FakeApiServer, FakeStore
+from tests.token_reuse import run_token_reuse
+
+
+def test_repeat_tokens_hit_the_cache():
+    with FakeApiServer(store=FakeStore(auth_cache_debug=True)) as server:
+        report = run_token_reuse(
+            server.base_url, tokens=200, requests=2000, concurrency=50,
+            seeder=store_seeder(server.store, "tokens"),
+            cpu_counter=lambda: server.store.request_cpu_seconds,
+            log=lambda _: None, seed=1,
+        )
+
+    assert report.errors == 0
+    # Only the first request with each token has to verify the signature
+    assert (report.hits, report.misses) == (1800, 200)
+    assert report.cpu_ms_per_request > 0
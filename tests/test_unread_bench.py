@@ -0,0 +1,54 @@
+"""Unread summary counts against the offline fake
+
+The fake's timings say nothing about the counters in Postgres (run
+--unread-bench against a live server to see whether latency stays flat),
+so the bench test checks the counts and that the summary doesn't grow with
+the history behind it.
+"""
+
+from tests.client import ApiClient
+from tests.conversation_bench import history_text
+from tests.unread_bench import UnreadBenchmark
+
+
+def test_unread_summary_does_not_grow_with_history(fake_server):
+    def seeder(sender_id, recipient_id, first, count):
+        for i in range(first, first + count):
+            fake_server.store.insert_message(sender_id, recipient_id, history_text(i))
+
+    rows = UnreadBenchmark(
+        fake_server.base_url, contacts=20, sizes=(1_000, 5_000), samples=3, seeder=seeder, log=lambda _: None
+    ).run()
+
+    # 4,000 more messages; only the counts gain a digit
+    assert rows[1].summary_bytes - rows[0].summary_bytes < 100
+    assert all(not row.mismatches for row in rows), [row.mismatches for row in rows]
+
+
+def test_summary_leaves_messages_unread_until_the_conversation_is_opened(fake_server):
+    with ApiClient(fake_server.base_url) as client:
+        sessions = {}
+        for name in ("Ann", "Ben"):
+            result = client.session().post("/auth/register", json={
+                "name": name, "email": f"{name.lower()}@example.com", "password": "Pass123!",
+            }).json()
+            sessions[name] = (result["user"]["id"], client.session(result["token"]))
+        ann_id, ann = sessions["Ann"]
+        ben_id, ben = sessions["Ben"]
+        for text in ("hi", "are you there?"):
+            ben.post("/messages", json={"recipientId": ann_id, "content": text})
+
+        before = ann.get("/messages/unread").json()
+        ann.get(f"/messages/{ben_id}")
+        after = ann.get("/messages/unread").json()
+
+    assert before["totalUnread"] == 2
+    assert before["conversations"] == [{
+        "userId": ben_id,
+        "userName": "Ben",
+        "unreadCount": 2,
+        "lastMessage": {**before["conversations"][0]["lastMessage"], "senderId": ben_id, "preview": "are you there?"},
+    }]
+    # Fetching the summary didn't mark anything read; opening the conversation did
+    assert after["totalUnread"] == 0
+    assert after["conversations"][0]["unreadCount"] == 0
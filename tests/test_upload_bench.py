@@ -0,0 +1,38 @@
+"""Upload bench harness against the offline fake
+
+Checks the fake stores files UPLOAD_CONCURRENCY at a time and that the
+bench's peak memory reading follows the upload size; how long uploads take
+is only meaningful with --upload-bench against a live server and real
+storage.
+"""
+
+import os
+
+import pytest
+
+from tests.fake_api import UPLOAD_CONCURRENCY, FakeStore
+from tests.proc import ProcessPeakMemory
+from tests.upload_bench import UploadBenchmark
+
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def fake_store():
+    return FakeStore(storage_latency=0.05)
+
+
+def test_ten_files_upload_several_at_a_time(fake_server):
+    rows = UploadBenchmark(fake_server.base_url, counts=(10,), file_size=64 * 1024, log=lambda _: None).run()
+
+    assert rows[0].uploaded == 10
+    assert fake_server.store.storage.peak_in_flight == UPLOAD_CONCURRENCY
+
+
+def test_peak_memory_grows_with_the_upload(fake_server):
+    # The fake shares this process, so the reading includes the client's copy of the body
+    rows = UploadBenchmark(fake_server.base_url, counts=(1, 16), file_size=MIB,
+                           memory_probe=ProcessPeakMemory(os.getpid()), log=lambda _: None).run()
+
+    small, large = rows
+    assert large.peak_growth > small.peak_growth + 8 * MIB
@@ -0,0 +1,148 @@
+"""
+Token reuse load scenario for the verifyToken and user row caches.
+
+Spreads a large number of authenticated requests over a fixed pool of a few
+thousand tokens, the way real clients reuse one token for days, and reports
+how often the server answered from its token cache (the `X-Auth-Cache`
+response header, sent when the API runs with AUTH_CACHE_DEBUG=true) along
+with server CPU time per request.
+
+Server CPU comes from a `cpu_counter()` callable returning cumulative CPU
+seconds: the offline fake counts it per request, and `tests.proc.ProcessCpu`
+reads it from /proc for a server running on this machine.
+
+Requires aiohttp (`pip install aiohttp`).
+"""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from tests.client import AsyncApiClient
+from tests.load import percentile
+
+
+class TokenReuseReport:
+    """Outcome of one token reuse run"""
+
+    def __init__(self, tokens, latencies, errors, elapsed, hits, misses, cpu_seconds=None):
+        self.tokens = tokens
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.elapsed = elapsed
+        self.hits = hits
+        self.misses = misses
+        self.cpu_seconds = cpu_seconds
+
+    @property
+    def requests(self):
+        return len(self.latencies) + self.errors
+
+    @property
+    def hit_rate(self):
+        """Share of requests answered from the token cache, None if not reported"""
+        seen = self.hits + self.misses
+        return self.hits / seen if seen else None
+
+    @property
+    def cpu_ms_per_request(self):
+        if self.cpu_seconds is None or not self.requests:
+            return None
+        return self.cpu_seconds * 1000 / self.requests
+
+    def lines(self):
+        out = [
+            f"Requests: {self.requests} over {self.tokens} tokens in {self.elapsed:.2f}s "
+            f"({self.requests / self.elapsed:.0f} req/s), errors: {self.errors}",
+            f"Latency: p50 {percentile(self.latencies, 50):.2f}ms, "
+            f"p95 {percentile(self.latencies, 95):.2f}ms, p99 {percentile(self.latencies, 99):.2f}ms",
+        ]
+        if self.hit_rate is None:
+            out.append("Token cache: not reported by the server (no X-Auth-Cache header; "
+                       "start the API with AUTH_CACHE_DEBUG=true)")
+        else:
+            out.append(f"Token cache: {self.hits} hits, {self.misses} misses ({self.hit_rate * 100:.1f}% hit rate)")
+        if self.cpu_ms_per_request is not None:
+            out.append(f"Server CPU: {self.cpu_seconds:.3f}s ({self.cpu_ms_per_request:.3f}ms per request)")
+        return out
+
+
+class TokenReuseLoad:
+    """Sends `requests` authenticated requests spread over `tokens` tokens
+
+    `seeder(count)` may return (user_id, token) pairs to skip registering
+    through the API.
+    """
+
+    def __init__(self, base_url, tokens=2000, requests=20000, concurrency=100, path="/auth/me",
+                 seeder=None, cpu_counter=None, log=print, seed=None):
+        self.base_url = base_url
+        self.tokens = tokens
+        self.requests = requests
+        self.concurrency = concurrency
+        self.path = path
+        self.seeder = seeder
+        self.cpu_counter = cpu_counter
+        self.log = log
+        self.random = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+
+    async def _register(self, client, index):
+        payload = {
+            "name": f"Token User {index}",
+            "email": f"tokens-{self.run_id}-{index}@example.com",
+            "password": "TokenPass123!",
+        }
+        status, _, body = await client.session().request("POST", "/auth/register", json=payload)
+        if status not in (200, 201):
+            raise RuntimeError(f"Registering token user {index} failed: {status} - {body[:200]!r}")
+        result = json.loads(body)
+        return result["user"]["id"], result["token"]
+
+    async def _accounts(self, client, limit):
+        if self.seeder:
+            return self.seeder(self.tokens)
+
+        async def register(index):
+            async with limit:
+                return await self._register(client, index)
+
+        return await asyncio.gather(*(register(i) for i in range(self.tokens)))
+
+    async def run(self):
+        limit = asyncio.Semaphore(self.concurrency)
+        latencies, errors, outcomes = [], 0, {"hit": 0, "miss": 0}
+
+        async with AsyncApiClient(self.base_url, limit=self.concurrency) as client:
+            self.log(f"Preparing {self.tokens} tokens...")
+            sessions = [client.session(token) for _, token in await self._accounts(client, limit)]
+            picks = [self.random.choice(sessions) for _ in range(self.requests)]
+
+            async def send(session):
+                nonlocal errors
+                async with limit:
+                    started = time.perf_counter()
+                    status, headers, _ = await session.request("GET", self.path)
+                    if status != 200:
+                        errors += 1
+                        return
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    outcome = headers.get("X-Auth-Cache")
+                    if outcome in outcomes:
+                        outcomes[outcome] += 1
+
+            self.log(f"Sending {self.requests} requests to {self.path}...")
+            cpu_before = self.cpu_counter() if self.cpu_counter else None
+            started = time.perf_counter()
+            await asyncio.gather(*(send(session) for session in picks))
+            elapsed = time.perf_counter() - started
+            cpu = self.cpu_counter() - cpu_before if self.cpu_counter else None
+
+        return TokenReuseReport(self.tokens, latencies, errors, elapsed, outcomes["hit"], outcomes["miss"], cpu)
+
+
+def run_token_reuse(base_url, **kwargs):
+    """Run the token reuse scenario synchronously and return its TokenReuseReport"""
+    return asyncio.run(TokenReuseLoad(base_url, **kwargs).run())
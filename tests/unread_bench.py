@@ -0,0 +1,152 @@
+"""
+Unread summary benchmark for GET /api/messages/unread.
+
+One reader has `contacts` contacts. The message history grows through a
+series of total sizes, spread evenly over the contacts, while the reader
+reads one conversation and replies in another. At each size the summary is
+checked against what was sent: every contact's unread count, the latest
+message preview and sender, newest-first order and the total. Then the
+summary fetch is timed. Counts come from maintained counters, so the
+latency should stay flat from 1k to 100k messages.
+"""
+
+import uuid
+
+from tests.bench import LatencyHistogram
+from tests.client import ApiClient
+from tests.conversation_bench import history_text
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+MAX_BATCH = 500
+
+
+class UnreadRow:
+    """Measurements and checks at one history size"""
+
+    def __init__(self, size, summary_bytes, latency, mismatches):
+        self.size = size
+        self.summary_bytes = summary_bytes
+        self.latency = latency
+        self.mismatches = mismatches
+
+    def line(self):
+        status = "ok" if not self.mismatches else f"{len(self.mismatches)} wrong"
+        return (
+            f"{self.size:>9}{self.summary_bytes:>10}"
+            f"{self.latency.percentile(50) / 1000:>10.2f}{self.latency.percentile(95) / 1000:>10.2f}{status:>10}"
+        )
+
+
+def is_flat(rows, tolerance=3.0):
+    """True when p50 latency at the largest size is within `tolerance`x of the smallest"""
+    baseline = max(rows[0].latency.percentile(50), 1)
+    return rows[-1].latency.percentile(50) <= baseline * tolerance
+
+
+class UnreadBenchmark:
+    """Grows a reader's message history and checks and times the unread summary
+
+    `seeder(sender_id, recipient_id, first, count)` adds messages
+    history_text(first) .. history_text(first + count - 1) from the contact
+    to the reader; by default through POST /api/messages/batch. The offline
+    mode passes a seeder that writes to the fake store directly.
+    """
+
+    def __init__(self, base_url, contacts=50, sizes=DEFAULT_SIZES, samples=30, seeder=None, log=print):
+        self.base_url = base_url
+        self.contacts = contacts
+        self.sizes = sorted(sizes)
+        self.samples = samples
+        self.seeder = seeder
+        self.log = log
+
+    def _register(self, client, name, run_id):
+        response = client.session().post("/auth/register", json={
+            "name": name,
+            "email": f"{name.lower().replace(' ', '-')}+unreadbench-{run_id}@example.com",
+            "password": "BenchPass123!",
+        })
+        response.raise_for_status()
+        result = response.json()
+        return result["user"]["id"], client.session(result["token"])
+
+    @staticmethod
+    def _api_seeder(sessions):
+        def seed(sender_id, recipient_id, first, count):
+            for start in range(first, first + count, MAX_BATCH):
+                batch = [{"recipientId": recipient_id, "content": history_text(i)}
+                         for i in range(start, min(start + MAX_BATCH, first + count))]
+                sessions[sender_id].post("/messages/batch", json={"messages": batch}).raise_for_status()
+        return seed
+
+    @staticmethod
+    def check(summary, expected):
+        """Differences between a summary response and the expected
+        {contact id: (unread, last text, last sender)}"""
+        mismatches = []
+        conversations = summary["conversations"]
+        if {entry["userId"] for entry in conversations} != set(expected):
+            mismatches.append("wrong set of conversations")
+        latest = [entry["lastMessage"]["createdAt"] for entry in conversations]
+        if latest != sorted(latest, reverse=True):
+            mismatches.append("conversations are not newest first")
+        for entry in conversations:
+            unread, text, sender_id = expected.get(entry["userId"], (None, None, None))
+            if entry["unreadCount"] != unread:
+                mismatches.append(f"{entry['userId']}: {entry['unreadCount']} unread, expected {unread}")
+            if entry["lastMessage"]["preview"] != text or entry["lastMessage"]["senderId"] != sender_id:
+                mismatches.append(f"{entry['userId']}: wrong latest message")
+        total = sum(unread for unread, _, _ in expected.values())
+        if summary["totalUnread"] != total:
+            mismatches.append(f"totalUnread {summary['totalUnread']}, expected {total}")
+        return mismatches
+
+    def run(self):
+        rows = []
+        run_id = uuid.uuid4().hex[:8]
+        with ApiClient(self.base_url) as client:
+            reader_id, reader = self._register(client, "Reader", run_id)
+            contacts = [self._register(client, f"Contact {i}", run_id) for i in range(self.contacts)]
+            seeder = self.seeder or self._api_seeder(dict(contacts))
+
+            # contact id -> (unread, last text, last sender)
+            expected = {}
+            sent = {contact_id: 0 for contact_id, _ in contacts}
+            current = 0
+            for size in self.sizes:
+                self.log(f"Growing history to {size} messages over {self.contacts} contacts...")
+                per_contact = (size - current) // self.contacts
+                for contact_id, _ in contacts:
+                    seeder(contact_id, reader_id, sent[contact_id], per_contact)
+                    sent[contact_id] += per_contact
+                    unread = expected.get(contact_id, (0, None, None))[0]
+                    expected[contact_id] = (unread + per_contact, history_text(sent[contact_id] - 1), contact_id)
+                current = size
+
+                # Reading the first contact's newest page marks it all read
+                first_id = contacts[0][0]
+                reader.get(f"/messages/{first_id}").raise_for_status()
+                expected[first_id] = (0, *expected[first_id][1:])
+                # Replying to the second moves it to the top, unread untouched
+                second_id = contacts[1 % self.contacts][0]
+                reply = f"reply at {size}"
+                reader.post("/messages", json={"recipientId": second_id, "content": reply}).raise_for_status()
+                expected[second_id] = (expected[second_id][0], reply, reader_id)
+
+                latency, summary_bytes, mismatches = LatencyHistogram(), 0, []
+                for _ in range(self.samples):
+                    response = reader.get("/messages/unread", params={"limit": 100})
+                    response.raise_for_status()
+                    latency.record_seconds(response.elapsed.total_seconds())
+                    summary_bytes = len(response.content)
+                    mismatches = self.check(response.json(), expected)
+                rows.append(UnreadRow(size, summary_bytes, latency, mismatches))
+        return rows
+
+
+def report_lines(rows):
+    out = [f"{'messages':>9}{'bytes':>10}{'p50 ms':>10}{'p95 ms':>10}{'counts':>10}"]
+    out.extend(row.line() for row in rows)
+    for row in rows:
+        out.extend(f"  {row.size}: {mismatch}" for mismatch in row.mismatches[:5])
+    return out
@@ -0,0 +1,92 @@
+"""
+Multi-file upload benchmark for POST /api/upload.
+
+Sends one upload request with 1, 10 and 50 image files and reports, for
+each, the wall time of the request and how far the server's peak resident
+memory rose above its resident memory before the request.
+
+`memory_probe` is a `tests.proc.ProcessPeakMemory` (or anything with the
+same reset()/__call__() pair). Offline the fake shares this process, so the
+peak includes the client's copy of the request body as well; run against a
+local server with --server-pid for server-only numbers. The offline fake
+uses a local storage stand-in whose per-file latency is set with
+--storage-latency.
+"""
+
+import os
+import time
+import uuid
+
+from tests.client import ApiClient
+
+DEFAULT_COUNTS = (1, 10, 50)
+DEFAULT_FILE_SIZE = 1024 * 1024
+
+
+class UploadRow:
+    """Measurements for one upload request"""
+
+    def __init__(self, files, total_bytes, seconds, uploaded, peak_growth=None):
+        self.files = files
+        self.total_bytes = total_bytes
+        self.seconds = seconds
+        self.uploaded = uploaded
+        self.peak_growth = peak_growth
+
+    def line(self):
+        peak = "n/a" if self.peak_growth is None else f"{self.peak_growth / 1024 / 1024:.1f}"
+        return (
+            f"{self.files:>6}{self.total_bytes / 1024 / 1024:>10.1f}{self.seconds:>10.3f}"
+            f"{self.uploaded:>10}{peak:>12}"
+        )
+
+
+class UploadBenchmark:
+    """Times single upload requests carrying `counts` files of `file_size` bytes"""
+
+    def __init__(self, base_url, counts=DEFAULT_COUNTS, file_size=DEFAULT_FILE_SIZE, memory_probe=None, log=print):
+        self.base_url = base_url
+        self.counts = counts
+        self.file_size = file_size
+        self.memory_probe = memory_probe
+        self.log = log
+
+    def _register(self, client):
+        response = client.session().post("/auth/register", json={
+            "name": "Upload Bench",
+            "email": f"uploadbench-{uuid.uuid4().hex[:8]}@example.com",
+            "password": "BenchPass123!",
+        })
+        response.raise_for_status()
+        return client.session(response.json()["token"])
+
+    def run(self):
+        rows = []
+        # One random payload shared by every file keeps the client side small
+        payload = os.urandom(self.file_size)
+        with ApiClient(self.base_url, timeout=300) as client:
+            session = self._register(client)
+            for count in self.counts:
+                self.log(f"Uploading {count} file(s)...")
+                files = [("files", (f"photo-{i}.jpg", payload, "image/jpeg")) for i in range(count)]
+                before = None
+                if self.memory_probe:
+                    # Right after a reset the peak is the current resident size
+                    self.memory_probe.reset()
+                    before = self.memory_probe()
+
+                started = time.perf_counter()
+                response = session.post("/upload", files=files, data={"folder": "bench"})
+                seconds = time.perf_counter() - started
+                response.raise_for_status()
+
+                peak_growth = max(self.memory_probe() - before, 0) if self.memory_probe else None
+                rows.append(UploadRow(count, count * self.file_size, seconds,
+                                      len(response.json()["uploaded"]), peak_growth))
+        return rows
+
+
+def report_lines(rows):
+    out = [f"{'files':>6}{'MiB':>10}{'wall s':>10}{'uploaded':>10}{'peak +MiB':>12}"]
+    out.extend(row.line() for row in rows)
+    return out